@@ -5,6 +5,7 @@ from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config, AsyncEngine
 
+import compose_api.db.tables.dispatch_tables  # noqa: F401
 import compose_api.db.tables.hpc_tables  # noqa: F401
 import compose_api.db.tables.package_tables  # noqa: F401
 import compose_api.db.tables.simulator_tables  # noqa: F401
@@ -8,13 +8,29 @@ from ...types import Response, UNSET
 from ... import errors
 
 from ...models.http_validation_error import HTTPValidationError
+from ...types import UNSET, Unset
 from typing import cast
+from typing import cast, Union
+from typing import Union
 
 
 def _get_kwargs(
     *,
     simulation_id: int,
+    range_: Union[None, Unset, str] = UNSET,
+    if_range: Union[None, Unset, str] = UNSET,
+    if_none_match: Union[None, Unset, str] = UNSET,
 ) -> dict[str, Any]:
+    headers: dict[str, Any] = {}
+    if not isinstance(range_, Unset):
+        headers["Range"] = range_
+
+    if not isinstance(if_range, Unset):
+        headers["if-range"] = if_range
+
+    if not isinstance(if_none_match, Unset):
+        headers["if-none-match"] = if_none_match
+
     params: dict[str, Any] = {}
 
     params["simulation_id"] = simulation_id
@@ -27,6 +43,7 @@ def _get_kwargs(
         "params": params,
     }
 
+    _kwargs["headers"] = headers
     return _kwargs
 
 
@@ -36,6 +53,12 @@ def _parse_response(
     if response.status_code == 200:
         response_200 = cast(Any, response.content)
         return response_200
+    if response.status_code == 206:
+        response_206 = cast(Any, None)
+        return response_206
+    if response.status_code == 304:
+        response_304 = cast(Any, None)
+        return response_304
     if response.status_code == 422:
         response_422 = HTTPValidationError.from_dict(response.json())
 
@@ -61,11 +84,22 @@ def sync_detailed(
     *,
     client: Union[AuthenticatedClient, Client],
     simulation_id: int,
+    range_: Union[None, Unset, str] = UNSET,
+    if_range: Union[None, Unset, str] = UNSET,
+    if_none_match: Union[None, Unset, str] = UNSET,
 ) -> Response[Union[Any, HTTPValidationError]]:
     """Get simulation results as a zip file
 
+     Streams the result zip from the local results cache, which is populated from the cluster on a miss;
+    archives
+    too large for the cache are streamed as they are read from the cluster.
+    Supports a single byte range (resumed downloads), If-Range, and If-None-Match against the ETag.
+
     Args:
         simulation_id (int):
+        range_ (Union[None, Unset, str]):
+        if_range (Union[None, Unset, str]):
+        if_none_match (Union[None, Unset, str]):
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -77,6 +111,9 @@ def sync_detailed(
 
     kwargs = _get_kwargs(
         simulation_id=simulation_id,
+        range_=range_,
+        if_range=if_range,
+        if_none_match=if_none_match,
     )
 
     response = client.get_httpx_client().request(
@@ -90,11 +127,22 @@ def sync(
     *,
     client: Union[AuthenticatedClient, Client],
     simulation_id: int,
+    range_: Union[None, Unset, str] = UNSET,
+    if_range: Union[None, Unset, str] = UNSET,
+    if_none_match: Union[None, Unset, str] = UNSET,
 ) -> Optional[Union[Any, HTTPValidationError]]:
     """Get simulation results as a zip file
 
+     Streams the result zip from the local results cache, which is populated from the cluster on a miss;
+    archives
+    too large for the cache are streamed as they are read from the cluster.
+    Supports a single byte range (resumed downloads), If-Range, and If-None-Match against the ETag.
+
     Args:
         simulation_id (int):
+        range_ (Union[None, Unset, str]):
+        if_range (Union[None, Unset, str]):
+        if_none_match (Union[None, Unset, str]):
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -107,6 +155,9 @@ def sync(
     return sync_detailed(
         client=client,
         simulation_id=simulation_id,
+        range_=range_,
+        if_range=if_range,
+        if_none_match=if_none_match,
     ).parsed
 
 
@@ -114,11 +165,22 @@ async def asyncio_detailed(
     *,
     client: Union[AuthenticatedClient, Client],
     simulation_id: int,
+    range_: Union[None, Unset, str] = UNSET,
+    if_range: Union[None, Unset, str] = UNSET,
+    if_none_match: Union[None, Unset, str] = UNSET,
 ) -> Response[Union[Any, HTTPValidationError]]:
     """Get simulation results as a zip file
 
+     Streams the result zip from the local results cache, which is populated from the cluster on a miss;
+    archives
+    too large for the cache are streamed as they are read from the cluster.
+    Supports a single byte range (resumed downloads), If-Range, and If-None-Match against the ETag.
+
     Args:
         simulation_id (int):
+        range_ (Union[None, Unset, str]):
+        if_range (Union[None, Unset, str]):
+        if_none_match (Union[None, Unset, str]):
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -130,6 +192,9 @@ async def asyncio_detailed(
 
     kwargs = _get_kwargs(
         simulation_id=simulation_id,
+        range_=range_,
+        if_range=if_range,
+        if_none_match=if_none_match,
     )
 
     response = await client.get_async_httpx_client().request(**kwargs)
@@ -141,11 +206,22 @@ async def asyncio(
     *,
     client: Union[AuthenticatedClient, Client],
     simulation_id: int,
+    range_: Union[None, Unset, str] = UNSET,
+    if_range: Union[None, Unset, str] = UNSET,
+    if_none_match: Union[None, Unset, str] = UNSET,
 ) -> Optional[Union[Any, HTTPValidationError]]:
     """Get simulation results as a zip file
 
+     Streams the result zip from the local results cache, which is populated from the cluster on a miss;
+    archives
+    too large for the cache are streamed as they are read from the cluster.
+    Supports a single byte range (resumed downloads), If-Range, and If-None-Match against the ETag.
+
     Args:
         simulation_id (int):
+        range_ (Union[None, Unset, str]):
+        if_range (Union[None, Unset, str]):
+        if_none_match (Union[None, Unset, str]):
 
     Raises:
         errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
@@ -159,5 +235,8 @@ async def asyncio(
         await asyncio_detailed(
             client=client,
             simulation_id=simulation_id,
+            range_=range_,
+            if_range=if_range,
+            if_none_match=if_none_match,
         )
     ).parsed
@@ -0,0 +1,324 @@
+from http import HTTPStatus
+from typing import Any, Optional, Union, cast
+
+import httpx
+
+from ...client import AuthenticatedClient, Client
+from ...types import Response, UNSET
+from ... import errors
+
+from ...models.http_validation_error import HTTPValidationError
+from ...models.query_simulation_results_response_200 import QuerySimulationResultsResponse200
+from ...models.requested_observables import RequestedObservables
+from ...models.results_format import ResultsFormat
+from ...types import UNSET, Unset
+from typing import cast
+from typing import cast, Union
+from typing import Union
+
+
+def _get_kwargs(
+    *,
+    body: RequestedObservables,
+    simulation_id: int,
+    report_id: Union[None, Unset, str] = UNSET,
+    time_column: Union[Unset, str] = "time",
+    start_time: Union[None, Unset, float] = UNSET,
+    end_time: Union[None, Unset, float] = UNSET,
+    limit: Union[None, Unset, int] = UNSET,
+    response_format: Union[Unset, ResultsFormat] = UNSET,
+) -> dict[str, Any]:
+    headers: dict[str, Any] = {}
+
+    params: dict[str, Any] = {}
+
+    params["simulation_id"] = simulation_id
+
+    json_report_id: Union[None, Unset, str]
+    if isinstance(report_id, Unset):
+        json_report_id = UNSET
+    else:
+        json_report_id = report_id
+    params["report_id"] = json_report_id
+
+    params["time_column"] = time_column
+
+    json_start_time: Union[None, Unset, float]
+    if isinstance(start_time, Unset):
+        json_start_time = UNSET
+    else:
+        json_start_time = start_time
+    params["start_time"] = json_start_time
+
+    json_end_time: Union[None, Unset, float]
+    if isinstance(end_time, Unset):
+        json_end_time = UNSET
+    else:
+        json_end_time = end_time
+    params["end_time"] = json_end_time
+
+    json_limit: Union[None, Unset, int]
+    if isinstance(limit, Unset):
+        json_limit = UNSET
+    else:
+        json_limit = limit
+    params["limit"] = json_limit
+
+    json_response_format: Union[Unset, str] = UNSET
+    if not isinstance(response_format, Unset):
+        json_response_format = response_format.value
+
+    params["response_format"] = json_response_format
+
+    params = {k: v for k, v in params.items() if v is not UNSET and v is not None}
+
+    _kwargs: dict[str, Any] = {
+        "method": "post",
+        "url": "/results/simulation/results/query",
+        "params": params,
+    }
+
+    _kwargs["json"] = body.to_dict()
+
+    headers["Content-Type"] = "application/json"
+
+    _kwargs["headers"] = headers
+    return _kwargs
+
+
+def _parse_response(
+    *, client: Union[AuthenticatedClient, Client], response: httpx.Response
+) -> Optional[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    if response.status_code == 200:
+        response_200 = QuerySimulationResultsResponse200.from_dict(response.json())
+
+        return response_200
+    if response.status_code == 422:
+        response_422 = HTTPValidationError.from_dict(response.json())
+
+        return response_422
+    if client.raise_on_unexpected_status:
+        raise errors.UnexpectedStatus(response.status_code, response.content)
+    else:
+        return None
+
+
+def _build_response(
+    *, client: Union[AuthenticatedClient, Client], response: httpx.Response
+) -> Response[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    return Response(
+        status_code=HTTPStatus(response.status_code),
+        content=response.content,
+        headers=response.headers,
+        parsed=_parse_response(client=client, response=response),
+    )
+
+
+def sync_detailed(
+    *,
+    client: Union[AuthenticatedClient, Client],
+    body: RequestedObservables,
+    simulation_id: int,
+    report_id: Union[None, Unset, str] = UNSET,
+    time_column: Union[Unset, str] = "time",
+    start_time: Union[None, Unset, float] = UNSET,
+    end_time: Union[None, Unset, float] = UNSET,
+    limit: Union[None, Unset, int] = UNSET,
+    response_format: Union[Unset, ResultsFormat] = UNSET,
+) -> Response[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    r"""Query selected observables of the simulation results
+
+     Reads only the requested columns (`observables`: names, or regexes starting with \"^\") of one
+    report from the
+    Parquet dataset of the results. Results which were not ingested yet (see ResultsIngestor) are
+    ingested first.
+
+    Args:
+        simulation_id (int):
+        report_id (Union[None, Unset, str]): Report to read, optional if there is only one
+        time_column (Union[Unset, str]):  Default: 'time'.
+        start_time (Union[None, Unset, float]):
+        end_time (Union[None, Unset, float]):
+        limit (Union[None, Unset, int]): Maximum number of rows
+        response_format (Union[Unset, ResultsFormat]):
+        body (RequestedObservables):
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Response[Union[HTTPValidationError, QuerySimulationResultsResponse200]]
+    """
+
+    kwargs = _get_kwargs(
+        body=body,
+        simulation_id=simulation_id,
+        report_id=report_id,
+        time_column=time_column,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+        response_format=response_format,
+    )
+
+    response = client.get_httpx_client().request(
+        **kwargs,
+    )
+
+    return _build_response(client=client, response=response)
+
+
+def sync(
+    *,
+    client: Union[AuthenticatedClient, Client],
+    body: RequestedObservables,
+    simulation_id: int,
+    report_id: Union[None, Unset, str] = UNSET,
+    time_column: Union[Unset, str] = "time",
+    start_time: Union[None, Unset, float] = UNSET,
+    end_time: Union[None, Unset, float] = UNSET,
+    limit: Union[None, Unset, int] = UNSET,
+    response_format: Union[Unset, ResultsFormat] = UNSET,
+) -> Optional[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    r"""Query selected observables of the simulation results
+
+     Reads only the requested columns (`observables`: names, or regexes starting with \"^\") of one
+    report from the
+    Parquet dataset of the results. Results which were not ingested yet (see ResultsIngestor) are
+    ingested first.
+
+    Args:
+        simulation_id (int):
+        report_id (Union[None, Unset, str]): Report to read, optional if there is only one
+        time_column (Union[Unset, str]):  Default: 'time'.
+        start_time (Union[None, Unset, float]):
+        end_time (Union[None, Unset, float]):
+        limit (Union[None, Unset, int]): Maximum number of rows
+        response_format (Union[Unset, ResultsFormat]):
+        body (RequestedObservables):
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Union[HTTPValidationError, QuerySimulationResultsResponse200]
+    """
+
+    return sync_detailed(
+        client=client,
+        body=body,
+        simulation_id=simulation_id,
+        report_id=report_id,
+        time_column=time_column,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+        response_format=response_format,
+    ).parsed
+
+
+async def asyncio_detailed(
+    *,
+    client: Union[AuthenticatedClient, Client],
+    body: RequestedObservables,
+    simulation_id: int,
+    report_id: Union[None, Unset, str] = UNSET,
+    time_column: Union[Unset, str] = "time",
+    start_time: Union[None, Unset, float] = UNSET,
+    end_time: Union[None, Unset, float] = UNSET,
+    limit: Union[None, Unset, int] = UNSET,
+    response_format: Union[Unset, ResultsFormat] = UNSET,
+) -> Response[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    r"""Query selected observables of the simulation results
+
+     Reads only the requested columns (`observables`: names, or regexes starting with \"^\") of one
+    report from the
+    Parquet dataset of the results. Results which were not ingested yet (see ResultsIngestor) are
+    ingested first.
+
+    Args:
+        simulation_id (int):
+        report_id (Union[None, Unset, str]): Report to read, optional if there is only one
+        time_column (Union[Unset, str]):  Default: 'time'.
+        start_time (Union[None, Unset, float]):
+        end_time (Union[None, Unset, float]):
+        limit (Union[None, Unset, int]): Maximum number of rows
+        response_format (Union[Unset, ResultsFormat]):
+        body (RequestedObservables):
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Response[Union[HTTPValidationError, QuerySimulationResultsResponse200]]
+    """
+
+    kwargs = _get_kwargs(
+        body=body,
+        simulation_id=simulation_id,
+        report_id=report_id,
+        time_column=time_column,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+        response_format=response_format,
+    )
+
+    response = await client.get_async_httpx_client().request(**kwargs)
+
+    return _build_response(client=client, response=response)
+
+
+async def asyncio(
+    *,
+    client: Union[AuthenticatedClient, Client],
+    body: RequestedObservables,
+    simulation_id: int,
+    report_id: Union[None, Unset, str] = UNSET,
+    time_column: Union[Unset, str] = "time",
+    start_time: Union[None, Unset, float] = UNSET,
+    end_time: Union[None, Unset, float] = UNSET,
+    limit: Union[None, Unset, int] = UNSET,
+    response_format: Union[Unset, ResultsFormat] = UNSET,
+) -> Optional[Union[HTTPValidationError, QuerySimulationResultsResponse200]]:
+    r"""Query selected observables of the simulation results
+
+     Reads only the requested columns (`observables`: names, or regexes starting with \"^\") of one
+    report from the
+    Parquet dataset of the results. Results which were not ingested yet (see ResultsIngestor) are
+    ingested first.
+
+    Args:
+        simulation_id (int):
+        report_id (Union[None, Unset, str]): Report to read, optional if there is only one
+        time_column (Union[Unset, str]):  Default: 'time'.
+        start_time (Union[None, Unset, float]):
+        end_time (Union[None, Unset, float]):
+        limit (Union[None, Unset, int]): Maximum number of rows
+        response_format (Union[Unset, ResultsFormat]):
+        body (RequestedObservables):
+
+    Raises:
+        errors.UnexpectedStatus: If the server returns an undocumented status code and Client.raise_on_unexpected_status is True.
+        httpx.TimeoutException: If the request takes longer than Client.timeout.
+
+    Returns:
+        Union[HTTPValidationError, QuerySimulationResultsResponse200]
+    """
+
+    return (
+        await asyncio_detailed(
+            client=client,
+            body=body,
+            simulation_id=simulation_id,
+            report_id=report_id,
+            time_column=time_column,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            response_format=response_format,
+        )
+    ).parsed
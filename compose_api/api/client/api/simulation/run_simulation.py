@@ -20,6 +20,7 @@ def _get_kwargs(
     body: BodyRunSimulation,
     interval_time: Union[Unset, float] = 1.0,
     batch_submission: Union[Unset, bool] = False,
+    use_cache: Union[Unset, bool] = True,
 ) -> dict[str, Any]:
     headers: dict[str, Any] = {}
 
@@ -29,6 +30,8 @@ def _get_kwargs(
 
     params["batch_submission"] = batch_submission
 
+    params["use_cache"] = use_cache
+
     params = {k: v for k, v in params.items() if v is not UNSET and v is not None}
 
     _kwargs: dict[str, Any] = {
@@ -77,12 +80,14 @@ def sync_detailed(
     body: BodyRunSimulation,
     interval_time: Union[Unset, float] = 1.0,
     batch_submission: Union[Unset, bool] = False,
+    use_cache: Union[Unset, bool] = True,
 ) -> Response[Union[HTTPValidationError, SimulationExperiment]]:
     """Run a simulation
 
     Args:
         interval_time (Union[Unset, float]):  Default: 1.0.
         batch_submission (Union[Unset, bool]):  Default: False.
+        use_cache (Union[Unset, bool]):  Default: True.
         body (BodyRunSimulation):
 
     Raises:
@@ -97,6 +102,7 @@ def sync_detailed(
         body=body,
         interval_time=interval_time,
         batch_submission=batch_submission,
+        use_cache=use_cache,
     )
 
     response = client.get_httpx_client().request(
@@ -112,12 +118,14 @@ def sync(
     body: BodyRunSimulation,
     interval_time: Union[Unset, float] = 1.0,
     batch_submission: Union[Unset, bool] = False,
+    use_cache: Union[Unset, bool] = True,
 ) -> Optional[Union[HTTPValidationError, SimulationExperiment]]:
     """Run a simulation
 
     Args:
         interval_time (Union[Unset, float]):  Default: 1.0.
         batch_submission (Union[Unset, bool]):  Default: False.
+        use_cache (Union[Unset, bool]):  Default: True.
         body (BodyRunSimulation):
 
     Raises:
@@ -133,6 +141,7 @@ def sync(
         body=body,
         interval_time=interval_time,
         batch_submission=batch_submission,
+        use_cache=use_cache,
     ).parsed
 
 
@@ -142,12 +151,14 @@ async def asyncio_detailed(
     body: BodyRunSimulation,
     interval_time: Union[Unset, float] = 1.0,
     batch_submission: Union[Unset, bool] = False,
+    use_cache: Union[Unset, bool] = True,
 ) -> Response[Union[HTTPValidationError, SimulationExperiment]]:
     """Run a simulation
 
     Args:
         interval_time (Union[Unset, float]):  Default: 1.0.
         batch_submission (Union[Unset, bool]):  Default: False.
+        use_cache (Union[Unset, bool]):  Default: True.
         body (BodyRunSimulation):
 
     Raises:
@@ -162,6 +173,7 @@ async def asyncio_detailed(
         body=body,
         interval_time=interval_time,
         batch_submission=batch_submission,
+        use_cache=use_cache,
     )
 
     response = await client.get_async_httpx_client().request(**kwargs)
@@ -175,12 +187,14 @@ async def asyncio(
     body: BodyRunSimulation,
     interval_time: Union[Unset, float] = 1.0,
     batch_submission: Union[Unset, bool] = False,
+    use_cache: Union[Unset, bool] = True,
 ) -> Optional[Union[HTTPValidationError, SimulationExperiment]]:
     """Run a simulation
 
     Args:
         interval_time (Union[Unset, float]):  Default: 1.0.
         batch_submission (Union[Unset, bool]):  Default: False.
+        use_cache (Union[Unset, bool]):  Default: True.
         body (BodyRunSimulation):
 
     Raises:
@@ -197,5 +211,6 @@ async def asyncio(
             body=body,
             interval_time=interval_time,
             batch_submission=batch_submission,
+            use_cache=use_cache,
         )
     ).parsed
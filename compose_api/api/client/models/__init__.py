@@ -5,16 +5,21 @@ from .bi_graph_process import BiGraphProcess
 from .bi_graph_step import BiGraphStep
 from .body_run_copasi import BodyRunCopasi
 from .body_run_simulation import BodyRunSimulation
+from .body_run_simulation_batch import BodyRunSimulationBatch
 from .body_run_tellurium import BodyRunTellurium
 from .check_health_health_get_response_check_health_health_get import CheckHealthHealthGetResponseCheckHealthHealthGet
+from .containerization_engine import ContainerizationEngine
 from .containerization_file_repr import ContainerizationFileRepr
 from .hpc_run import HpcRun
 from .http_validation_error import HTTPValidationError
 from .job_status import JobStatus
 from .job_type import JobType
 from .package_type import PackageType
+from .query_simulation_results_response_200 import QuerySimulationResultsResponse200
 from .registered_package import RegisteredPackage
 from .registered_simulators import RegisteredSimulators
+from .requested_observables import RequestedObservables
+from .results_format import ResultsFormat
 from .simulation_experiment import SimulationExperiment
 from .simulation_experiment_metadata import SimulationExperimentMetadata
 from .simulator_version import SimulatorVersion
@@ -26,16 +31,21 @@ __all__ = (
     "BiGraphStep",
     "BodyRunCopasi",
     "BodyRunSimulation",
+    "BodyRunSimulationBatch",
     "BodyRunTellurium",
     "CheckHealthHealthGetResponseCheckHealthHealthGet",
+    "ContainerizationEngine",
     "ContainerizationFileRepr",
     "HpcRun",
     "HTTPValidationError",
     "JobStatus",
     "JobType",
     "PackageType",
+    "QuerySimulationResultsResponse200",
     "RegisteredPackage",
     "RegisteredSimulators",
+    "RequestedObservables",
+    "ResultsFormat",
     "SimulationExperiment",
     "SimulationExperimentMetadata",
     "SimulatorVersion",
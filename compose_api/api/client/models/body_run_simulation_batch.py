@@ -0,0 +1,86 @@
+from collections.abc import Mapping
+from typing import Any, TypeVar, Optional, BinaryIO, TextIO, TYPE_CHECKING, Generator
+
+from attrs import define as _attrs_define
+from attrs import field as _attrs_field
+import json
+from .. import types
+
+from ..types import UNSET, Unset
+
+from ..types import File, FileTypes
+from io import BytesIO
+from typing import cast
+
+
+T = TypeVar("T", bound="BodyRunSimulationBatch")
+
+
+@_attrs_define
+class BodyRunSimulationBatch:
+    """
+    Attributes:
+        uploaded_files (list[File]):
+    """
+
+    uploaded_files: list[File]
+    additional_properties: dict[str, Any] = _attrs_field(init=False, factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        uploaded_files = []
+        for uploaded_files_item_data in self.uploaded_files:
+            uploaded_files_item = uploaded_files_item_data.to_tuple()
+
+            uploaded_files.append(uploaded_files_item)
+
+        field_dict: dict[str, Any] = {}
+        field_dict.update(self.additional_properties)
+        field_dict.update({
+            "uploaded_files": uploaded_files,
+        })
+
+        return field_dict
+
+    def to_multipart(self) -> types.RequestFiles:
+        files: types.RequestFiles = []
+
+        for uploaded_files_item_element in self.uploaded_files:
+            files.append(("uploaded_files", uploaded_files_item_element.to_tuple()))
+
+        for prop_name, prop in self.additional_properties.items():
+            files.append((prop_name, (None, str(prop).encode(), "text/plain")))
+
+        return files
+
+    @classmethod
+    def from_dict(cls: type[T], src_dict: Mapping[str, Any]) -> T:
+        d = dict(src_dict)
+        uploaded_files = []
+        _uploaded_files = d.pop("uploaded_files")
+        for uploaded_files_item_data in _uploaded_files:
+            uploaded_files_item = File(payload=BytesIO(uploaded_files_item_data))
+
+            uploaded_files.append(uploaded_files_item)
+
+        body_run_simulation_batch = cls(
+            uploaded_files=uploaded_files,
+        )
+
+        body_run_simulation_batch.additional_properties = d
+        return body_run_simulation_batch
+
+    @property
+    def additional_keys(self) -> list[str]:
+        return list(self.additional_properties.keys())
+
+    def __getitem__(self, key: str) -> Any:
+        return self.additional_properties[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.additional_properties[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.additional_properties[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.additional_properties
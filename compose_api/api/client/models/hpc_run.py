@@ -26,6 +26,8 @@ class HpcRun:
         job_type (JobType):
         sim_id (Union[None, int]):
         simulator_id (Union[None, int]):
+        slurm_array_task_id (Union[None, Unset, int]):
+        packed_task_id (Union[None, Unset, int]):
         status (Union[JobStatus, None, Unset]):
         start_time (Union[None, Unset, str]):
         end_time (Union[None, Unset, str]):
@@ -38,6 +40,8 @@ class HpcRun:
     job_type: JobType
     sim_id: Union[None, int]
     simulator_id: Union[None, int]
+    slurm_array_task_id: Union[None, Unset, int] = UNSET
+    packed_task_id: Union[None, Unset, int] = UNSET
     status: Union[JobStatus, None, Unset] = UNSET
     start_time: Union[None, Unset, str] = UNSET
     end_time: Union[None, Unset, str] = UNSET
@@ -59,6 +63,18 @@ class HpcRun:
         simulator_id: Union[None, int]
         simulator_id = self.simulator_id
 
+        slurm_array_task_id: Union[None, Unset, int]
+        if isinstance(self.slurm_array_task_id, Unset):
+            slurm_array_task_id = UNSET
+        else:
+            slurm_array_task_id = self.slurm_array_task_id
+
+        packed_task_id: Union[None, Unset, int]
+        if isinstance(self.packed_task_id, Unset):
+            packed_task_id = UNSET
+        else:
+            packed_task_id = self.packed_task_id
+
         status: Union[None, Unset, str]
         if isinstance(self.status, Unset):
             status = UNSET
@@ -95,6 +111,10 @@ class HpcRun:
             "sim_id": sim_id,
             "simulator_id": simulator_id,
         })
+        if slurm_array_task_id is not UNSET:
+            field_dict["slurm_array_task_id"] = slurm_array_task_id
+        if packed_task_id is not UNSET:
+            field_dict["packed_task_id"] = packed_task_id
         if status is not UNSET:
             field_dict["status"] = status
         if start_time is not UNSET:
@@ -131,6 +151,24 @@ class HpcRun:
 
         simulator_id = _parse_simulator_id(d.pop("simulator_id"))
 
+        def _parse_slurm_array_task_id(data: object) -> Union[None, Unset, int]:
+            if data is None:
+                return data
+            if isinstance(data, Unset):
+                return data
+            return cast(Union[None, Unset, int], data)
+
+        slurm_array_task_id = _parse_slurm_array_task_id(d.pop("slurm_array_task_id", UNSET))
+
+        def _parse_packed_task_id(data: object) -> Union[None, Unset, int]:
+            if data is None:
+                return data
+            if isinstance(data, Unset):
+                return data
+            return cast(Union[None, Unset, int], data)
+
+        packed_task_id = _parse_packed_task_id(d.pop("packed_task_id", UNSET))
+
         def _parse_status(data: object) -> Union[JobStatus, None, Unset]:
             if data is None:
                 return data
@@ -182,6 +220,8 @@ class HpcRun:
             job_type=job_type,
             sim_id=sim_id,
             simulator_id=simulator_id,
+            slurm_array_task_id=slurm_array_task_id,
+            packed_task_id=packed_task_id,
             status=status,
             start_time=start_time,
             end_time=end_time,
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class ResultsFormat(str, Enum):
+    ARROW = "arrow"
+    JSON = "json"
+
+    def __str__(self) -> str:
+        return str(self.value)
@@ -25,15 +25,15 @@ T = TypeVar("T", bound="SimulatorVersion")
 class SimulatorVersion:
     """
     Attributes:
-        singularity_def (ContainerizationFileRepr):
-        singularity_def_hash (str):
+        container_def (ContainerizationFileRepr):
+        container_def_hash (str):
         packages (Union[None, list['RegisteredPackage']]):
         database_id (int):
         created_at (Union[None, Unset, datetime.datetime]):
     """
 
-    singularity_def: "ContainerizationFileRepr"
-    singularity_def_hash: str
+    container_def: "ContainerizationFileRepr"
+    container_def_hash: str
     packages: Union[None, list["RegisteredPackage"]]
     database_id: int
     created_at: Union[None, Unset, datetime.datetime] = UNSET
@@ -43,9 +43,9 @@ class SimulatorVersion:
         from ..models.containerization_file_repr import ContainerizationFileRepr
         from ..models.registered_package import RegisteredPackage
 
-        singularity_def = self.singularity_def.to_dict()
+        container_def = self.container_def.to_dict()
 
-        singularity_def_hash = self.singularity_def_hash
+        container_def_hash = self.container_def_hash
 
         packages: Union[None, list[dict[str, Any]]]
         if isinstance(self.packages, list):
@@ -70,8 +70,8 @@ class SimulatorVersion:
         field_dict: dict[str, Any] = {}
         field_dict.update(self.additional_properties)
         field_dict.update({
-            "singularity_def": singularity_def,
-            "singularity_def_hash": singularity_def_hash,
+            "container_def": container_def,
+            "container_def_hash": container_def_hash,
             "packages": packages,
             "database_id": database_id,
         })
@@ -86,9 +86,9 @@ class SimulatorVersion:
         from ..models.registered_package import RegisteredPackage
 
         d = dict(src_dict)
-        singularity_def = ContainerizationFileRepr.from_dict(d.pop("singularity_def"))
+        container_def = ContainerizationFileRepr.from_dict(d.pop("container_def"))
 
-        singularity_def_hash = d.pop("singularity_def_hash")
+        container_def_hash = d.pop("container_def_hash")
 
         def _parse_packages(data: object) -> Union[None, list["RegisteredPackage"]]:
             if data is None:
@@ -130,8 +130,8 @@ class SimulatorVersion:
         created_at = _parse_created_at(d.pop("created_at", UNSET))
 
         simulator_version = cls(
-            singularity_def=singularity_def,
-            singularity_def_hash=singularity_def_hash,
+            container_def=container_def,
+            container_def_hash=container_def_hash,
             packages=packages,
             database_id=database_id,
             created_at=created_at,
@@ -13,7 +13,10 @@ from starlette.middleware.cors import CORSMiddleware
 from compose_api.common.gateway.models import ServerMode
 from compose_api.config import get_settings
 from compose_api.dependencies import (
+    get_dispatch_queue,
     get_job_monitor,
+    get_staged_upload_sweeper,
+    get_worker_event_maintenance,
     init_standalone,
     shutdown_standalone,
 )
@@ -70,11 +73,32 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
         raise RuntimeError("JobMonitor is not initialized. Please check your configuration.")
     if get_settings().hpc_has_messaging:
         await job_monitor.subscribe_nats()
-    await job_monitor.start_polling(interval_seconds=5)  # configurable interval
+    await job_monitor.start_polling()  # adaptive, see Settings.job_monitor_*
+
+    # --- DispatchQueue setup ---
+    dispatch_queue = get_dispatch_queue()
+    if not dispatch_queue:
+        raise RuntimeError("DispatchQueue is not initialized. Please check your configuration.")
+    await dispatch_queue.start()  # also picks up submissions left over by a previous (crashed) instance
+
+    # --- worker_event partitions setup ---
+    worker_event_maintenance = get_worker_event_maintenance()
+    if not worker_event_maintenance:
+        raise RuntimeError("WorkerEventMaintenance is not initialized. Please check your configuration.")
+    await worker_event_maintenance.start()  # creates the partitions of the next days, drops expired ones
+
+    # --- staged upload sweep setup ---
+    staged_upload_sweeper = get_staged_upload_sweeper()
+    if not staged_upload_sweeper:
+        raise RuntimeError("StagedUploadSweeper is not initialized. Please check your configuration.")
+    await staged_upload_sweeper.start()  # deletes inputs staged on the cluster but never submitted
 
     try:
         yield
     finally:
+        await staged_upload_sweeper.close()
+        await worker_event_maintenance.close()
+        await dispatch_queue.close()
         await job_monitor.close()
     await shutdown_standalone()
 
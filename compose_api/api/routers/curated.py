@@ -1,7 +1,7 @@
 import logging
 import os
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
 from jinja2 import Template
 
 from compose_api.common.gateway.models import RouterConfig, ServerMode
@@ -39,7 +39,7 @@ config = RouterConfig(router=APIRouter(), prefix="/curated", dependencies=[])
     summary="Use the tool copasi.",
 )
 async def run_copasi(
-    background_tasks: BackgroundTasks, sbml: UploadFile, start_time: float, duration: float, num_data_points: float
+    sbml: UploadFile, start_time: float, duration: float, num_data_points: float
 ) -> SimulationExperiment:
     with open(os.path.dirname(__file__) + "/templates/copasi.jinja") as f:
         template = Template(f.read())
@@ -56,7 +56,6 @@ async def run_copasi(
         templated_pbif=render,
         simulator_name="Copasi",
         loaded_sbml=request.request_file_path,
-        background_tasks=background_tasks,
         use_interesting=True,
     )
 
@@ -70,7 +69,7 @@ async def run_copasi(
     summary="Use the tool tellurium.",
 )
 async def run_tellurium(
-    background_tasks: BackgroundTasks, sbml: UploadFile, start_time: float, end_time: float, num_data_points: float
+    sbml: UploadFile, start_time: float, end_time: float, num_data_points: float
 ) -> SimulationExperiment:
     with open(os.path.dirname(__file__) + "/templates/tellurium.jinja") as f:
         template = Template(f.read())
@@ -87,5 +86,4 @@ async def run_tellurium(
         templated_pbif=render,
         simulator_name="Tellurium",
         loaded_sbml=request.request_file_path,
-        background_tasks=background_tasks,
     )
@@ -1,22 +1,31 @@
+import asyncio
+import io
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from starlette.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from starlette.responses import Response, StreamingResponse
 
 from compose_api.common.gateway.models import Namespace, RouterConfig
-from compose_api.common.gateway.utils import get_hpc_run_status
+from compose_api.common.gateway.utils import get_hpc_run_status, parse_byte_range
 from compose_api.common.ssh.ssh_service import get_ssh_service
 from compose_api.config import get_settings
 from compose_api.dependencies import (
     get_data_service,
     get_database_service,
     get_required_database_service,
+    get_results_ingestor,
     get_simulation_service,
 )
+from compose_api.simulation.data_service import stream_file
 from compose_api.simulation.models import (
     HpcRun,
     JobType,
+    RequestedObservables,
+    ResultsFormat,
 )
+from compose_api.simulation.results_cache import get_results_cache
+from compose_api.simulation.results_ingestion import find_report, query_report, select_columns
 
 logger = logging.getLogger(__name__)
 
@@ -97,79 +106,158 @@ async def get_simulation_status(simulation_id: int = Query(...)) -> HpcRun:
 #         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-# @config.router.get(
-#     path="/simulation/run/results/chunks",
-#     response_class=ORJSONResponse,
-#     operation_id="get-simulation-results",
-#     tags=["Simulations"],
-#     dependencies=[Depends(get_simulation_service), Depends(get_ssh_service)],
-#     summary="Get simulation results in chunks",
-# )
-# async def get_result_chunks(
-#     background_tasks: BackgroundTasks,
-#     observable_names: RequestedObservables,
-#     experiment_id: str = Query(default="experiment_96bb7a2_id_1_20250620-181422"),
-#     database_id: int = Query(description="Database Id returned from /submit-simulation"),
-#     git_commit_hash: str = Query(default="not-specified"),
-# ) -> ORJSONResponse:
-#     sim_service = get_simulation_service()
-#     if sim_service is None:
-#         logger.error("Simulation service is not initialized")
-#         raise HTTPException(status_code=500, detail="Simulation service is not initialized")
-#     ssh_service = get_ssh_service()
-#     if ssh_service is None:
-#         logger.error("SSH service is not initialized")
-#         raise HTTPException(status_code=500, detail="SSH service is not initialized")
-#     try:
-#         service = DataServiceHpc()
-#
-#         local_dir, lazy_frame = await service.read_simulation_chunks(experiment_id, Namespace.TEST)
-#         background_tasks.add_task(shutil.rmtree, local_dir)
-#         selected_cols = observable_names.items if len(observable_names.items) else ["bulk", "^listeners__mass.*"]
-#         data = (
-#             lazy_frame.select(
-#                 pl.col(selected_cols)  # regex pattern to match columns starting with this prefix
-#             )
-#             .collect()
-#             .to_dict()
-#         )
-#         return ORJSONResponse(content=data)
-#     except Exception as e:
-#         logger.exception(f"Error fetching simulation results for id: {database_id}.")
-#         raise HTTPException(status_code=500, detail=str(e)) from e
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+@config.router.post(
+    path="/simulation/results/query",
+    response_class=ORJSONResponse,
+    responses={
+        200: {
+            "content": {
+                "application/json": {
+                    "schema": {"type": "object", "additionalProperties": {"type": "array", "items": {}}}
+                },
+                ARROW_STREAM_MEDIA_TYPE: {"schema": {"format": "binary"}},
+            },
+            "description": "Selected columns of the report, as {column: [values]} or an Arrow IPC stream",
+        },
+    },
+    operation_id="query-simulation-results",
+    tags=["Results"],
+    dependencies=[Depends(get_database_service)],
+    summary="Query selected observables of the simulation results",
+)
+async def query_results(
+    observables: RequestedObservables,
+    simulation_id: int = Query(),
+    report_id: str | None = Query(default=None, description="Report to read, optional if there is only one"),
+    time_column: str = Query(default="time"),
+    start_time: float | None = Query(default=None),
+    end_time: float | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, description="Maximum number of rows"),
+    response_format: ResultsFormat = ResultsFormat.JSON,
+) -> Response:
+    """
+    Reads only the requested columns (`observables`: names, or regexes starting with "^") of one report from the
+    Parquet dataset of the results. Results which were not ingested yet (see ResultsIngestor) are ingested first.
+    """
+    results_ingestor = get_results_ingestor()
+    db_service = get_required_database_service()
+    if results_ingestor is None:
+        logger.error("Results ingestor is not initialized")
+        raise HTTPException(status_code=500, detail="Results ingestor is not initialized")
+    namespace = Namespace(get_settings().namespace)
+    try:
+        experiment_id = await db_service.get_simulator_db().get_simulations_experiment_id(simulation_id=simulation_id)
+        columnar_results = await results_ingestor.ingest(experiment_id)
+        report = find_report(columnar_results, report_id)
+        columns = select_columns(report, observables.items, time_column=time_column)
+        frame = await asyncio.to_thread(
+            query_report,
+            dataset_dir=results_ingestor.data_service.get_columnar_results_dir(experiment_id, namespace),
+            report=report,
+            columns=columns,
+            time_column=time_column,
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"No results for simulation {simulation_id}") from e
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except Exception as e:
+        logger.exception(f"Error querying simulation results for id: {simulation_id}.")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    if response_format == ResultsFormat.ARROW:
+        buffer = io.BytesIO()
+        frame.write_ipc_stream(buffer)
+        return Response(content=buffer.getvalue(), media_type=ARROW_STREAM_MEDIA_TYPE)
+    return ORJSONResponse(content=frame.to_dict(as_series=False))
 
 
 @config.router.get(
     path="/simulation/results/file",
-    response_class=FileResponse,
+    response_class=StreamingResponse,
     responses={
         200: {
             "content": {"application/octet-stream": {"schema": {"format": "binary"}}},
             "description": "Simulation result zip file",
-        }
+        },
+        206: {"description": "The requested byte range of the result zip file"},
+        304: {"description": "The result zip file matches If-None-Match"},
     },
     operation_id="get-simulation-results-file",
     tags=["Results"],
     dependencies=[Depends(get_simulation_service), Depends(get_ssh_service)],
     summary="Get simulation results as a zip file",
 )
-async def get_results(simulation_id: int = Query()) -> FileResponse:
+async def get_results(
+    simulation_id: int = Query(),
+    range_header: str | None = Header(default=None, alias="Range"),
+    if_range: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+) -> Response:
+    """
+    Streams the result zip from the local results cache, which is populated from the cluster on a miss; archives
+    too large for the cache are streamed as they are read from the cluster.
+    Supports a single byte range (resumed downloads), If-Range, and If-None-Match against the ETag.
+    """
     service = get_data_service()
     db_service = get_required_database_service()
     if service is None:
         logger.error("Data service is not initialized")
         raise HTTPException(status_code=500, detail="Data service is not initialized")
+    namespace = Namespace(get_settings().namespace)
     try:
         experiment_id = await db_service.get_simulator_db().get_simulations_experiment_id(simulation_id=simulation_id)
-        zip_path = await service.get_results_zip(experiment_id, Namespace(get_settings().namespace))
-        file_response = FileResponse(
-            path=zip_path, filename=f"{experiment_id}_results.zip", media_type="application/zip"
-        )
-        return file_response
+        file_info = await service.get_results_file_info(experiment_id, namespace)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"No results for simulation {simulation_id}") from e
     except Exception as e:
-        # logger.exception(f"Error fetching simulation results for id: {database_id}.")
+        logger.exception(f"Error fetching simulation results for id: {simulation_id}.")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": file_info.etag,
+        "Content-Disposition": f'attachment; filename="{experiment_id}_results.zip"',
+    }
+    if if_none_match is not None and file_info.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    # a range of an older version of the file must not be spliced onto what the client has, send all of it
+    byte_range = parse_byte_range(range_header, file_info.size) if if_range in (None, file_info.etag) else None
+    start, end = byte_range or (0, file_info.size)
+    headers["Content-Length"] = str(end - start)
+    if byte_range is not None:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{file_info.size}"
+    results_cache = get_results_cache()
+    if results_cache is not None and results_cache.accepts(file_info):
+        try:
+            cached_file = await results_cache.open(
+                experiment_id,
+                file_info,
+                fetch=lambda destination: service.download_results(
+                    experiment_id, namespace, destination=destination, size=file_info.size
+                ),
+            )
+        except Exception as e:
+            logger.exception(f"Error fetching simulation results for id: {simulation_id}.")
+            raise HTTPException(status_code=500, detail=str(e)) from e
+        content = stream_file(cached_file, start=start, end=end, chunk_size=get_settings().results_chunk_size_bytes)
+    else:
+        content = service.stream_results(experiment_id, namespace, start=start, end=end)
+    return StreamingResponse(
+        content,
+        status_code=206 if byte_range is not None else 200,
+        headers=headers,
+        media_type="application/zip",
+    )
+
 
 @config.router.get(
     path="/simulator/build/status",
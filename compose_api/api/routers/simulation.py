@@ -1,16 +1,17 @@
 import logging
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
 
 from compose_api.common.gateway.models import RouterConfig
 from compose_api.common.gateway.utils import allow_list, get_simulation_request_from_uploaded_file
+from compose_api.config import get_settings
 from compose_api.dependencies import (
     get_database_service,
-    get_job_monitor,
-    get_simulation_service,
+    get_dispatch_queue,
 )
 from compose_api.simulation.handlers import (
     run_simulation,
+    run_simulation_batch,
 )
 from compose_api.simulation.models import (
     PBAllowList,
@@ -30,27 +31,23 @@ config = RouterConfig(router=APIRouter(), prefix="/simulation", dependencies=[])
     operation_id="run-simulation",
     response_model=SimulationExperiment,
     tags=["Simulation"],
-    dependencies=[Depends(get_simulation_service), Depends(get_database_service)],
+    dependencies=[Depends(get_dispatch_queue), Depends(get_database_service)],
     summary="Run a simulation",
 )
 async def submit_simulation(
-    background_tasks: BackgroundTasks,
     uploaded_file: UploadFile,
     interval_time: float = 1.0,
     batch_submission: bool = False,
+    use_cache: bool = True,
 ) -> SimulationExperiment:
-    sim_service = get_simulation_service()
-    if sim_service is None:
-        logger.error("Simulation service is not initialized")
-        raise HTTPException(status_code=500, detail="Simulation service is not initialized")
     db_service = get_database_service()
     if db_service is None:
         logger.error("Database service is not initialized")
         raise HTTPException(status_code=500, detail="Database service is not initialized")
-    job_monitor = get_job_monitor()
-    if job_monitor is None:
-        logger.error("Job Monitor service is not initialized")
-        raise HTTPException(status_code=500, detail="Job Monitor service is not initialized")
+    dispatch_queue = get_dispatch_queue()
+    if dispatch_queue is None:
+        logger.error("Dispatch queue is not initialized")
+        raise HTTPException(status_code=500, detail="Dispatch queue is not initialized")
 
     # TODO ################################################################################
     # !!! Input validation for Omex file, preferably converting it to an internal type !!!#
@@ -61,7 +58,7 @@ async def submit_simulation(
         raise HTTPException(status_code=400, detail="Invalid interval time, it has to be between 0 and 1000")
 
     simulation_request = await get_simulation_request_from_uploaded_file(
-        uploaded_file=uploaded_file, batch_submission=batch_submission
+        uploaded_file=uploaded_file, batch_submission=batch_submission, stage_on_hpc=get_settings().upload_stream_to_hpc
     )
     simulation_request.end_time_point = interval_time
 
@@ -69,17 +66,63 @@ async def submit_simulation(
         return await run_simulation(
             simulation_request=simulation_request,
             database_service=db_service,
-            simulation_service_slurm=sim_service,
-            background_tasks=background_tasks,
-            job_monitor=job_monitor,
+            dispatch_queue=dispatch_queue,
             # TODO: Put/Get actual allow list
             pb_allow_list=PBAllowList(allow_list=allow_list),
+            use_cache=use_cache,
         )
     except Exception as e:
         logger.exception("Error running simulation")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@config.router.post(
+    path="/run/batch",
+    operation_id="run-simulation-batch",
+    response_model=list[SimulationExperiment],
+    tags=["Simulation"],
+    dependencies=[Depends(get_dispatch_queue), Depends(get_database_service)],
+    summary="Run many simulations as Slurm job arrays, or packed into shared allocations",
+)
+async def submit_simulation_batch(
+    uploaded_files: list[UploadFile],
+    interval_time: float = 1.0,
+    packed: bool = False,
+) -> list[SimulationExperiment]:
+    db_service = get_database_service()
+    if db_service is None:
+        logger.error("Database service is not initialized")
+        raise HTTPException(status_code=500, detail="Database service is not initialized")
+    dispatch_queue = get_dispatch_queue()
+    if dispatch_queue is None:
+        logger.error("Dispatch queue is not initialized")
+        raise HTTPException(status_code=500, detail="Dispatch queue is not initialized")
+
+    if interval_time < 0 or interval_time > 1000:
+        raise HTTPException(status_code=400, detail="Invalid interval time, it has to be between 0 and 1000")
+    if len(uploaded_files) == 0:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    simulation_requests = []
+    for uploaded_file in uploaded_files:
+        simulation_request = await get_simulation_request_from_uploaded_file(
+            uploaded_file=uploaded_file, batch_submission=True, stage_on_hpc=get_settings().upload_stream_to_hpc
+        )
+        simulation_request.end_time_point = interval_time
+        simulation_requests.append(simulation_request)
+
+    try:
+        return await run_simulation_batch(
+            simulation_requests=simulation_requests,
+            database_service=db_service,
+            dispatch_queue=dispatch_queue,
+            packed=packed,
+        )
+    except Exception as e:
+        logger.exception("Error running simulation batch")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 # @config.router.post(
 #     path="/analyze",
 #     response_class=PlainTextResponse,
@@ -1,10 +1,18 @@
+import asyncio
+import hashlib
 import logging
 import tempfile
+import uuid
+from collections.abc import AsyncIterator
 from pathlib import Path
+from typing import IO
 
 from fastapi import HTTPException, UploadFile
 
+from compose_api.common.ssh.ssh_service import SFTPStreamInterrupted, get_ssh_service
+from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.hpc_utils import get_slurm_upload_staging_file
 from compose_api.simulation.models import HpcRun, JobType, SimulationFileType, SimulationRequest
 
 logger = logging.getLogger(__name__)
@@ -49,21 +57,185 @@ async def get_hpc_run_status(db_service: DatabaseService, ref_id: int, job_type:
 
 
 async def get_simulation_request_from_uploaded_file(
-    uploaded_file: UploadFile, batch_submission: bool = False
+    uploaded_file: UploadFile, batch_submission: bool = False, stage_on_hpc: bool = False
 ) -> SimulationRequest:
+    """
+    Store an uploaded simulation input, locally or, with `stage_on_hpc`, straight on the cluster (see
+    _stream_uploaded_file_to_hpc). Only pass `stage_on_hpc` if the file is not needed locally afterwards.
+    """
     if uploaded_file is None or uploaded_file.filename is None or uploaded_file.size == 0:
         raise HTTPException(status_code=400, detail="Empty uploaded file")
 
+    max_size = get_settings().upload_max_size_bytes
+    if uploaded_file.size is not None and uploaded_file.size > max_size:
+        raise HTTPException(status_code=413, detail=f"Uploaded file exceeds the limit of {max_size} bytes")
+
     suffix = Path(uploaded_file.filename).suffix
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-        contents = await uploaded_file.read()
-        tmp_file.write(contents)
+    simulation_file_type = SimulationFileType.get_file_type(suffix)
+    if stage_on_hpc:
+        staged = await _stream_uploaded_file_to_hpc(uploaded_file=uploaded_file, suffix=suffix, max_size=max_size)
+        if staged is not None:
+            staged_path, staged_sha256 = staged
+            return SimulationRequest(
+                request_file_path=staged_path,
+                simulation_file_type=simulation_file_type,
+                is_batch=batch_submission,
+                content_sha256=staged_sha256,
+                staged_on_hpc=True,
+            )
+        await uploaded_file.seek(0)
+
+    tmp_path, content_sha256 = await _store_uploaded_file(uploaded_file=uploaded_file, suffix=suffix, max_size=max_size)
     return SimulationRequest(
-        request_file_path=Path(tmp_file.name),
-        simulation_file_type=SimulationFileType.get_file_type(suffix),
+        request_file_path=tmp_path,
+        simulation_file_type=simulation_file_type,
         is_batch=batch_submission,
+        content_sha256=content_sha256,
+    )
+
+
+class _HashingUploadReader:
+    """Reads an upload in chunks from any offset, hashing every byte exactly once however often it is re-read."""
+
+    uploaded_file: UploadFile
+    max_size: int
+    chunk_size: int
+    digest: "hashlib._Hash"
+    hashed: int
+
+    def __init__(self, uploaded_file: UploadFile, max_size: int, chunk_size: int) -> None:
+        self.uploaded_file = uploaded_file
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.digest = hashlib.sha256()
+        self.hashed = 0
+
+    async def chunks(self, offset: int) -> AsyncIterator[bytes]:
+        await self.uploaded_file.seek(offset)
+        position = offset
+        while chunk := await self.uploaded_file.read(self.chunk_size):
+            end = position + len(chunk)
+            if end > self.max_size:
+                raise HTTPException(status_code=413, detail=f"Uploaded file exceeds the limit of {self.max_size} bytes")
+            if end > self.hashed:
+                self.digest.update(chunk[max(self.hashed - position, 0) :])
+                self.hashed = end
+            position = end
+            yield chunk
+
+
+async def _stream_uploaded_file_to_hpc(
+    uploaded_file: UploadFile, suffix: str, max_size: int
+) -> tuple[Path, str] | None:
+    """
+    Stream the upload over a pooled SFTP channel to a staging path on the cluster, hashing it on the way, so that no
+    local copy is made and nothing is left to transfer at submission time. An interrupted stream is resumed from the
+    last byte the server acknowledged, up to `upload_stream_max_resumes` times.
+    :return: remote staging path and sha256 hex digest, None if the stream failed and a local copy is needed instead
+    """
+    settings = get_settings()
+    ssh_service = get_ssh_service()
+    remote_path = get_slurm_upload_staging_file(upload_id=uuid.uuid4().hex, suffix=suffix)
+    reader = _HashingUploadReader(
+        uploaded_file=uploaded_file, max_size=max_size, chunk_size=settings.upload_chunk_size_bytes
     )
 
+    offset = 0
+    size: int | None = None
+    try:
+        for attempt in range(settings.upload_stream_max_resumes + 1):
+            try:
+                size = await ssh_service.sftp_write_stream(
+                    remote_path=remote_path, chunks=reader.chunks(offset), offset=offset
+                )
+                break
+            except SFTPStreamInterrupted as exc:
+                if attempt == settings.upload_stream_max_resumes:
+                    logger.exception(f"Giving up streaming upload to {remote_path}, keeping a local copy", exc_info=exc)
+                    break
+                offset = exc.acknowledged
+                logger.warning(f"Resuming upload to {remote_path} at byte {offset}")
+    except Exception:
+        # e.g. 413 once the upload turned out too large mid-stream
+        await _remove_partial_upload(remote_path)
+        raise
+
+    if size:
+        return remote_path, reader.digest.hexdigest()
+    await _remove_partial_upload(remote_path)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty uploaded file")
+    return None
+
+
+async def _remove_partial_upload(remote_path: Path) -> None:
+    try:
+        await get_ssh_service().run_command(f"rm -f {remote_path}")
+    except RuntimeError:
+        logger.warning(f"Failed to remove partial upload {remote_path}, leaving it to the staged upload sweep")
+
+
+async def _store_uploaded_file(uploaded_file: UploadFile, suffix: str, max_size: int) -> tuple[Path, str]:
+    """
+    Copy the upload to a temp file chunk by chunk, hashing it on the way, so that memory use does not grow with the
+    file size. Writes run in a worker thread to keep the event loop free for concurrent uploads.
+    :return: path of the temp file and sha256 hex digest of its content
+    """
+    chunk_size = get_settings().upload_chunk_size_bytes
+    digest = hashlib.sha256()
+    size = 0
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)  # noqa: SIM115 closed below
+    tmp_path = Path(tmp_file.name)
+    stored = False
+    try:
+        while chunk := await uploaded_file.read(chunk_size):
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=413, detail=f"Uploaded file exceeds the limit of {max_size} bytes")
+            await asyncio.to_thread(_write_chunk, tmp_file, digest, chunk)
+        stored = True
+    finally:
+        await asyncio.to_thread(tmp_file.close)
+        if not stored:
+            tmp_path.unlink(missing_ok=True)
+    if size == 0:
+        tmp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Empty uploaded file")
+    return tmp_path, digest.hexdigest()
+
+
+def _write_chunk(tmp_file: IO[bytes], digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    tmp_file.write(chunk)
+
+
+def parse_byte_range(range_header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Resolve a single-range `Range: bytes=...` header against a resource of `size` bytes.
+    :return: [start, end) to serve, None to serve the whole resource (no header, or several ranges)
+    :raises HTTPException: 416 if the range lies outside the resource
+    """
+    if range_header is None:
+        return None
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first == "":
+            # suffix range, the last `last` bytes
+            start, end = max(size - int(last), 0), size
+        else:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=416, detail="Requested range not satisfiable", headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
 
 allow_list = [
     "pypi::git+https://github.com/biosimulators/bspil-basico.git@initial_work",
@@ -3,6 +3,19 @@ from typing import Optional
 
 from pydantic import BaseModel, ConfigDict
 
+# (job id, array task id) - the array task id is None for jobs which are not part of a job array
+SlurmJobKey = tuple[int, Optional[int]]
+
+
+# states in which Slurm has finished with a job
+_FINAL_SLURM_STATES = ("CANCELLED", "COMPLETED", "FAILED", "OUT_OF_MEMORY", "TIMEOUT")
+
+
+def _parse_job_id(job_id_field: str) -> tuple[int, Optional[int]]:
+    """'123' -> (123, None), array tasks are reported as '123_4' -> (123, 4)"""
+    job_id, _, array_task_id = job_id_field.partition("_")
+    return int(job_id), int(array_task_id) if array_task_id else None
+
 
 class SlurmJob(BaseModel):
     #                                 --squeue--   --sacct--
@@ -15,6 +28,7 @@ class SlurmJob(BaseModel):
     end_time: Optional[str] = None  #                end
     elapsed: Optional[str] = None  #                elapsed
     exit_code: Optional[str] = None  #                exitcode
+    array_task_id: Optional[int] = None  #  %i          jobid    (suffix of "<job_id>_<task_id>")
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -22,6 +36,10 @@ class SlurmJob(BaseModel):
         protected_namespaces=(),
     )
 
+    @property
+    def key(self) -> SlurmJobKey:
+        return self.job_id, self.array_task_id
+
     def to_str(self) -> str:
         """Returns the string representation of the model using alias"""
         return pprint.pformat(self.model_dump(by_alias=True))
@@ -41,6 +59,24 @@ class SlurmJob(BaseModel):
             return False
         return self.job_state.upper() == "FAILED"
 
+    def for_packed_task(self, task_state: Optional[str]) -> "SlurmJob":
+        """
+        Status of one simulation of a packed batch job, given this job (the allocation) and the task's status file
+        content "<STATE>|<timestamp>" (None if the task has not started).
+        """
+        state, _, timestamp = (task_state or "").partition("|")
+        allocation_state = self.job_state.upper()
+        allocation_ended = allocation_state in _FINAL_SLURM_STATES
+        if state in ("COMPLETED", "FAILED"):
+            return self.model_copy(update={"job_state": state, "end_time": timestamp or self.end_time})
+        if allocation_ended:
+            # the driver exited without recording an outcome, e.g. the allocation timed out or was cancelled
+            job_state = "FAILED" if allocation_state == "COMPLETED" else allocation_state
+            return self.model_copy(update={"job_state": job_state})
+        if state == "RUNNING":
+            return self.model_copy(update={"job_state": "RUNNING", "start_time": timestamp or self.start_time})
+        return self.model_copy(update={"job_state": "PENDING", "start_time": None, "end_time": None})
+
     @staticmethod
     def get_sacct_format_string() -> str:
         return "jobid,jobname,account,user,state,start,end,elapsed,exitcode"
@@ -57,8 +93,10 @@ class SlurmJob(BaseModel):
         def _nullable(value: str) -> Optional[str]:
             return None if value in ("", "Unknown", "N/A") else value
 
+        job_id, array_task_id = _parse_job_id(fields[0])
         return cls(
-            job_id=int(fields[0]),
+            job_id=job_id,
+            array_task_id=array_task_id,
             name=fields[1],
             account=fields[2],
             user_name=fields[3],
@@ -78,8 +116,10 @@ class SlurmJob(BaseModel):
         # Split the line by delimiter
         fields = line.strip().split("|")
         # Map fields to model attributes
+        job_id, array_task_id = _parse_job_id(fields[0])
         return cls(
-            job_id=int(fields[0]),
+            job_id=job_id,
+            array_task_id=array_task_id,
             name=fields[1],
             account=fields[2],
             user_name=fields[3],
@@ -1,12 +1,22 @@
+import datetime
 import logging
 from pathlib import Path
 
-from compose_api.common.hpc.models import SlurmJob
+from compose_api.common.hpc.models import SlurmJob, SlurmJobKey
 from compose_api.common.ssh.ssh_service import SSHService
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# printed between the squeue and sacct output of the combined status query, followed by squeue's exit code
+_OUTPUT_SEPARATOR = "--- compose-api sacct ---"
+# states which end a job, used to restrict incremental sacct queries to jobs that finished within the window
+_SACCT_FINAL_STATES = "CANCELLED,COMPLETED,FAILED,OUT_OF_MEMORY,TIMEOUT"
+# how far back sacct looks for a job of the same name before a named job is submitted
+_RESUBMIT_LOOKBACK = "now-7days"
+# printed instead of sbatch's output when a job of the same name exists, followed by its id
+_EXISTING_JOB_PREFIX = "existing job "
+
 
 class SlurmService:
     ssh_service: SSHService
@@ -15,32 +25,137 @@ class SlurmService:
         self.ssh_service = ssh_service
 
     async def get_job_status_squeue(self, job_ids: list[int] | None = None) -> list[SlurmJob]:
-        command = f'squeue -u $USER --noheader --format="{SlurmJob.get_squeue_format_string()}"'
-        if job_ids is not None:
-            job_ids_str = ",".join(map(str, job_ids)) if len(job_ids) > 1 else str(job_ids[0])
-            command = command + f" -j {job_ids_str}"
+        command = self._squeue_command(job_ids=job_ids)
         return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
         if return_code != 0:
             raise Exception(
                 f"failed to get job status with command {command} return code {return_code} stderr {stderr[:100]}"
             )
-        slurm_jobs: list[SlurmJob] = []
-        for line in stdout.splitlines():
-            if not line.strip():
-                continue
-            slurm_jobs.append(SlurmJob.from_squeue_formatted_output(line.strip()))
-        return slurm_jobs
+        return self._parse_squeue_output(stdout)
 
     async def get_job_status_sacct(self, job_ids: list[int] | None = None) -> list[SlurmJob]:
-        command = f'sacct -u $USER --parsable --allocations --delimiter="|" --noheader --format="{SlurmJob.get_sacct_format_string()}"'  # noqa: E501
-        if job_ids is not None:
-            job_ids_str = ",".join(map(str, job_ids)) if len(job_ids) > 1 else str(job_ids[0])
-            command = command + f" -j {job_ids_str}"
+        command = self._sacct_command(job_ids=job_ids)
+        return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
+        if return_code != 0:
+            raise Exception(
+                f"failed to get job status with command {command} return code {return_code} stderr {stderr[:100]}"
+            )
+        return self._parse_sacct_output(stdout)
+
+    async def get_job_status(self, job_ids: list[int] | None = None) -> dict[SlurmJobKey, SlurmJob]:
+        """
+        Query squeue and sacct in a single remote invocation and merge the results by job id.
+        sacct wins where both report a job, since it has the final state and timings of finished jobs.
+        squeue exits non-zero when none of the job ids are still in the queue, so its failure is only logged.
+        """
+        slurm_job_map, _ = await self._query_job_status(
+            squeue_command=self._squeue_command(job_ids=job_ids), sacct_command=self._sacct_command(job_ids=job_ids)
+        )
+        return slurm_job_map
+
+    async def get_job_status_changes(
+        self, since: datetime.datetime | None, job_ids: list[int] | None = None
+    ) -> tuple[dict[SlurmJobKey, SlurmJob], datetime.datetime]:
+        """
+        Incremental variant of get_job_status. Returns the user's queued jobs plus the jobs which reached a final
+        state between `since` and now, along with the cluster clock at query time to be used as the next `since`.
+        When `since` is None this is a full query of `job_ids`, used to (re)establish the watermark.
+        """
+        if since is None:
+            return await self._query_job_status(
+                squeue_command=self._squeue_command(job_ids=job_ids), sacct_command=self._sacct_command(job_ids=job_ids)
+            )
+        sacct_command = (
+            self._sacct_command(job_ids=None)
+            + f" --state={_SACCT_FINAL_STATES} --starttime={since:%Y-%m-%dT%H:%M:%S} --endtime=now"
+        )
+        return await self._query_job_status(
+            squeue_command=self._squeue_command(job_ids=None), sacct_command=sacct_command
+        )
+
+    async def _query_job_status(
+        self, squeue_command: str, sacct_command: str
+    ) -> tuple[dict[SlurmJobKey, SlurmJob], datetime.datetime]:
+        command = f'date +"%Y-%m-%dT%H:%M:%S"; {squeue_command}; echo "{_OUTPUT_SEPARATOR} $?"; {sacct_command}'
         return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
         if return_code != 0:
             raise Exception(
                 f"failed to get job status with command {command} return code {return_code} stderr {stderr[:100]}"
             )
+        cluster_time_str, _, stdout = stdout.partition("\n")
+        squeue_stdout, separator, rest = stdout.partition(_OUTPUT_SEPARATOR)
+        if not separator:
+            raise Exception(f"unexpected output from combined squeue/sacct command {command}: {stdout[:100]}")
+        squeue_return_code, _, sacct_stdout = rest.partition("\n")
+        if squeue_return_code.strip() != "0":
+            logger.warning(f"squeue returned {squeue_return_code.strip()} stderr {stderr[:100]}, using sacct only")
+            squeue_stdout = ""
+
+        slurm_job_map = {job.key: job for job in self._parse_squeue_output(squeue_stdout)}
+        slurm_job_map.update({job.key: job for job in self._parse_sacct_output(sacct_stdout)})
+        return slurm_job_map, datetime.datetime.fromisoformat(cluster_time_str.strip())
+
+    async def get_packed_task_states(self, status_root: Path, job_ids: list[int]) -> dict[tuple[int, int], str]:
+        """
+        Read the status files written by packed batch jobs, `<status_root>/<job id>/<task id>`, in one command.
+        :return: (job id, task id) -> file content, "<STATE>|<timestamp>"
+        """
+        job_ids_str = " ".join(map(str, job_ids))
+        # -s: directories of jobs which have not started yet don't exist
+        command = f"cd {status_root} 2>/dev/null && grep -rs . {job_ids_str} || true"
+        return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
+        if return_code != 0:
+            raise Exception(
+                f"failed to get packed task status with command {command} "
+                f"return code {return_code} stderr {stderr[:100]}"
+            )
+        task_states: dict[tuple[int, int], str] = {}
+        for line in stdout.splitlines():
+            path, _, content = line.strip().partition(":")
+            job_id, _, task_id = path.partition("/")
+            if not content or not job_id.isdigit() or not task_id.isdigit():
+                continue
+            task_states[(int(job_id), int(task_id))] = content
+        return task_states
+
+    async def remove_packed_status_dirs(self, status_root: Path, job_ids: list[int]) -> None:
+        """Delete the status files of packed batch jobs, `<status_root>/<job id>`, once nothing reads them anymore."""
+        job_ids_str = " ".join(map(str, job_ids))
+        command = f"cd {status_root} 2>/dev/null && rm -rf -- {job_ids_str} || true"
+        return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
+        if return_code != 0:
+            raise Exception(
+                f"failed to remove packed status dirs with command {command} "
+                f"return code {return_code} stderr {stderr[:100]}"
+            )
+
+    @staticmethod
+    def _job_ids_option(job_ids: list[int] | None) -> str:
+        if job_ids is None:
+            return ""
+        job_ids_str = ",".join(map(str, job_ids)) if len(job_ids) > 1 else str(job_ids[0])
+        return f" -j {job_ids_str}"
+
+    def _squeue_command(self, job_ids: list[int] | None) -> str:
+        # -r lists every task of a job array on its own line, including pending ones
+        command = f'squeue -u $USER --noheader -r --format="{SlurmJob.get_squeue_format_string()}"'
+        return command + self._job_ids_option(job_ids)
+
+    def _sacct_command(self, job_ids: list[int] | None) -> str:
+        command = f'sacct -u $USER --parsable --allocations --delimiter="|" --noheader --format="{SlurmJob.get_sacct_format_string()}"'  # noqa: E501
+        return command + self._job_ids_option(job_ids)
+
+    @staticmethod
+    def _parse_squeue_output(stdout: str) -> list[SlurmJob]:
+        slurm_jobs: list[SlurmJob] = []
+        for line in stdout.splitlines():
+            if not line.strip():
+                continue
+            slurm_jobs.append(SlurmJob.from_squeue_formatted_output(line.strip()))
+        return slurm_jobs
+
+    @staticmethod
+    def _parse_sacct_output(stdout: str) -> list[SlurmJob]:
         slurm_jobs: list[SlurmJob] = []
         for line in stdout.splitlines():
             if not line.strip():
@@ -50,6 +165,9 @@ class SlurmService:
                 continue
             if line.split("|")[0].endswith(".extern"):
                 continue
+            # pending array tasks are collapsed into "<job_id>_[<range>]", squeue -r reports them individually
+            if "[" in line.split("|")[0]:
+                continue
             slurm_jobs.append(SlurmJob.from_sacct_formatted_output(line.strip()))
         return slurm_jobs
 
@@ -65,12 +183,57 @@ class SlurmService:
         self,
         local_sbatch_file: Path,
         remote_sbatch_file: Path,
-        local_input_file: Path,
+        local_input_file: Path | None,
         remote_input_file: Path,
+        staged_input_file: Path | None = None,
+        job_name: str | None = None,
     ) -> int:
-        await self.ssh_service.scp_upload(local_file=local_sbatch_file, remote_path=remote_sbatch_file)
-        await self.ssh_service.scp_upload(local_file=local_input_file, remote_path=remote_input_file)
-        return await self._execute_sbatch_command(sbatch_file=remote_sbatch_file)
+        """
+        Stage the sbatch script and the input file concurrently, then create the experiment directory, move the
+        input into place and submit the job with a single remote command, unless a job named `job_name` exists.
+        The input is staged next to the sbatch script because its own directory does not exist yet.
+        An input streamed to the cluster at upload time is passed as `staged_input_file` instead of `local_input_file`,
+        it is only moved if still there so that a resubmission after a failed sbatch finds it in place.
+        """
+        if staged_input_file is not None:
+            await self.ssh_service.scp_upload(local_file=local_sbatch_file, remote_path=remote_sbatch_file)
+            setup_command = (
+                f"mkdir -p {remote_input_file.parent} && "
+                f"{{ [ ! -e {staged_input_file} ] || mv {staged_input_file} {remote_input_file}; }}"
+            )
+            return await self._execute_sbatch_command(
+                sbatch_file=remote_sbatch_file, setup_command=setup_command, job_name=job_name
+            )
+        if local_input_file is None:
+            raise ValueError(f"No input file given for {remote_input_file}")
+        staged_input_file = remote_sbatch_file.with_suffix(remote_input_file.suffix)
+        await self.ssh_service.scp_upload_many([
+            (local_sbatch_file, remote_sbatch_file),
+            (local_input_file, staged_input_file),
+        ])
+        setup_command = f"mkdir -p {remote_input_file.parent} && mv {staged_input_file} {remote_input_file}"
+        return await self._execute_sbatch_command(
+            sbatch_file=remote_sbatch_file, setup_command=setup_command, job_name=job_name
+        )
+
+    async def submit_array_job(
+        self,
+        local_sbatch_file: Path,
+        remote_sbatch_file: Path,
+        input_files: list[tuple[Path, Path]],
+        staged_input_files: list[tuple[Path, Path]] | None = None,
+        job_name: str | None = None,
+    ) -> int:
+        """
+        Upload the sbatch script of a job array along with every task's (local, remote) input files in one SFTP
+        session, then submit it with a single sbatch call. Returns the array's job id.
+        Inputs streamed to the cluster at upload time are moved into place as (staged, remote) pairs.
+        Like submit_job, nothing is submitted if a job named `job_name` exists.
+        """
+        await self.ssh_service.sftp_upload_many(
+            [(local_sbatch_file, remote_sbatch_file), *input_files], moves=staged_input_files
+        )
+        return await self._execute_sbatch_command(sbatch_file=remote_sbatch_file, job_name=job_name)
 
     async def submit_build_job(
         self,
@@ -79,15 +242,41 @@ class SlurmService:
         local_singularity_file: Path,
         remote_singularity_file: Path,
     ) -> int:
-        await self.ssh_service.scp_upload(local_file=local_sbatch_file, remote_path=remote_sbatch_file)
-        await self.ssh_service.scp_upload(local_file=local_singularity_file, remote_path=remote_singularity_file)
+        await self.ssh_service.scp_upload_many([
+            (local_sbatch_file, remote_sbatch_file),
+            (local_singularity_file, remote_singularity_file),
+        ])
         return await self._execute_sbatch_command(sbatch_file=remote_sbatch_file)
 
-    async def _execute_sbatch_command(self, sbatch_file: Path) -> int:
+    async def _execute_sbatch_command(
+        self, sbatch_file: Path, setup_command: str | None = None, job_name: str | None = None
+    ) -> int:
+        """
+        Submit the sbatch file and return the job id.
+        With a `job_name`, the submission is idempotent: if a job of that name is queued or was accounted for
+        recently, e.g. because an earlier attempt submitted it but failed before recording the id, its id is
+        returned instead of submitting a second job. The lookup runs in the same remote command as sbatch.
+        """
         command = f"sbatch --parsable {sbatch_file}"
+        if setup_command is not None:
+            command = f"{setup_command} && {command}"
+        if job_name is not None:
+            command = (
+                f"existing=$({{ squeue --noheader --user=$USER --name={job_name} --format=%F; "
+                f"sacct --noheader --parsable2 --allocations --user=$USER --name={job_name} "
+                f"--starttime={_RESUBMIT_LOOKBACK} --format=JobID; }} 2>/dev/null | head -n 1); "
+                f'if [ -n "$existing" ]; then echo "{_EXISTING_JOB_PREFIX}${{existing%%_*}}"; '
+                f"else {command}; fi"
+            )
         return_code, stdout, stderr = await self.ssh_service.run_command(command=command)
         if return_code != 0:
             raise Exception(
-                f"failed to get job status with command {command} return code {return_code} stderr {stderr[:100]}"
+                f"failed to submit job {sbatch_file} with command {command} "
+                f"return code {return_code} stderr {stderr[:100]}"
             )
+        stdout = stdout.strip()
+        if stdout.startswith(_EXISTING_JOB_PREFIX):
+            job_id = int(stdout.removeprefix(_EXISTING_JOB_PREFIX))
+            logger.warning(f"Slurm job {job_name} was already submitted as job {job_id}, not submitting it again")
+            return job_id
         return int(stdout)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import asyncssh
+from asyncssh import SSHClientConnection
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class SSHConnectError(ConnectionError):
+    """Opening a new pooled connection failed, so nothing was sent to the remote host."""
+
+
+class _PooledConnection:
+    conn: SSHClientConnection
+    channels_in_use: int
+
+    def __init__(self, conn: SSHClientConnection) -> None:
+        self.conn = conn
+        self.channels_in_use = 0
+
+    def is_healthy(self) -> bool:
+        return not self.conn.is_closed()
+
+
+class SSHConnectionPool:
+    """
+    Bounded pool of authenticated SSH connections to a single host.
+
+    Each connection carries up to `max_channels_per_connection` concurrent sessions (commands, scp, sftp),
+    so callers share a handful of long-lived connections instead of paying for a full handshake per call.
+    Connections that drop (detected via keepalive) are discarded and replaced on the next acquire.
+    """
+
+    hostname: str
+    username: str
+    key_path: Path
+    known_hosts: str | None
+    max_connections: int
+    max_channels_per_connection: int
+    keepalive_interval: int
+    keepalive_count_max: int
+    connect_timeout: int
+    _connections: list[_PooledConnection]
+    _pending_connects: int
+    _condition: asyncio.Condition | None
+    _loop: asyncio.AbstractEventLoop | None
+    _closed: bool
+
+    def __init__(
+        self,
+        hostname: str,
+        username: str,
+        key_path: Path,
+        known_hosts: str | None,
+        max_connections: int,
+        max_channels_per_connection: int,
+        keepalive_interval: int,
+        keepalive_count_max: int,
+        connect_timeout: int,
+    ) -> None:
+        if max_connections < 1 or max_channels_per_connection < 1:
+            raise ValueError("SSH pool needs at least one connection with at least one channel")
+        self.hostname = hostname
+        self.username = username
+        self.key_path = key_path
+        self.known_hosts = known_hosts
+        self.max_connections = max_connections
+        self.max_channels_per_connection = max_channels_per_connection
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count_max = keepalive_count_max
+        self.connect_timeout = connect_timeout
+        self._connections = []
+        self._pending_connects = 0
+        self._condition = None
+        self._loop = None
+        self._closed = False
+
+    def _get_condition(self) -> asyncio.Condition:
+        # connections are bound to the event loop that opened them; start over if the loop changed (e.g. pytest)
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            if self._connections:
+                logger.warning("Event loop changed, dropping pooled SSH connections opened on the previous loop.")
+            self._connections = []
+            self._pending_connects = 0
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    async def _connect(self) -> _PooledConnection:
+        try:
+            conn = await asyncssh.connect(
+                host=self.hostname,
+                username=self.username,
+                client_keys=[self.key_path],
+                known_hosts=self.known_hosts,
+                keepalive_interval=self.keepalive_interval,
+                keepalive_count_max=self.keepalive_count_max,
+                connect_timeout=self.connect_timeout,
+            )
+        except (OSError, asyncssh.Error) as exc:
+            raise SSHConnectError(f"failed to connect to {self.username}@{self.hostname}: {exc!s}") from exc
+        logger.info(f"Opened pooled ssh connection to {self.username}@{self.hostname}")
+        return _PooledConnection(conn)
+
+    def _drop_unhealthy(self) -> None:
+        # closed connections still in use are kept until released, but are never handed out again
+        self._connections = [entry for entry in self._connections if entry.is_healthy() or entry.channels_in_use > 0]
+
+    def _pick(self, channels: int) -> _PooledConnection | None:
+        candidates = [
+            entry
+            for entry in self._connections
+            if entry.is_healthy() and entry.channels_in_use + channels <= self.max_channels_per_connection
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda entry: entry.channels_in_use)
+
+    async def _acquire(self, channels: int) -> _PooledConnection:
+        if self._closed:
+            raise RuntimeError(f"SSH connection pool for {self.hostname} is closed")
+        channels = min(max(channels, 1), self.max_channels_per_connection)
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                self._drop_unhealthy()
+                entry = self._pick(channels)
+                if entry is not None:
+                    entry.channels_in_use += channels
+                    return entry
+                if len(self._connections) + self._pending_connects < self.max_connections:
+                    self._pending_connects += 1
+                    break
+                await condition.wait()
+
+        new_entry: _PooledConnection | None = None
+        try:
+            new_entry = await self._connect()
+            new_entry.channels_in_use = channels
+            return new_entry
+        finally:
+            async with condition:
+                self._pending_connects -= 1
+                if new_entry is not None:
+                    self._connections.append(new_entry)
+                condition.notify_all()
+
+    async def _release(self, entry: _PooledConnection, channels: int) -> None:
+        channels = min(max(channels, 1), self.max_channels_per_connection)
+        condition = self._get_condition()
+        async with condition:
+            entry.channels_in_use -= channels
+            if not entry.is_healthy() and entry.channels_in_use == 0 and entry in self._connections:
+                self._connections.remove(entry)
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def connection(self, channels: int = 1) -> AsyncIterator[SSHClientConnection]:
+        """Borrow a pooled connection, reserving `channels` concurrent sessions on it."""
+        entry = await self._acquire(channels)
+        try:
+            yield entry.conn
+        finally:
+            await self._release(entry, channels)
+
+    def discard(self, conn: SSHClientConnection) -> None:
+        """Close a connection which failed mid-operation so that it is replaced on the next acquire."""
+        logger.warning(f"Discarding broken ssh connection to {self.hostname}")
+        conn.close()
+
+    async def close(self) -> None:
+        self._closed = True
+        connections, self._connections = self._connections, []
+        for entry in connections:
+            entry.conn.close()
+        for entry in connections:
+            try:
+                await entry.conn.wait_closed()
+            except (OSError, asyncssh.Error, RuntimeError) as exc:
+                logger.warning(f"Error while closing ssh connection to {self.hostname}: {exc!s}")
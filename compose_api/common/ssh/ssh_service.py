@@ -1,11 +1,15 @@
+import asyncio
 import logging
 import tempfile
+from collections.abc import AsyncIterator, Awaitable, Callable
 from pathlib import Path
+from typing import TypeVar
 
 import asyncssh
-from asyncssh import SSHCompletedProcess
+from asyncssh import SSHClientConnection, SSHCompletedProcess
 from pbest.utils.input_types import ContainerizationEngine
 
+from compose_api.common.ssh.ssh_pool import SSHConnectError, SSHConnectionPool
 from compose_api.config import get_settings
 from compose_api.simulation.hpc_utils import (
     _namespace_path,
@@ -18,69 +22,273 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+_T = TypeVar("_T")
+
+# errors which indicate the pooled connection itself is broken (as opposed to the remote command failing)
+_RECONNECT_ERRORS = (asyncssh.DisconnectError, asyncssh.ChannelOpenError, ConnectionError)
+# of those, errors raised before anything reached the remote host, so that retrying can't run a command twice
+_NOT_SENT_ERRORS = (SSHConnectError, asyncssh.ChannelOpenError)
+
+
+class SFTPStreamInterrupted(RuntimeError):
+    """
+    A stream written by SSHService.sftp_write_stream broke off. Every byte below `acknowledged` was confirmed by the
+    server, bytes above it may be missing even where the remote file is larger: asyncssh sends a large write as
+    parallel requests which may complete out of order.
+    """
+
+    acknowledged: int
+
+    def __init__(self, message: str, acknowledged: int) -> None:
+        super().__init__(message)
+        self.acknowledged = acknowledged
+
+
 class SSHService:
     hostname: str
     username: str
     key_path: Path
     known_hosts: str | None
+    pool: SSHConnectionPool
+    download_pool: SSHConnectionPool
 
     def __init__(self, hostname: str, username: str, key_path: Path, known_hosts: Path | None = None) -> None:
+        settings = get_settings()
         self.hostname = hostname
         self.username = username
         self.key_path = key_path
         self.known_hosts = str(known_hosts) if known_hosts else None
+        self.pool = SSHConnectionPool(
+            hostname=hostname,
+            username=username,
+            key_path=key_path,
+            known_hosts=self.known_hosts,
+            max_connections=settings.slurm_ssh_max_connections,
+            max_channels_per_connection=settings.slurm_ssh_max_channels_per_connection,
+            keepalive_interval=settings.slurm_ssh_keepalive_interval,
+            keepalive_count_max=settings.slurm_ssh_keepalive_count_max,
+            connect_timeout=settings.slurm_ssh_connect_timeout,
+        )
+        # long-running downloads must not starve the commands and uploads of the main pool of channels
+        self.download_pool = SSHConnectionPool(
+            hostname=hostname,
+            username=username,
+            key_path=key_path,
+            known_hosts=self.known_hosts,
+            max_connections=settings.slurm_ssh_download_max_connections,
+            max_channels_per_connection=settings.slurm_ssh_download_max_channels_per_connection,
+            keepalive_interval=settings.slurm_ssh_keepalive_interval,
+            keepalive_count_max=settings.slurm_ssh_keepalive_count_max,
+            connect_timeout=settings.slurm_ssh_connect_timeout,
+        )
 
-    async def run_command(self, command: str) -> tuple[int, str, str]:
-        async with asyncssh.connect(
-            host=self.hostname, username=self.username, client_keys=[self.key_path], known_hosts=self.known_hosts
-        ) as conn:
+    async def _attempt(self, operation: Callable[[SSHClientConnection], Awaitable[_T]], channels: int) -> _T:
+        async with self.pool.connection(channels=channels) as conn:
             try:
-                logger.info(f"Running ssh command: {command}")
-                result: SSHCompletedProcess = await conn.run(command, check=True)
-                if not isinstance(result.stdout, str):
-                    raise TypeError(f"Expected result.stdout to be str, got {type(result.stdout)}")
-                if not isinstance(result.stderr, str):
-                    raise TypeError(f"Expected result.stderr to be str, got {type(result.stderr)}")
-                if not isinstance(result.returncode, int):
-                    raise TypeError(f"Expected result.returncode to be int, got {type(result.returncode)}")
-                logger.info(
-                    msg=f"command {command} retcode {result.returncode} "
-                    f"stdout={result.stdout[:100]} stderr={result.stderr[:100]}"
-                )
-                return result.returncode, result.stdout, result.stderr
-            except asyncssh.ProcessError as exc:
-                logger.exception(msg=f"failed to send command `{command}`, stderr:\n\t{exc.stderr!s}", exc_info=exc)
-                raise RuntimeError(f"failed to send command `{command}`, stderr:\n\t{exc.stderr!s})") from exc
-            except (OSError, asyncssh.Error) as exc:
-                logger.exception(msg=f"failed to send command `{command}`, stderr:\n\t{exc!s}", exc_info=exc)
-                raise RuntimeError(f"failed to send command `{command}`, stderr:\n\t{exc!s}") from exc
+                return await operation(conn)
+            except _RECONNECT_ERRORS:
+                self.pool.discard(conn)
+                raise
+
+    async def _with_connection(
+        self,
+        operation: Callable[[SSHClientConnection], Awaitable[_T]],
+        channels: int = 1,
+        retry_after_send: bool = True,
+    ) -> _T:
+        """
+        Run `operation` on a pooled connection, retrying once on a fresh connection if the first one is dead.
+        Without `retry_after_send`, for operations which must not run twice, only failures before the operation
+        reached the remote host (connecting, opening the channel) are retried.
+        """
+        try:
+            return await self._attempt(operation, channels)
+        except _RECONNECT_ERRORS as exc:
+            if not retry_after_send and not isinstance(exc, _NOT_SENT_ERRORS):
+                raise
+            logger.warning(f"ssh connection to {self.hostname} failed ({exc!s}), retrying on a new connection")
+        return await self._attempt(operation, channels)
+
+    async def run_command(self, command: str) -> tuple[int, str, str]:
+        """
+        Run `command` on the remote host. A connection lost while the command runs is not retried, since the command
+        may have taken effect already (e.g. sbatch), the error is raised instead.
+        """
+
+        async def _run(conn: SSHClientConnection) -> SSHCompletedProcess:
+            return await conn.run(command, check=True)
+
+        try:
+            logger.info(f"Running ssh command: {command}")
+            result: SSHCompletedProcess = await self._with_connection(_run, retry_after_send=False)
+            if not isinstance(result.stdout, str):
+                raise TypeError(f"Expected result.stdout to be str, got {type(result.stdout)}")
+            if not isinstance(result.stderr, str):
+                raise TypeError(f"Expected result.stderr to be str, got {type(result.stderr)}")
+            if not isinstance(result.returncode, int):
+                raise TypeError(f"Expected result.returncode to be int, got {type(result.returncode)}")
+            logger.info(
+                msg=f"command {command} retcode {result.returncode} "
+                f"stdout={result.stdout[:100]} stderr={result.stderr[:100]}"
+            )
+            return result.returncode, result.stdout, result.stderr
+        except asyncssh.ProcessError as exc:
+            logger.exception(msg=f"failed to send command `{command}`, stderr:\n\t{exc.stderr!s}", exc_info=exc)
+            raise RuntimeError(f"failed to send command `{command}`, stderr:\n\t{exc.stderr!s})") from exc
+        except (OSError, asyncssh.Error) as exc:
+            logger.exception(msg=f"failed to send command `{command}`, stderr:\n\t{exc!s}", exc_info=exc)
+            raise RuntimeError(f"failed to send command `{command}`, stderr:\n\t{exc!s}") from exc
 
     async def scp_upload(self, local_file: Path, remote_path: Path) -> None:
-        async with asyncssh.connect(
-            host=self.hostname, username=self.username, client_keys=[self.key_path], known_hosts=self.known_hosts
-        ) as conn:
-            try:
+        async def _upload(conn: SSHClientConnection) -> None:
+            await asyncssh.scp(srcpaths=local_file, dstpath=(conn, remote_path))
+
+        try:
+            await self._with_connection(_upload)
+            logger.info(msg=f"sent file {local_file} to {remote_path}")
+        except (OSError, asyncssh.Error) as exc:
+            logger.exception(msg=f"failed to send file {local_file} to {remote_path}", exc_info=exc)
+            raise RuntimeError(f"failed to send file {local_file} to {remote_path}, error {exc!s}") from exc
+
+    async def scp_upload_many(self, files: list[tuple[Path, Path]]) -> None:
+        """Upload several (local_file, remote_path) pairs concurrently over one multiplexed connection."""
+
+        channels = min(len(files), self.pool.max_channels_per_connection)
+        semaphore = asyncio.Semaphore(channels)
+
+        async def _upload_one(conn: SSHClientConnection, local_file: Path, remote_path: Path) -> None:
+            async with semaphore:
                 await asyncssh.scp(srcpaths=local_file, dstpath=(conn, remote_path))
-                logger.info(msg=f"sent file {local_file} to {remote_path}")
-            except asyncssh.Error as exc:
-                logger.exception(msg=f"failed to send file {local_file} to {remote_path}", exc_info=exc)
-                raise RuntimeError(f"failed to send file {local_file} to {remote_path}, error {exc!s}") from exc
+
+        async def _upload_all(conn: SSHClientConnection) -> None:
+            await asyncio.gather(*[_upload_one(conn, local_file, remote_path) for local_file, remote_path in files])
+
+        try:
+            await self._with_connection(_upload_all, channels=channels)
+            logger.info(msg=f"sent files {[str(local_file) for local_file, _ in files]}")
+        except (OSError, asyncssh.Error) as exc:
+            logger.exception(msg=f"failed to send files {files}", exc_info=exc)
+            raise RuntimeError(f"failed to send files {files}, error {exc!s}") from exc
+
+    async def sftp_upload_many(
+        self, files: list[tuple[Path, Path]], max_concurrent: int = 16, moves: list[tuple[Path, Path]] | None = None
+    ) -> None:
+        """
+        Upload many (local_file, remote_path) pairs through a single SFTP session, creating remote directories
+        as needed. Suited to large fan-outs (e.g. batch inputs) where one scp channel per file would be wasteful.
+        `moves` are (staged_path, remote_path) pairs of files already on the remote host, renamed in the same session;
+        a staged file which is gone was moved by an earlier attempt and is skipped.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+        moves = moves or []
+
+        async def _upload_all(conn: SSHClientConnection) -> None:
+            async with conn.start_sftp_client() as sftp:
+                for remote_dir in sorted({str(remote_path.parent) for _, remote_path in [*files, *moves]}):
+                    await sftp.makedirs(remote_dir, exist_ok=True)
+
+                async def _upload_one(local_file: Path, remote_path: Path) -> None:
+                    async with semaphore:
+                        await sftp.put(str(local_file), str(remote_path))
+
+                await asyncio.gather(*[_upload_one(local_file, remote_path) for local_file, remote_path in files])
+                for staged_path, remote_path in moves:
+                    if await sftp.exists(str(staged_path)):
+                        await sftp.posix_rename(str(staged_path), str(remote_path))
+
+        try:
+            await self._with_connection(_upload_all)
+            logger.info(msg=f"sent {len(files)} files over sftp")
+        except (OSError, asyncssh.Error) as exc:
+            logger.exception(msg=f"failed to send {len(files)} files over sftp", exc_info=exc)
+            raise RuntimeError(f"failed to send {len(files)} files over sftp, error {exc!s}") from exc
+
+    async def sftp_write_stream(self, remote_path: Path, chunks: AsyncIterator[bytes], offset: int = 0) -> int:
+        """
+        Write `chunks` to `remote_path` as they arrive, overwriting from `offset` to resume an interrupted stream.
+        Not retried on a new connection since `chunks` can't be replayed, callers resume from the offset carried by
+        SFTPStreamInterrupted instead. The size of the remote file is no valid resume point, see there.
+        :return: size of the remote file
+        """
+        acknowledged = offset
+
+        async def _write(conn: SSHClientConnection) -> int:
+            nonlocal acknowledged
+            async with conn.start_sftp_client() as sftp:
+                await sftp.makedirs(str(remote_path.parent), exist_ok=True)
+                async with sftp.open(str(remote_path), "wb" if offset == 0 else "r+b") as remote_file:
+                    async for chunk in chunks:
+                        # returns once every request the chunk was split into is acknowledged
+                        await remote_file.write(chunk, acknowledged)
+                        acknowledged += len(chunk)
+                    await remote_file.truncate(acknowledged)
+                    return acknowledged
+
+        try:
+            size = await self._attempt(_write, channels=1)
+            logger.info(msg=f"streamed {size - offset} bytes to {remote_path}")
+            return size
+        except (OSError, asyncssh.Error) as exc:
+            logger.warning(f"stream to {remote_path} interrupted after byte {acknowledged}: {exc!s}")
+            raise SFTPStreamInterrupted(
+                f"failed to stream to {remote_path}, error {exc!s}", acknowledged=acknowledged
+            ) from exc
+
+    async def sftp_stat(self, remote_path: Path) -> tuple[int, int]:
+        """
+        :return: (size in bytes, modification time in epoch seconds) of a remote file
+        :raises FileNotFoundError: if the file does not exist
+        """
+
+        async def _stat(conn: SSHClientConnection) -> tuple[int, int]:
+            async with conn.start_sftp_client() as sftp:
+                attrs = await sftp.stat(str(remote_path))
+                return attrs.size or 0, attrs.mtime or 0
+
+        try:
+            return await self._with_connection(_stat)
+        except asyncssh.SFTPNoSuchFile as exc:
+            raise FileNotFoundError(f"remote file {remote_path} not found") from exc
+        except (OSError, asyncssh.Error) as exc:
+            raise RuntimeError(f"failed to stat remote file {remote_path}, error {exc!s}") from exc
+
+    async def sftp_read_stream(
+        self, remote_path: Path, start: int, end: int, chunk_size: int = 1024 * 1024
+    ) -> AsyncIterator[bytes]:
+        """
+        Read bytes [start, end) of a remote file chunk by chunk, holding a channel of the download pool until the
+        stream is exhausted or closed, streams beyond its capacity wait for one. Not retried, the caller may have
+        forwarded part of the stream already.
+        """
+        async with (
+            self.download_pool.connection() as conn,
+            conn.start_sftp_client() as sftp,
+            sftp.open(str(remote_path), "rb", encoding=None) as remote_file,
+        ):
+            position = start
+            while position < end:
+                chunk = await remote_file.read(min(chunk_size, end - position), position)
+                if not isinstance(chunk, bytes):
+                    raise TypeError(f"Expected bytes from {remote_path}, got {type(chunk)}")
+                if not chunk:
+                    raise RuntimeError(f"remote file {remote_path} ended at byte {position}, expected {end}")
+                position += len(chunk)
+                yield chunk
 
     async def scp_download(self, local_file: Path, remote_path: Path) -> None:
-        async with asyncssh.connect(
-            host=self.hostname, username=self.username, client_keys=[self.key_path], known_hosts=self.known_hosts
-        ) as conn:
-            try:
-                await asyncssh.scp(srcpaths=(conn, remote_path), dstpath=local_file)
-                logger.info(msg=f"retrieved remote file {remote_path} to {local_file}")
-            except asyncssh.Error as exc:
-                logger.exception(msg=f"failed to retrieve remote file {remote_path} to {local_file}", exc_info=exc)
-                raise RuntimeError(
-                    f"failed to retrieve remote file {remote_path} to {local_file}, error {exc!s}"
-                ) from exc
+        async def _download(conn: SSHClientConnection) -> None:
+            await asyncssh.scp(srcpaths=(conn, remote_path), dstpath=local_file)
+
+        try:
+            await self._with_connection(_download)
+            logger.info(msg=f"retrieved remote file {remote_path} to {local_file}")
+        except (OSError, asyncssh.Error) as exc:
+            logger.exception(msg=f"failed to retrieve remote file {remote_path} to {local_file}", exc_info=exc)
+            raise RuntimeError(f"failed to retrieve remote file {remote_path} to {local_file}, error {exc!s}") from exc
 
     async def close(self) -> None:
-        pass  # nothing to do here because we don't yet keep the connection around.
+        await self.pool.close()
+        await self.download_pool.close()
 
     async def download_container(self, remote_container_image: RemoteContainerImage) -> None:
         engine: ContainerizationEngine = ContainerizationEngine[get_settings().container_service]
@@ -108,11 +316,23 @@ class SSHService:
                 raise ValueError(err)
 
 
+global_ssh_service: SSHService | None = None
+
+
+def set_ssh_service(ssh_service: SSHService | None) -> None:
+    global global_ssh_service
+    global_ssh_service = ssh_service
+
+
 def get_ssh_service() -> SSHService:
-    settings = get_settings()
-    return SSHService(
-        hostname=settings.slurm_submit_host,
-        username=settings.slurm_submit_user,
-        key_path=Path(settings.slurm_submit_key_path),
-        known_hosts=Path(settings.slurm_submit_known_hosts) if settings.slurm_submit_known_hosts else None,
-    )
+    """Process-wide SSHService, so that every caller shares the same pool of connections to the submit host."""
+    global global_ssh_service
+    if global_ssh_service is None:
+        settings = get_settings()
+        global_ssh_service = SSHService(
+            hostname=settings.slurm_submit_host,
+            username=settings.slurm_submit_user,
+            key_path=Path(settings.slurm_submit_key_path),
+            known_hosts=Path(settings.slurm_submit_known_hosts) if settings.slurm_submit_known_hosts else None,
+        )
+    return global_ssh_service
@@ -34,6 +34,7 @@ class Settings(BaseSettings):
     temporal_service_url: str = "localhost:7233"
 
     storage_local_cache_dir: str = "./local_cache"
+    results_cache_max_bytes: int = 10 * 1024 * 1024 * 1024  # results archives kept in the local cache, 0 disables it
 
     storage_gcs_credentials_file: str = ""
 
@@ -57,19 +58,72 @@ class Settings(BaseSettings):
     slurm_submit_user: str = ""
     slurm_submit_key_path: str = ""
     slurm_submit_known_hosts: str | None = None
+    slurm_ssh_max_connections: int = 4  # size of the shared ssh connection pool to the submit host
+    slurm_ssh_max_channels_per_connection: int = 8  # concurrent sessions per connection, keep below sshd MaxSessions
+    slurm_ssh_keepalive_interval: int = 30  # seconds between keepalive probes on idle pooled connections
+    slurm_ssh_keepalive_count_max: int = 3  # unanswered keepalives before a pooled connection is dropped
+    slurm_ssh_connect_timeout: int = 30  # seconds
+    slurm_ssh_download_max_connections: int = 1  # separate pool for results streams, which hold a channel for long
+    slurm_ssh_download_max_channels_per_connection: int = 4  # concurrent results streams per download connection
+    slurm_status_overlap_seconds: int = 60  # incremental sacct windows start this long before the last poll
+    slurm_status_full_reconcile_polls: int = 60  # polls between full sacct queries of every tracked job
+    job_monitor_min_interval_seconds: float = 2.0  # polling interval right after submissions and state changes
+    job_monitor_active_max_interval_seconds: float = 15.0  # slowest polling interval while jobs are in flight
+    job_monitor_max_interval_seconds: float = 60.0  # slowest polling interval when no jobs are active
+    job_monitor_backoff_factor: float = 1.5  # interval multiplier applied after each poll without state changes
+    job_monitor_max_polls_per_minute: int = 20  # hard cap on status queries sent to the slurm controller
     slurm_partition: str = ""
     slurm_node_list: str = ""  # comma-separated list of nodes, e.g., "node1,node2"
     slurm_build_node: str = ""
     slurm_qos: str = ""
     batch_slurm_qos: str = ""
+    slurm_max_array_size: int = 1000  # keep below the cluster's MaxArraySize
+    slurm_array_max_concurrent_tasks: int = 0  # "%N" throttle on running array tasks, 0 for no limit
+    slurm_packed_cpus_per_job: int = 16  # cores of a packed batch job, one simulation runs per core
+    slurm_packed_max_simulations: int = 256  # simulations per packed batch job
+    slurm_packed_time_limit: str = "4:00:00"  # wall time of a packed batch job
     batch_slurm_partition: str = ""
+    upload_max_size_bytes: int = 1024 * 1024 * 1024  # larger uploads are rejected with 413
+    upload_chunk_size_bytes: int = 1024 * 1024  # uploads are streamed to disk in chunks of this size
+    upload_stream_to_hpc: bool = False  # stream uploads to the cluster over sftp instead of keeping a local copy
+    upload_stream_max_resumes: int = 3  # interrupted sftp streams resumed before falling back to a local copy
+    upload_staging_max_age_seconds: int = 2 * 24 * 3600  # staged inputs never submitted are deleted after this
+    upload_staging_sweep_interval_seconds: float = 3600.0  # how often stale staged inputs are looked for
+    results_chunk_size_bytes: int = 1024 * 1024  # results downloads are streamed in chunks of this size
+    results_ingest_parquet: bool = True  # convert results to Parquet on completion rather than on the first query
+    dispatch_workers: int = 4  # concurrent submissions to slurm per replica
+    dispatch_poll_interval_seconds: float = 2.0  # how often idle workers look for jobs enqueued by other replicas
+    dispatch_max_attempts: int = 5  # submission attempts before a dispatch job is marked FAILED
+    dispatch_retry_backoff_seconds: float = 10.0  # delay before the first retry, doubled on every further attempt
+    dispatch_lease_seconds: int = 900  # RUNNING dispatch jobs older than this are assumed lost and retried
+    container_provisioning_lease_seconds: int = (
+        300  # a container download/build claim not renewed this long is taken over
+    )
+    container_provisioning_poll_seconds: float = 5.0  # how often a replica checks on a container another one provisions
 
     simulation_store_base_path: str = ""
     hpc_sim_config_file: str = "publish.json"
     hpc_has_messaging: bool = False
+    default_container_def_ttl_seconds: int = 300  # how long the container definition built from the registry is reused
+    default_container_def_retry_seconds: int = 30  # how long the previous definition is reused after a registry failure
+    simulator_cache_ttl_seconds: int = 300  # how long a simulator looked up by container definition hash is memoized
+    simulation_cache_ttl_seconds: int = 7 * 24 * 3600  # reuse results of identical completed simulations, 0 disables
 
     nats_url: str = ""
     nats_worker_event_subject: str = "worker.events"
+    worker_event_batch_size: int = 500  # worker events are written to the database in batches of up to this size
+    worker_event_flush_interval_seconds: float = 0.25  # longest wait for a batch to fill up before it is written
+    worker_event_buffer_size: int = 10000  # queued worker events before the NATS message handler waits
+    worker_event_pending_msgs_limit: int = (
+        100000  # worker event messages NATS holds before dropping them (slow consumer)
+    )
+    worker_event_insert_retries: int = 5  # retries of a batch of worker events failing with a transient database error
+    worker_event_retry_backoff_seconds: float = 0.5  # delay before the first retry of a batch, doubled on every retry
+    worker_event_partitions_ahead_days: int = 3  # daily worker_event partitions are created this many days ahead
+    worker_event_retention_days: int = (
+        30  # worker events older than this are dropped with their partition, 0 keeps them
+    )
+    worker_event_maintenance_interval_seconds: float = 3600.0  # how often partitions are created and dropped
 
     nats_emitter_url: str = ""
     nats_emitter_magic_word: str = "emitter-magic-word"
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from typing_extensions import override
 
+from compose_api.db.services.dispatch_db import DispatchDatabaseService, DispatchORMExecutor
 from compose_api.db.services.hpc_db import HPCDatabaseService, HPCORMExecutor
 from compose_api.db.services.packages_db import PackageDatabaseService, PackageORMExecutor
 from compose_api.db.services.simulators_db import SimulatorDatabaseService, SimulatorORMExecutor
@@ -24,6 +25,10 @@ class DatabaseService(ABC):
     def get_package_db(self) -> PackageDatabaseService:
         pass
 
+    @abstractmethod
+    def get_dispatch_db(self) -> DispatchDatabaseService:
+        pass
+
     @abstractmethod
     async def close(self) -> None:
         pass
@@ -34,12 +39,14 @@ class DatabaseServiceSQL(DatabaseService):
     simulator_db: SimulatorDatabaseService
     hpc_database: HPCDatabaseService
     package_db: PackageDatabaseService
+    dispatch_db: DispatchDatabaseService
 
     def __init__(self, async_engine: AsyncEngine):
         self.async_sessionmaker = async_sessionmaker(async_engine, expire_on_commit=True)
         self.simulator_db = SimulatorORMExecutor(self.async_sessionmaker)
         self.hpc_database = HPCORMExecutor(self.async_sessionmaker)
         self.package_db = PackageORMExecutor(self.async_sessionmaker)
+        self.dispatch_db = DispatchORMExecutor(self.async_sessionmaker)
 
     @override
     def get_simulator_db(self) -> SimulatorDatabaseService:
@@ -53,6 +60,10 @@ class DatabaseServiceSQL(DatabaseService):
     def get_package_db(self) -> PackageDatabaseService:
         return self.package_db
 
+    @override
+    def get_dispatch_db(self) -> DispatchDatabaseService:
+        return self.dispatch_db
+
     @override
     async def close(self) -> None:
         pass
@@ -0,0 +1,174 @@
+import datetime
+import logging
+from abc import ABC, abstractmethod
+
+from sqlalchemy import ColumnElement, Result, and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing_extensions import override
+
+from compose_api.db.tables.dispatch_tables import DispatchStatusDB, ORMDispatchJob
+from compose_api.simulation.models import DispatchJob, SimulationDispatch
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchDatabaseService(ABC):
+    @abstractmethod
+    async def enqueue(self, dispatch: SimulationDispatch) -> DispatchJob:
+        """Persist a dispatch job, it is picked up by the next free worker of any replica."""
+        pass
+
+    @abstractmethod
+    async def claim_next(self, lease_seconds: float) -> DispatchJob | None:
+        """
+        Claim the oldest job which is due, marking it RUNNING and counting the attempt.
+        Jobs left RUNNING for more than `lease_seconds` (their worker died with its replica) are claimed again.
+        Concurrent callers never claim the same job.
+        """
+        pass
+
+    @abstractmethod
+    async def renew_lease(self, dispatch_job_id: int, attempt: int) -> bool:
+        """
+        Extend the lease of a job still being processed by the claim which counted `attempt`.
+        Returns: False if the claim was lost, i.e. the job was claimed again after its lease expired
+        """
+        pass
+
+    @abstractmethod
+    async def complete(self, dispatch_job_id: int, attempt: int) -> bool:
+        """Mark the job DONE, unless the claim which counted `attempt` was lost (returns False then)."""
+        pass
+
+    @abstractmethod
+    async def fail(self, dispatch_job_id: int, attempt: int, error: str, retry_in_seconds: float | None) -> bool:
+        """
+        Record a failed attempt; retry after `retry_in_seconds`, or give up (FAILED) if it is None.
+        Like complete, nothing is recorded if the claim which counted `attempt` was lost (returns False then).
+        """
+        pass
+
+    @abstractmethod
+    async def get_dispatch_job(self, dispatch_job_id: int) -> DispatchJob | None:
+        pass
+
+    @abstractmethod
+    async def delete_dispatch_job(self, dispatch_job_id: int) -> None:
+        pass
+
+
+class DispatchORMExecutor(DispatchDatabaseService):
+    async_session_maker: async_sessionmaker[AsyncSession]
+
+    def __init__(self, async_session_maker: async_sessionmaker[AsyncSession]):
+        self.async_session_maker = async_session_maker
+
+    @staticmethod
+    async def _get_orm_dispatch_job(session: AsyncSession, dispatch_job_id: int) -> ORMDispatchJob | None:
+        stmt = select(ORMDispatchJob).where(ORMDispatchJob.id == dispatch_job_id).limit(1)
+        result: Result[tuple[ORMDispatchJob]] = await session.execute(stmt)
+        return result.scalars().one_or_none()
+
+    @override
+    async def enqueue(self, dispatch: SimulationDispatch) -> DispatchJob:
+        async with self.async_session_maker() as session, session.begin():
+            orm_dispatch_job = ORMDispatchJob(
+                payload=dispatch.model_dump(mode="json"), status=DispatchStatusDB.PENDING, attempts=0
+            )
+            session.add(orm_dispatch_job)
+            await session.flush()
+            return orm_dispatch_job.to_dispatch_job()
+
+    @override
+    async def claim_next(self, lease_seconds: float) -> DispatchJob | None:
+        async with self.async_session_maker() as session, session.begin():
+            stmt = (
+                select(ORMDispatchJob)
+                .where(
+                    or_(
+                        and_(
+                            ORMDispatchJob.status == DispatchStatusDB.PENDING,
+                            ORMDispatchJob.next_attempt_at <= func.now(),
+                        ),
+                        and_(
+                            ORMDispatchJob.status == DispatchStatusDB.RUNNING,
+                            ORMDispatchJob.locked_at < func.now() - datetime.timedelta(seconds=lease_seconds),
+                        ),
+                    )
+                )
+                .order_by(ORMDispatchJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            result: Result[tuple[ORMDispatchJob]] = await session.execute(stmt)
+            orm_dispatch_job: ORMDispatchJob | None = result.scalars().one_or_none()
+            if orm_dispatch_job is None:
+                return None
+            if orm_dispatch_job.status == DispatchStatusDB.RUNNING:
+                logger.warning(f"Dispatch job {orm_dispatch_job.id} outlived its lease, claiming it again")
+            orm_dispatch_job.status = DispatchStatusDB.RUNNING
+            orm_dispatch_job.attempts += 1
+            orm_dispatch_job.locked_at = func.now()
+            await session.flush()
+            await session.refresh(orm_dispatch_job)
+            return orm_dispatch_job.to_dispatch_job()
+
+    @staticmethod
+    def _is_claimed(dispatch_job_id: int, attempt: int) -> ColumnElement[bool]:
+        # the attempt counter identifies the claim, a job claimed again after its lease expired has counted another
+        return and_(
+            ORMDispatchJob.id == dispatch_job_id,
+            ORMDispatchJob.attempts == attempt,
+            ORMDispatchJob.status == DispatchStatusDB.RUNNING,
+        )
+
+    @override
+    async def renew_lease(self, dispatch_job_id: int, attempt: int) -> bool:
+        async with self.async_session_maker() as session, session.begin():
+            stmt = (
+                update(ORMDispatchJob)
+                .where(self._is_claimed(dispatch_job_id, attempt))
+                .values(locked_at=func.now())
+                .returning(ORMDispatchJob.id)
+            )
+            return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+    @override
+    async def complete(self, dispatch_job_id: int, attempt: int) -> bool:
+        async with self.async_session_maker() as session, session.begin():
+            stmt = (
+                update(ORMDispatchJob)
+                .where(self._is_claimed(dispatch_job_id, attempt))
+                .values(status=DispatchStatusDB.DONE, locked_at=None, last_error=None)
+                .returning(ORMDispatchJob.id)
+            )
+            return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+    @override
+    async def fail(self, dispatch_job_id: int, attempt: int, error: str, retry_in_seconds: float | None) -> bool:
+        async with self.async_session_maker() as session, session.begin():
+            stmt = update(ORMDispatchJob).where(self._is_claimed(dispatch_job_id, attempt))
+            if retry_in_seconds is None:
+                stmt = stmt.values(status=DispatchStatusDB.FAILED, locked_at=None, last_error=error)
+            else:
+                stmt = stmt.values(
+                    status=DispatchStatusDB.PENDING,
+                    locked_at=None,
+                    last_error=error,
+                    next_attempt_at=func.now() + datetime.timedelta(seconds=retry_in_seconds),
+                )
+            return (await session.execute(stmt.returning(ORMDispatchJob.id))).scalar_one_or_none() is not None
+
+    @override
+    async def get_dispatch_job(self, dispatch_job_id: int) -> DispatchJob | None:
+        async with self.async_session_maker() as session:
+            orm_dispatch_job = await self._get_orm_dispatch_job(session, dispatch_job_id)
+            return None if orm_dispatch_job is None else orm_dispatch_job.to_dispatch_job()
+
+    @override
+    async def delete_dispatch_job(self, dispatch_job_id: int) -> None:
+        async with self.async_session_maker() as session, session.begin():
+            orm_dispatch_job = await self._get_orm_dispatch_job(session, dispatch_job_id)
+            if orm_dispatch_job is None:
+                raise Exception(f"Dispatch job with id {dispatch_job_id} not found in the database")
+            await session.delete(orm_dispatch_job)
@@ -2,17 +2,21 @@ import datetime
 import logging
 from abc import ABC, abstractmethod
 
-from sqlalchemy import Result, and_, select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import Result, and_, insert, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import InstrumentedAttribute
 from typing_extensions import override
 
 from compose_api.common.hpc.models import SlurmJob
 from compose_api.db.tables.hpc_tables import (
+    ACTIVE_HPCRUN_PREDICATE,
+    WORKER_EVENT_PARTITION_PATTERN,
     JobStatusDB,
     JobTypeDB,
     ORMHpcRun,
     ORMWorkerEvent,
+    worker_event_partition_name,
 )
 from compose_api.simulation.models import (
     HpcRun,
@@ -22,12 +26,42 @@ from compose_api.simulation.models import (
 
 logger = logging.getLogger(__name__)
 
+# postgres' error inserting a row into a partitioned table without a partition for it
+_NO_PARTITION_ERROR = "no partition of relation"
+# serializes worker_event partition maintenance across replicas
+_WORKER_EVENT_PARTITIONS_LOCK = "hashtext('worker_event_partitions')"
+
 
 class HPCDatabaseService(ABC):
     @abstractmethod
     async def insert_worker_event(self, worker_event: WorkerEvent, hpcrun_id: int) -> WorkerEvent:
         pass
 
+    @abstractmethod
+    async def insert_worker_events(self, worker_events: list[WorkerEvent]) -> None:
+        """
+        Insert many worker events with a single multi-row insert.
+        :param worker_events: events with their `hpcrun_id` set, see WorkerEventBuffer
+        """
+        pass
+
+    @abstractmethod
+    async def create_worker_event_partitions(self, days_ahead: int) -> list[str]:
+        """
+        Create the missing daily partitions of worker_event, from today up to `days_ahead` days from now.
+        Returns: names of the partitions created
+        """
+        pass
+
+    @abstractmethod
+    async def drop_worker_event_partitions(self, retention_days: int) -> list[str]:
+        """
+        Drop the daily partitions of worker_event which only hold events older than `retention_days` days. They are
+        detached concurrently first, which unlike dropping them right away does not block queries on worker_event.
+        Returns: names of the partitions dropped
+        """
+        pass
+
     @abstractmethod
     async def list_worker_events(self, hpcrun_id: int, prev_sequence_number: int | None = None) -> list[WorkerEvent]:
         pass
@@ -42,6 +76,24 @@ class HPCDatabaseService(ABC):
         """
         pass
 
+    @abstractmethod
+    async def insert_array_hpcruns(
+        self,
+        slurmjobid: int,
+        job_type: JobType,
+        ref_ids: list[int],
+        correlation_ids: list[str],
+        packed: bool = False,
+    ) -> list[HpcRun]:
+        """
+        Insert one HpcRun per task of a Slurm job array in a single transaction.
+        :param slurmjobid: (`int`) job id of the whole array.
+        :param ref_ids: primary keys of the objects the tasks run, task `i` of the array runs `ref_ids[i]`.
+        :param correlation_ids: correlation id of each task, in the same order as `ref_ids`.
+        :param packed: the tasks run inside one packed batch job rather than as a Slurm job array.
+        """
+        pass
+
     @abstractmethod
     async def get_hpcrun_by_ref(self, ref_id: int, job_type: JobType) -> HpcRun | None:
         pass
@@ -71,13 +123,13 @@ class HPCDatabaseService(ABC):
         pass
 
     @abstractmethod
-    async def list_running_hpcruns(self) -> list[HpcRun]:
-        """Return all HpcRun jobs with status RUNNING."""
+    async def list_active_hpcruns(self) -> list[HpcRun]:
+        """Return all HpcRun jobs which have not reached a terminal status (see JobStatus.is_terminal)."""
         pass
 
     @abstractmethod
-    async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> None:
-        """Update the status of a given HpcRun job."""
+    async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> HpcRun:
+        """Update the status of a given HpcRun job, returning the updated HpcRun."""
         pass
 
     @abstractmethod
@@ -112,7 +164,8 @@ class HPCORMExecutor(HPCDatabaseService):
 
     async def _get_orm_hpcrun_by_ref(self, session: AsyncSession, ref_id: int, job_type: JobType) -> ORMHpcRun | None:
         reference = self._get_job_type_ref(job_type)
-        stmt1 = select(ORMHpcRun).where(reference == ref_id).limit(1)
+        # most recent run first, e.g. a container build which was retried after a failure
+        stmt1 = select(ORMHpcRun).where(reference == ref_id).order_by(ORMHpcRun.id.desc()).limit(1)
         result1: Result[tuple[ORMHpcRun]] = await session.execute(stmt1)
         orm_hpc_job: ORMHpcRun | None = result1.scalars().one_or_none()
 
@@ -139,6 +192,36 @@ class HPCORMExecutor(HPCDatabaseService):
             await session.flush()
             return orm_hpc_run.to_hpc_run()
 
+    @override
+    async def insert_array_hpcruns(
+        self,
+        slurmjobid: int,
+        job_type: JobType,
+        ref_ids: list[int],
+        correlation_ids: list[str],
+        packed: bool = False,
+    ) -> list[HpcRun]:
+        if len(ref_ids) != len(correlation_ids):
+            raise ValueError(f"Got {len(ref_ids)} ref ids but {len(correlation_ids)} correlation ids")
+        async with self.async_session_maker() as session, session.begin():
+            orm_hpc_runs = [
+                ORMHpcRun(
+                    slurmjobid=slurmjobid,
+                    slurm_array_task_id=None if packed else task_id,
+                    packed_task_id=task_id if packed else None,
+                    job_type=JobTypeDB.from_job_type(job_type),
+                    status=JobStatusDB.PENDING,
+                    simulation_id=ref_id if job_type == JobType.SIMULATION else None,
+                    simulator_id=ref_id if job_type == JobType.BUILD_CONTAINER else None,
+                    start_time=datetime.datetime.now(),
+                    correlation_id=correlation_id,
+                )
+                for task_id, (ref_id, correlation_id) in enumerate(zip(ref_ids, correlation_ids))
+            ]
+            session.add_all(orm_hpc_runs)
+            await session.flush()
+            return [orm_hpc_run.to_hpc_run() for orm_hpc_run in orm_hpc_runs]
+
     @override
     async def get_hpcruns_by_refs(self, ref_ids: list[int], job_type: JobType) -> list[HpcRun]:
         async with self.async_session_maker() as session, session.begin():
@@ -190,6 +273,117 @@ class HPCORMExecutor(HPCDatabaseService):
             new_worker_event = orm_worker_event.to_worker_event()
             return new_worker_event
 
+    @override
+    async def insert_worker_events(self, worker_events: list[WorkerEvent]) -> None:
+        if not worker_events:
+            return
+        rows = []
+        for worker_event in worker_events:
+            if worker_event.hpcrun_id is None:
+                raise ValueError(f"Worker event {worker_event.correlation_id} has no hpcrun_id")
+            rows.append({
+                "hpcrun_id": worker_event.hpcrun_id,
+                "correlation_id": worker_event.correlation_id,
+                "sequence_number": worker_event.sequence_number,
+                "mass": worker_event.mass,
+                "time": worker_event.time,
+            })
+        try:
+            await self._insert_worker_event_rows(rows)
+        except DBAPIError as e:
+            if _NO_PARTITION_ERROR not in str(e):
+                raise
+            # today's partition is missing, e.g. the partition maintenance is not running (yet)
+            logger.warning(f"Creating the missing worker_event partition to insert {len(rows)} events")
+            await self.create_worker_event_partitions(days_ahead=1)
+            await self._insert_worker_event_rows(rows)
+
+    async def _insert_worker_event_rows(self, rows: list[dict[str, object]]) -> None:
+        async with self.async_session_maker() as session, session.begin():
+            await session.execute(insert(ORMWorkerEvent), rows)
+
+    @override
+    async def create_worker_event_partitions(self, days_ahead: int) -> list[str]:
+        created: list[str] = []
+        async with self.async_session_maker() as session, session.begin():
+            today = await self._lock_worker_event_partitions(session)
+            existing = await self._list_worker_event_partitions(session)
+            for offset in range(days_ahead + 1):
+                day = today + datetime.timedelta(days=offset)
+                if day in existing:
+                    continue
+                partition = worker_event_partition_name(day)
+                try:
+                    async with session.begin_nested():
+                        await session.execute(
+                            text(
+                                f"CREATE TABLE {partition} PARTITION OF {ORMWorkerEvent.__tablename__} "
+                                f"FOR VALUES FROM ('{day.isoformat()}') "
+                                f"TO ('{(day + datetime.timedelta(days=1)).isoformat()}')"
+                            )
+                        )
+                except DBAPIError as e:
+                    # e.g. a partition created by hand which overlaps that day
+                    logger.warning(f"Could not create worker_event partition {partition}: {e}")
+                    continue
+                created.append(partition)
+        return created
+
+    @override
+    async def drop_worker_event_partitions(self, retention_days: int) -> list[str]:
+        dropped: list[str] = []
+        async with self.async_session_maker() as session:
+            # DETACH PARTITION ... CONCURRENTLY cannot run inside a transaction block, so neither can the lock
+            connection = await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            await connection.execute(text(f"SELECT pg_advisory_lock({_WORKER_EVENT_PARTITIONS_LOCK})"))
+            try:
+                today = await self._get_database_date(connection)
+                cutoff = today - datetime.timedelta(days=retention_days)
+                partitions = await self._list_worker_event_partitions(connection)
+                for day, (partition, detach_pending) in sorted(partitions.items()):
+                    if day >= cutoff:
+                        break
+                    # an interrupted concurrent detach leaves the partition pending, it has to be finalized instead
+                    mode = "FINALIZE" if detach_pending else "CONCURRENTLY"
+                    await connection.execute(
+                        text(f"ALTER TABLE {ORMWorkerEvent.__tablename__} DETACH PARTITION {partition} {mode}")
+                    )
+                    await connection.execute(text(f"DROP TABLE {partition}"))
+                    dropped.append(partition)
+            finally:
+                await connection.execute(text(f"SELECT pg_advisory_unlock({_WORKER_EVENT_PARTITIONS_LOCK})"))
+        return dropped
+
+    @classmethod
+    async def _lock_worker_event_partitions(cls, session: AsyncSession) -> datetime.date:
+        """Serialize partition maintenance across replicas, returns today's date on the database clock."""
+        await session.execute(text(f"SELECT pg_advisory_xact_lock({_WORKER_EVENT_PARTITIONS_LOCK})"))
+        return await cls._get_database_date(session)
+
+    @staticmethod
+    async def _get_database_date(connection: AsyncSession | AsyncConnection) -> datetime.date:
+        today: datetime.date = (await connection.execute(text("SELECT CAST(localtimestamp AS date)"))).scalar_one()
+        return today
+
+    @staticmethod
+    async def _list_worker_event_partitions(
+        connection: AsyncSession | AsyncConnection,
+    ) -> dict[datetime.date, tuple[str, bool]]:
+        """Daily partitions of worker_event by day, with whether a concurrent detach of the partition is pending."""
+        stmt = text(
+            "SELECT child.relname, pg_inherits.inhdetachpending FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :parent"
+        )
+        result = await connection.execute(stmt, {"parent": ORMWorkerEvent.__tablename__})
+        partitions: dict[datetime.date, tuple[str, bool]] = {}
+        for partition, detach_pending in result.all():
+            match = WORKER_EVENT_PARTITION_PATTERN.fullmatch(partition)
+            if match is not None:
+                partitions[datetime.datetime.strptime(match.group(1), "%Y%m%d").date()] = (partition, detach_pending)
+        return partitions
+
     @override
     async def list_worker_events(self, hpcrun_id: int, prev_sequence_number: int | None = None) -> list[WorkerEvent]:
         async with self.async_session_maker() as session, session.begin():
@@ -218,15 +412,16 @@ class HPCORMExecutor(HPCDatabaseService):
             return worker_events
 
     @override
-    async def list_running_hpcruns(self) -> list[HpcRun]:
+    async def list_active_hpcruns(self) -> list[HpcRun]:
         async with self.async_session_maker() as session:
-            stmt = select(ORMHpcRun).where(ORMHpcRun.status == JobStatusDB.RUNNING)
+            # literal predicate matching the partial index ix_hpcrun_active_status
+            stmt = select(ORMHpcRun).where(text(ACTIVE_HPCRUN_PREDICATE))
             result: Result[tuple[ORMHpcRun]] = await session.execute(stmt)
             orm_hpcruns = result.scalars().all()
             return [orm_hpcrun.to_hpc_run() for orm_hpcrun in orm_hpcruns]
 
     @override
-    async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> None:
+    async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> HpcRun:
         async with self.async_session_maker() as session, session.begin():
             orm_hpcrun: ORMHpcRun | None = await self._get_orm_hpcrun(session, hpcrun_id=hpcrun_id)
             if orm_hpcrun is None:
@@ -237,6 +432,7 @@ class HPCORMExecutor(HPCDatabaseService):
             if new_slurm_job.end_time is not None and new_slurm_job.end_time != orm_hpcrun.end_time:
                 orm_hpcrun.end_time = datetime.datetime.fromisoformat(new_slurm_job.end_time)
             await session.flush()
+            return orm_hpcrun.to_hpc_run()
 
     @override
     async def get_hpcrun_id_by_correlation_id(self, correlation_id: str) -> int | None:
@@ -1,9 +1,11 @@
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 from typing import Any
 
 from pbest.utils.input_types import ExperimentPrimaryDependencies
-from sqlalchemy import Result, select
+from sqlalchemy import Result, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing_extensions import override
 
@@ -34,6 +36,10 @@ class PackageDatabaseService(ABC):
     async def insert_package(self, package_outline: PackageOutline) -> RegisteredPackage:
         pass
 
+    @abstractmethod
+    async def insert_packages(self, package_outlines: list[PackageOutline]) -> list[RegisteredPackage]:
+        pass
+
     @abstractmethod
     async def list_simulator_packages(self, simulator_id: int) -> list[RegisteredPackage]:
         pass
@@ -118,9 +124,11 @@ class PackageORMExecutor(PackageDatabaseService):
             processes: list[BiGraphProcess] = []
             steps: list[BiGraphStep] = []
             await session.flush()
-            for compute in package.compute:
-                inserted_compute = await self._insert_compute(session, compute, new_orm_package)
-                await session.flush()
+            inserted_computes = [
+                await self._insert_compute(session, compute, new_orm_package) for compute in package.compute
+            ]
+            await session.flush()
+            for inserted_compute in inserted_computes:
                 match inserted_compute.compute_type:
                     case BiGraphComputeTypeDB.PROCESS:
                         processes.append(inserted_compute.to_bigraph_process())
@@ -131,22 +139,82 @@ class PackageORMExecutor(PackageDatabaseService):
 
             return new_orm_package.to_bigraph_package(processes, steps)
 
+    @override
+    async def insert_packages(self, package_outlines: list[PackageOutline]) -> list[RegisteredPackage]:
+        """
+        Register many packages in one transaction, with a constant number of statements: packages are inserted with a
+        multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING, and the computes of the new packages with another one.
+        Packages which are registered already (same name and package type) are left unchanged.
+        Returns: a RegisteredPackage per distinct name and package type, in the order of package_outlines
+        """
+        outlines_by_key: dict[tuple[str, PackageTypeDB], PackageOutline] = {}
+        for outline in package_outlines:
+            outlines_by_key.setdefault((outline.name, PackageTypeDB.from_package_type(outline.package_type)), outline)
+        if not outlines_by_key:
+            return []
+        async with self.async_session_maker() as session, session.begin():
+            insert_packages_stmt = (
+                pg_insert(ORMPackage)
+                .on_conflict_do_nothing(constraint="unique_package_name_and_type")
+                .returning(ORMPackage)
+            )
+            inserted_packages = (
+                await session.scalars(
+                    insert_packages_stmt,
+                    [{"name": name, "package_type": package_type} for name, package_type in outlines_by_key],
+                )
+            ).all()
+            orm_packages_by_key = {(package.name, package.package_type): package for package in inserted_packages}
+
+            compute_rows = [
+                {
+                    "module": compute.module,
+                    "name": compute.name,
+                    "compute_type": BiGraphComputeTypeDB.from_compute_type(compute.compute_type),
+                    "inputs": compute.inputs,
+                    "outputs": compute.outputs,
+                    "package_ref": orm_package.id,
+                }
+                for key, orm_package in orm_packages_by_key.items()
+                for compute in outlines_by_key[key].compute
+            ]
+            computes_by_package: dict[int, tuple[list[BiGraphProcess], list[BiGraphStep]]] = {}
+            if compute_rows:
+                insert_computes_stmt = insert(ORMBiGraphCompute).returning(
+                    ORMBiGraphCompute, sort_by_parameter_order=True
+                )
+                computes_by_package = self._group_computes(
+                    (await session.scalars(insert_computes_stmt, compute_rows)).all()
+                )
+            registered_packages = {
+                key: orm_package.to_bigraph_package(*computes_by_package.get(orm_package.id, ([], [])))
+                for key, orm_package in orm_packages_by_key.items()
+            }
+
+            skipped_keys = [key for key in outlines_by_key if key not in registered_packages]
+            if skipped_keys:
+                logger.info(f"Packages already registered: {[name for name, _ in skipped_keys]}")
+                stmt = select(ORMPackage).where(ORMPackage.name.in_([name for name, _ in skipped_keys]))
+                result: Result[tuple[ORMPackage]] = await session.execute(stmt)
+                existing_packages = [
+                    orm_package
+                    for orm_package in result.scalars().all()
+                    if (orm_package.name, orm_package.package_type) in outlines_by_key
+                ]
+                for package in await self._with_computes(session, existing_packages):
+                    registered_packages[(package.name, PackageTypeDB.from_package_type(package.package_type))] = package
+            return [registered_packages[key] for key in outlines_by_key if key in registered_packages]
+
     async def list_simulator_packages(self, simulator_id: int) -> list[RegisteredPackage]:
         async with self.async_session_maker() as session:
             stmt = (
                 select(ORMPackage)
                 .join(ORMSimulatorToPackage, onclause=ORMSimulatorToPackage.package_id == ORMPackage.id)
                 .where(ORMSimulatorToPackage.simulator_id == simulator_id)
+                .order_by(ORMPackage.id)
             )
-
             result: Result[tuple[ORMPackage]] = await session.execute(stmt)
-            orm_packages = result.scalars().all()
-            packages: list[RegisteredPackage] = []
-            for row in orm_packages:
-                processes, steps = await self._list_computes_in_package(row.id)
-                packages.append(row.to_bigraph_package(processes=processes, steps=steps))
-
-            return packages
+            return await self._with_computes(session, result.scalars().all())
 
     async def list_all_computes_in_package(self, package_id: int) -> tuple[list[BiGraphProcess], list[BiGraphStep]]:
         return await self._list_computes_in_package(package_id=package_id)
@@ -163,20 +231,47 @@ class PackageORMExecutor(PackageDatabaseService):
 
     async def _list_computes_in_package(self, package_id: int) -> tuple[list[BiGraphProcess], list[BiGraphStep]]:
         async with self.async_session_maker() as session:
-            stmt = select(ORMBiGraphCompute).where(ORMBiGraphCompute.package_ref == package_id)
+            computes_by_package = await self._get_computes_by_package(session, [package_id])
+            return computes_by_package.get(package_id, ([], []))
 
-            result: Result[tuple[ORMBiGraphCompute]] = await session.execute(stmt)
-            orm_computes = result.scalars().all()
+    @staticmethod
+    async def _get_computes_by_package(
+        session: AsyncSession, package_ids: Sequence[int]
+    ) -> dict[int, tuple[list[BiGraphProcess], list[BiGraphStep]]]:
+        """(processes, steps) of each of the packages, fetched in a single query."""
+        if not package_ids:
+            return {}
+        stmt = (
+            select(ORMBiGraphCompute)
+            .where(ORMBiGraphCompute.package_ref.in_(package_ids))
+            .order_by(ORMBiGraphCompute.id)
+        )
+        result: Result[tuple[ORMBiGraphCompute]] = await session.execute(stmt)
+        return PackageORMExecutor._group_computes(result.scalars().all())
 
-            processes = []
-            steps = []
-            for compute in orm_computes:
-                if compute.compute_type == BiGraphComputeTypeDB.PROCESS:
-                    processes.append(compute.to_bigraph_process())
-                elif compute.compute_type == BiGraphComputeTypeDB.STEP:
-                    steps.append(compute.to_bigraph_step())
+    @staticmethod
+    def _group_computes(
+        orm_computes: Sequence[ORMBiGraphCompute],
+    ) -> dict[int, tuple[list[BiGraphProcess], list[BiGraphStep]]]:
+        computes_by_package: dict[int, tuple[list[BiGraphProcess], list[BiGraphStep]]] = {}
+        for compute in orm_computes:
+            processes, steps = computes_by_package.setdefault(compute.package_ref, ([], []))
+            if compute.compute_type == BiGraphComputeTypeDB.PROCESS:
+                processes.append(compute.to_bigraph_process())
+            elif compute.compute_type == BiGraphComputeTypeDB.STEP:
+                steps.append(compute.to_bigraph_step())
+        return computes_by_package
 
-            return processes, steps
+    @staticmethod
+    async def _with_computes(session: AsyncSession, orm_packages: Sequence[ORMPackage]) -> list[RegisteredPackage]:
+        computes_by_package = await PackageORMExecutor._get_computes_by_package(
+            session, [orm_package.id for orm_package in orm_packages]
+        )
+        packages: list[RegisteredPackage] = []
+        for orm_package in orm_packages:
+            processes, steps = computes_by_package.get(orm_package.id, ([], []))
+            packages.append(orm_package.to_bigraph_package(processes=processes, steps=steps))
+        return packages
 
     @override
     async def list_all_computes(self, compute_type: BiGraphComputeType | None = None) -> Any:
@@ -244,17 +339,24 @@ class PackageORMExecutor(PackageDatabaseService):
     async def list_packages_from_dependencies(
         self, dependencies: ExperimentPrimaryDependencies
     ) -> list[RegisteredPackage]:
+        """Registered packages named by the dependencies, of any package type, in the order of the dependencies."""
+        names = [
+            dependency.get_name()
+            for dependency in dependencies.get_pypi_dependencies() + dependencies.get_conda_dependencies()
+        ]
+        if not names:
+            return []
         async with self.async_session_maker() as session:
-            packages: list[RegisteredPackage] = []
-            for package in dependencies.get_pypi_dependencies() + dependencies.get_conda_dependencies():
-                stmt = select(ORMPackage).where(ORMPackage.name.in_(package.get_name()))
-                result: Result[tuple[ORMPackage]] = await session.execute(stmt)
-                orm_packages = result.scalars().all()
-                for row in orm_packages:
-                    processes, steps = await self._list_computes_in_package(package_id=row.id)
-                    packages.append(row.to_bigraph_package(processes=processes, steps=steps))
-
-            return packages
+            stmt = select(ORMPackage).where(ORMPackage.name.in_(names)).order_by(ORMPackage.id)
+            result: Result[tuple[ORMPackage]] = await session.execute(stmt)
+            # names are only unique per package type, e.g. a pypi and a conda package may share one
+            orm_packages_by_name: dict[str, list[ORMPackage]] = {}
+            for orm_package in result.scalars().all():
+                orm_packages_by_name.setdefault(orm_package.name, []).append(orm_package)
+            orm_packages = [
+                orm_package for name in dict.fromkeys(names) for orm_package in orm_packages_by_name.get(name, [])
+            ]
+            return await self._with_computes(session, orm_packages)
 
     @override
     async def close(self) -> None:
@@ -1,12 +1,16 @@
+import datetime
 import logging
+import time
 from abc import ABC, abstractmethod
 
 from pbest.utils.input_types import ContainerizationFileRepr
-from sqlalchemy import Result, Row, and_, select
+from sqlalchemy import Result, Row, Select, and_, func, or_, select, true, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased
 from typing_extensions import override
 
-from compose_api.db.tables.hpc_tables import ORMHpcRun
+from compose_api.config import get_settings
+from compose_api.db.tables.hpc_tables import JobStatusDB, JobTypeDB, ORMHpcRun
 from compose_api.db.tables.simulator_tables import (
     ORMDownloadedContainers,
     ORMSimulation,
@@ -17,7 +21,7 @@ from compose_api.simulation.hpc_utils import get_singularity_hash, get_slurm_sim
 from compose_api.simulation.models import (
     ContainerEngine,
     DownloadedContainerImage,
-    HpcRun,
+    JobStatus,
     RegisteredPackage,
     RemoteContainerImage,
     Simulation,
@@ -45,6 +49,20 @@ class SimulatorDatabaseService(ABC):
     async def get_simulator(self, simulator_id: int) -> SimulatorVersion | None:
         pass
 
+    @abstractmethod
+    async def claim_provisioning(self, simulator_id: int, claim: str, lease_seconds: int) -> bool:
+        """
+        Claim provisioning (downloading or building) the container of a simulator, exclusive across every replica of
+        the api. The claim is committed right away, so no transaction stays open while the container is provisioned.
+        Claiming again with the same `claim` renews it; a claim not renewed within `lease_seconds` may be taken over.
+        Returns: False if another replica holds the claim
+        """
+        pass
+
+    @abstractmethod
+    async def release_provisioning(self, simulator_id: int, claim: str) -> None:
+        pass
+
     @abstractmethod
     async def get_downloaded_simulator(self, simulator_id: int) -> DownloadedContainerImage | None:
         pass
@@ -63,7 +81,11 @@ class SimulatorDatabaseService(ABC):
 
     @abstractmethod
     async def insert_simulation(
-        self, sim_request: SimulationRequest, experiment_id: str, simulator_version: SimulatorVersion
+        self,
+        sim_request: SimulationRequest,
+        experiment_id: str,
+        simulator_version: SimulatorVersion,
+        cache_key: str | None = None,
     ) -> Simulation:
         pass
 
@@ -71,6 +93,14 @@ class SimulatorDatabaseService(ABC):
     async def get_simulation(self, simulation_id: int) -> SubmittedSimulation | None:
         pass
 
+    @abstractmethod
+    async def get_cached_simulation(self, cache_key: str, max_age_seconds: int) -> SubmittedSimulation | None:
+        """
+        Most recent simulation with the given cache key (see get_simulation_cache_key) which was created at most
+        `max_age_seconds` ago on the database clock and completed successfully, or None if there is none.
+        """
+        pass
+
     @abstractmethod
     async def get_simulations_experiment_id(self, simulation_id: int) -> str:
         pass
@@ -84,7 +114,20 @@ class SimulatorDatabaseService(ABC):
         pass
 
     @abstractmethod
-    async def list_simulations(self) -> list[SubmittedSimulation]:
+    async def list_simulations(
+        self,
+        simulator_id: int | None = None,
+        status: JobStatus | None = None,
+        created_after: datetime.datetime | None = None,
+        created_before: datetime.datetime | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[SubmittedSimulation]:
+        """
+        Simulations ordered by id, each with its simulator and latest HpcRun, optionally filtered by simulator, status
+        of the latest HpcRun and creation time. Pages are fetched by passing the id of the last simulation of the
+        previous page as `after_id` (keyset pagination).
+        """
         pass
 
     @abstractmethod
@@ -92,19 +135,47 @@ class SimulatorDatabaseService(ABC):
         pass
 
 
-async def _get_hpc_run_from_correlation_id(session: AsyncSession, correlation_id: str) -> HpcRun | None:
-    stmt1 = select(ORMHpcRun).where(ORMHpcRun.correlation_id == correlation_id).limit(1)
-    result1: Result[tuple[ORMHpcRun]] = await session.execute(stmt1)
-    orm_hpc_job: ORMHpcRun | None = result1.scalars().one_or_none()
-    hpc_job: HpcRun | None = None if orm_hpc_job is None else orm_hpc_job.to_hpc_run()
-    return hpc_job
+def _select_simulations() -> tuple[Select[tuple[ORMSimulation, ORMSimulator, ORMHpcRun]], type[ORMHpcRun]]:
+    """
+    Simulations joined to their simulator and their latest simulation HpcRun (NULL if there is none), one query for
+    any number of simulations. The second element is the HpcRun entity of the statement, for filtering on it.
+    """
+    latest_hpcrun = (
+        select(ORMHpcRun)
+        .where(and_(ORMHpcRun.simulation_id == ORMSimulation.id, ORMHpcRun.job_type == JobTypeDB.SIMULATION))
+        .order_by(ORMHpcRun.id.desc())
+        .limit(1)
+        .lateral()
+    )
+    orm_latest_hpcrun = aliased(ORMHpcRun, latest_hpcrun)
+    stmt = (
+        select(ORMSimulation, ORMSimulator, orm_latest_hpcrun)
+        .join(ORMSimulator, onclause=ORMSimulation.simulator_id == ORMSimulator.id)
+        .outerjoin(orm_latest_hpcrun, onclause=true())
+    )
+    return stmt, orm_latest_hpcrun
+
+
+def _to_submitted_simulation(
+    orm_simulation: ORMSimulation, orm_simulator: ORMSimulator, orm_hpc_run: ORMHpcRun | None
+) -> SubmittedSimulation:
+    return SubmittedSimulation(
+        database_id=orm_simulation.id,
+        sim_content=SimulationResults(path_on_server=get_slurm_sim_experiment_dir(orm_simulation.experiment_id)),
+        simulator_version=orm_simulator.to_simulator_version(),
+        hpc_run=None if orm_hpc_run is None else orm_hpc_run.to_hpc_run(),
+    )
 
 
 class SimulatorORMExecutor(SimulatorDatabaseService):
     async_session_maker: async_sessionmaker[AsyncSession]
+    # simulator rows never change once inserted, so lookups by container def hash are served from memory, for at most
+    # `simulator_cache_ttl_seconds` in case another replica deleted the simulator: (simulator, monotonic expiry)
+    _simulators_by_def_hash: dict[str, tuple[SimulatorVersion, float]]
 
     def __init__(self, async_engine_session_maker: async_sessionmaker[AsyncSession]) -> None:
         self.async_session_maker = async_engine_session_maker
+        self._simulators_by_def_hash = {}
 
     @staticmethod
     async def _get_orm_simulator(session: AsyncSession, simulator_id: int) -> ORMSimulator | None:
@@ -172,7 +243,9 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
                     session.add(relationship)
 
             # Ensure the ORM object is inserted and has an ID
-            return new_orm_simulator.to_simulator_version()
+            simulator_version = new_orm_simulator.to_simulator_version()
+        self._memoize_simulator(singularity_hash, simulator_version)
+        return simulator_version.model_copy()
 
     async def insert_downloaded_simulator(self, remote_container_image: RemoteContainerImage) -> SimulatorVersion:
         async with self.async_session_maker() as session, session.begin():
@@ -219,15 +292,51 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
                 return None
             return orm_simulator.to_simulator_version()
 
+    @override
+    async def claim_provisioning(self, simulator_id: int, claim: str, lease_seconds: int) -> bool:
+        async with self.async_session_maker() as session, session.begin():
+            stmt = (
+                update(ORMSimulator)
+                .where(
+                    ORMSimulator.id == simulator_id,
+                    or_(
+                        ORMSimulator.provisioning_claim.is_(None),
+                        ORMSimulator.provisioning_claim == claim,
+                        ORMSimulator.provisioning_claimed_at < func.now() - datetime.timedelta(seconds=lease_seconds),
+                    ),
+                )
+                .values(provisioning_claim=claim, provisioning_claimed_at=func.now())
+                .returning(ORMSimulator.id)
+            )
+            return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+    @override
+    async def release_provisioning(self, simulator_id: int, claim: str) -> None:
+        async with self.async_session_maker() as session, session.begin():
+            await session.execute(
+                update(ORMSimulator)
+                .where(ORMSimulator.id == simulator_id, ORMSimulator.provisioning_claim == claim)
+                .values(provisioning_claim=None, provisioning_claimed_at=None)
+            )
+
     @override
     async def get_simulator_by_def_hash(self, singularity_def_hash: str) -> SimulatorVersion | None:
+        cached_simulator = self._simulators_by_def_hash.get(singularity_def_hash)
+        if cached_simulator is not None and time.monotonic() < cached_simulator[1]:
+            return cached_simulator[0].model_copy()
         async with self.async_session_maker() as session, session.begin():
             stmt1 = select(ORMSimulator).where(ORMSimulator.container_def_hash == singularity_def_hash).limit(1)
             result1: Result[tuple[ORMSimulator]] = await session.execute(stmt1)
             orm_simulator: ORMSimulator | None = result1.scalars().one_or_none()
             if orm_simulator is None:
                 return None
-            return orm_simulator.to_simulator_version()
+            simulator_version = orm_simulator.to_simulator_version()
+        self._memoize_simulator(singularity_def_hash, simulator_version)
+        return simulator_version.model_copy()
+
+    def _memoize_simulator(self, singularity_def_hash: str, simulator_version: SimulatorVersion) -> None:
+        expiry = time.monotonic() + get_settings().simulator_cache_ttl_seconds
+        self._simulators_by_def_hash[singularity_def_hash] = (simulator_version, expiry)
 
     @override
     async def delete_simulator(self, simulator_id: int) -> None:
@@ -248,6 +357,11 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
                 await session.delete(k)
             await session.flush()
             await session.delete(orm_simulator)
+        self._simulators_by_def_hash = {
+            def_hash: memoized
+            for def_hash, memoized in self._simulators_by_def_hash.items()
+            if memoized[0].database_id != simulator_id
+        }
 
     @override
     async def list_simulators(self) -> list[SimulatorVersion]:
@@ -263,10 +377,16 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
 
     @override
     async def insert_simulation(
-        self, sim_request: SimulationRequest, experiment_id: str, simulator_version: SimulatorVersion
+        self,
+        sim_request: SimulationRequest,
+        experiment_id: str,
+        simulator_version: SimulatorVersion,
+        cache_key: str | None = None,
     ) -> Simulation:
         async with self.async_session_maker() as session, session.begin():
-            orm_simulation = ORMSimulation(experiment_id=experiment_id, simulator_id=simulator_version.database_id)
+            orm_simulation = ORMSimulation(
+                experiment_id=experiment_id, simulator_id=simulator_version.database_id, cache_key=cache_key
+            )
             session.add(orm_simulation)
             await session.flush()  # Ensure the ORM object is inserted and has an ID
 
@@ -278,25 +398,38 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
     @override
     async def get_simulation(self, simulation_id: int) -> SubmittedSimulation | None:
         async with self.async_session_maker() as session:
-            orm_simulation: ORMSimulation | None = await self._get_orm_simulation(session, simulation_id)
-            if orm_simulation is None:
+            stmt, _ = _select_simulations()
+            result: Result[tuple[ORMSimulation, ORMSimulator, ORMHpcRun]] = await session.execute(
+                stmt.where(ORMSimulation.id == simulation_id)
+            )
+            row = result.one_or_none()
+            if row is None:
                 return None
-            orm_simulator: ORMSimulator | None = await self._get_orm_simulator(session, orm_simulation.simulator_id)
-            if orm_simulator is None:
-                raise Exception(
-                    f"Simulation with id {simulation_id} does not have a simulator with id {orm_simulation.simulator_id}"  # noqa: E501
-                )
+            return _to_submitted_simulation(*row.t)
 
-            hpc_run = await _get_hpc_run_from_correlation_id(session, orm_simulation.experiment_id)
-            simulation = SubmittedSimulation(
-                database_id=orm_simulation.id,
-                sim_content=SimulationResults(
-                    path_on_server=get_slurm_sim_experiment_dir(orm_simulation.experiment_id)
-                ),
-                simulator_version=orm_simulator.to_simulator_version(),
-                hpc_run=hpc_run,
+    @override
+    async def get_cached_simulation(self, cache_key: str, max_age_seconds: int) -> SubmittedSimulation | None:
+        async with self.async_session_maker() as session:
+            stmt = (
+                select(ORMSimulation, ORMSimulator, ORMHpcRun)
+                .join(ORMSimulator, onclause=ORMSimulation.simulator_id == ORMSimulator.id)
+                .join(ORMHpcRun, onclause=ORMHpcRun.simulation_id == ORMSimulation.id)
+                .where(
+                    and_(
+                        ORMSimulation.cache_key == cache_key,
+                        ORMSimulation.created_at >= func.now() - datetime.timedelta(seconds=max_age_seconds),
+                        ORMHpcRun.job_type == JobTypeDB.SIMULATION,
+                        ORMHpcRun.status == JobStatusDB.COMPLETED,
+                    )
+                )
+                .order_by(ORMSimulation.created_at.desc())
+                .limit(1)
             )
-            return simulation
+            result: Result[tuple[ORMSimulation, ORMSimulator, ORMHpcRun]] = await session.execute(stmt)
+            row = result.first()
+            if row is None:
+                return None
+            return _to_submitted_simulation(*row.t)
 
     @override
     async def get_simulations_experiment_id(self, simulation_id: int) -> str:
@@ -308,11 +441,36 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
 
     @override
     async def list_simulations_that_use_simulator(self, simulator_id: int) -> list[SubmittedSimulation]:
-        return await self._list_simulations(simulator_id)
+        return await self.list_simulations(simulator_id=simulator_id)
 
     @override
-    async def list_simulations(self) -> list[SubmittedSimulation]:
-        return await self._list_simulations()
+    async def list_simulations(
+        self,
+        simulator_id: int | None = None,
+        status: JobStatus | None = None,
+        created_after: datetime.datetime | None = None,
+        created_before: datetime.datetime | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[SubmittedSimulation]:
+        stmt, orm_latest_hpcrun = _select_simulations()
+        conditions = []
+        if simulator_id is not None:
+            conditions.append(ORMSimulation.simulator_id == simulator_id)
+        if status is not None:
+            conditions.append(orm_latest_hpcrun.status == JobStatusDB(status.value))
+        if created_after is not None:
+            conditions.append(ORMSimulation.created_at >= created_after)
+        if created_before is not None:
+            conditions.append(ORMSimulation.created_at < created_before)
+        if after_id is not None:
+            conditions.append(ORMSimulation.id > after_id)
+        stmt = stmt.where(*conditions).order_by(ORMSimulation.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        async with self.async_session_maker() as session:
+            result: Result[tuple[ORMSimulation, ORMSimulator, ORMHpcRun]] = await session.execute(stmt)
+            return [_to_submitted_simulation(*row.t) for row in result]
 
     @override
     async def delete_simulation(self, simulation_id: int) -> None:
@@ -322,38 +480,6 @@ class SimulatorORMExecutor(SimulatorDatabaseService):
                 raise Exception(f"Simulation with id {simulation_id} not found in the database")
             await session.delete(orm_simulation)
 
-    async def _list_simulations(self, simulator_id: int | None = None) -> list[SubmittedSimulation]:
-        async with self.async_session_maker() as session:
-            if simulator_id is None:
-                stmt = select(ORMSimulation, ORMSimulator).join(
-                    ORMSimulator, onclause=ORMSimulation.simulator_id == ORMSimulator.id
-                )
-            else:
-                stmt = (
-                    select(ORMSimulation, ORMSimulator)
-                    .join(ORMSimulator, onclause=ORMSimulation.simulator_id == ORMSimulator.id)
-                    .where(ORMSimulator.id == simulator_id)
-                )
-            result: Result[tuple[ORMSimulation, ORMSimulator]] = await session.execute(stmt)
-            orm_simulations = result.fetchall()
-
-            simulations: list[SubmittedSimulation] = []
-            for row in orm_simulations:
-                orm_simulation, orm_simulator = row.t
-                sim_request = SimulationResults(
-                    path_on_server=get_slurm_sim_experiment_dir(orm_simulation.experiment_id)
-                )
-                hpc_run = await _get_hpc_run_from_correlation_id(session, orm_simulation.experiment_id)
-                simulation = SubmittedSimulation(
-                    database_id=orm_simulation.id,
-                    sim_content=sim_request,
-                    simulator_version=orm_simulator.to_simulator_version(),
-                    hpc_run=hpc_run,
-                )
-                simulations.append(simulation)
-
-            return simulations
-
     @override
     async def close(self) -> None:
         pass
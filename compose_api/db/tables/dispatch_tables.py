@@ -0,0 +1,52 @@
+import datetime
+import enum
+import logging
+from typing import Any, Optional
+
+from sqlalchemy import Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from compose_api.db.db_utils import DeclarativeTableBase
+from compose_api.simulation.models import DispatchJob, DispatchStatus, SimulationDispatch
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchStatusDB(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def to_dispatch_status(self) -> DispatchStatus:
+        return DispatchStatus(self.value)
+
+
+# enum columns store member names, see ACTIVE_HPCRUN_PREDICATE
+CLAIMABLE_DISPATCH_JOB_PREDICATE = "status IN ('PENDING', 'RUNNING')"
+
+
+class ORMDispatchJob(DeclarativeTableBase):
+    __tablename__ = "dispatch_job"
+    __table_args__ = (
+        Index("ix_dispatch_job_claimable", "id", postgresql_where=text(CLAIMABLE_DISPATCH_JOB_PREDICATE)),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)  # SimulationDispatch
+    status: Mapped[DispatchStatusDB] = mapped_column(nullable=False)
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    next_attempt_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())  # retry backoff
+    locked_at: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)  # when a worker claimed it
+    last_error: Mapped[Optional[str]] = mapped_column(nullable=True)
+
+    def to_dispatch_job(self) -> DispatchJob:
+        return DispatchJob(
+            database_id=self.id,
+            dispatch=SimulationDispatch.model_validate(self.payload),
+            status=self.status.to_dispatch_status(),
+            attempts=self.attempts,
+            last_error=self.last_error,
+        )
@@ -1,14 +1,16 @@
 import datetime
 import enum
 import logging
+import re
 from typing import Optional
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, func, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from compose_api.db.db_utils import DeclarativeTableBase
 from compose_api.simulation.models import (
+    TERMINAL_JOB_STATUSES,
     HpcRun,
     JobStatus,
     JobType,
@@ -35,6 +37,12 @@ class JobStatusDB(enum.Enum):
         return JobStatus(self.value)
 
 
+# enum columns store member names; the same literal predicate is used by the partial index and the active job query
+# so that the planner can match them
+_TERMINAL_STATUS_NAMES = ", ".join(sorted(f"'{JobStatusDB(status.value).name}'" for status in TERMINAL_JOB_STATUSES))
+ACTIVE_HPCRUN_PREDICATE = f"status NOT IN ({_TERMINAL_STATUS_NAMES})"
+
+
 class JobTypeDB(enum.Enum):
     SIMULATION = "simulation"
     BUILD_CONTAINER = "build_container"
@@ -49,6 +57,7 @@ class JobTypeDB(enum.Enum):
 
 class ORMHpcRun(DeclarativeTableBase):
     __tablename__ = "hpcrun"
+    __table_args__ = (Index("ix_hpcrun_active_status", "status", postgresql_where=text(ACTIVE_HPCRUN_PREDICATE)),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
@@ -56,6 +65,8 @@ class ORMHpcRun(DeclarativeTableBase):
     job_type: Mapped[JobTypeDB] = mapped_column(nullable=False)
     correlation_id: Mapped[str] = mapped_column(nullable=False, index=True, unique=True)
     slurmjobid: Mapped[int] = mapped_column(nullable=True)
+    slurm_array_task_id: Mapped[Optional[int]] = mapped_column(nullable=True)  # set for tasks of a job array
+    packed_task_id: Mapped[Optional[int]] = mapped_column(nullable=True)  # set for tasks of a packed batch job
     start_time: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)
     end_time: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)
     status: Mapped[JobStatusDB] = mapped_column(nullable=False)
@@ -70,6 +81,8 @@ class ORMHpcRun(DeclarativeTableBase):
         return HpcRun(
             database_id=self.id,
             slurmjobid=self.slurmjobid,
+            slurm_array_task_id=self.slurm_array_task_id,
+            packed_task_id=self.packed_task_id,
             correlation_id=self.correlation_id,
             job_type=self.job_type.to_job_type(),
             sim_id=self.simulation_id,
@@ -81,19 +94,35 @@ class ORMHpcRun(DeclarativeTableBase):
         )
 
 
+# worker_event is range partitioned by created_at into daily partitions, created ahead of time and dropped once they
+# expire (see WorkerEventMaintenance). There is no default partition: creating a partition would have to scan it, and
+# a partition can only be detached concurrently from a table without one.
+WORKER_EVENT_PARTITION_PATTERN = re.compile(r"worker_event_p(\d{8})")
+
+
+def worker_event_partition_name(day: datetime.date) -> str:
+    return f"worker_event_p{day:%Y%m%d}"
+
+
 class ORMWorkerEvent(DeclarativeTableBase):
     __tablename__ = "worker_event"
+    __table_args__ = (
+        # list_worker_events reads the events of one HpcRun in sequence_number order
+        Index("ix_worker_event_hpcrun_id_sequence_number", "hpcrun_id", "sequence_number"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True)
-    created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
+    # the primary key of a partitioned table must include the partition key
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime.datetime] = mapped_column(primary_key=True, server_default=func.now())
 
     correlation_id: Mapped[str] = mapped_column(
         ForeignKey(f"{ORMHpcRun.__tablename__}.correlation_id", ondelete="CASCADE")
     )
-    sequence_number: Mapped[int] = mapped_column(nullable=False, index=True)
+    sequence_number: Mapped[int] = mapped_column(nullable=False)
     mass: Mapped[dict[str, float]] = mapped_column(JSONB, nullable=False)
     time: Mapped[float] = mapped_column(nullable=True)
-    hpcrun_id: Mapped[int] = mapped_column(ForeignKey("hpcrun.id", ondelete="CASCADE"), nullable=False, index=True)
+    hpcrun_id: Mapped[int] = mapped_column(ForeignKey("hpcrun.id", ondelete="CASCADE"), nullable=False)
 
     @classmethod
     def from_worker_event(cls, worker_event: "WorkerEvent", hpcrun_id: int) -> "ORMWorkerEvent":
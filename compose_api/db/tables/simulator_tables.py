@@ -1,5 +1,6 @@
 import datetime
 import logging
+from typing import Optional
 
 from pbest.utils.input_types import ContainerizationEngine, ContainerizationFileRepr
 from sqlalchemy import ForeignKey, func
@@ -43,6 +44,9 @@ class ORMSimulator(DeclarativeTableBase):
     container_def: Mapped[str] = mapped_column(nullable=False)
     container_def_hash: Mapped[str] = mapped_column(nullable=False)
     container_engine: Mapped[ContainerEngine] = mapped_column(nullable=False)
+    # replica currently downloading or building the container, see SimulatorDatabaseService.claim_provisioning
+    provisioning_claim: Mapped[Optional[str]] = mapped_column(nullable=True)
+    provisioning_claimed_at: Mapped[Optional[datetime.datetime]] = mapped_column(nullable=True)
 
     def to_simulator_version(self) -> SimulatorVersion:
         return SimulatorVersion(
@@ -74,3 +78,4 @@ class ORMSimulation(DeclarativeTableBase):
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
     experiment_id: Mapped[str] = mapped_column(nullable=False, unique=True)
     simulator_id: Mapped[int] = mapped_column(ForeignKey("simulator.id"), nullable=False, index=True)
+    cache_key: Mapped[Optional[str]] = mapped_column(nullable=True, index=True)  # see get_simulation_cache_key
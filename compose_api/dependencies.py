@@ -1,5 +1,4 @@
 import logging
-from pathlib import Path
 from typing import Any
 
 import nats
@@ -8,13 +7,14 @@ from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from compose_api.common.gateway.models import Namespace
 from compose_api.common.hpc.slurm_service import SlurmService
-from compose_api.common.ssh.ssh_service import SSHService
+from compose_api.common.ssh.ssh_service import get_ssh_service, set_ssh_service
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseService, DatabaseServiceSQL
 from compose_api.db.db_utils import create_db
 from compose_api.log_config import setup_logging
 from compose_api.simulation.data_service import DataService, DataServiceHpc
-from compose_api.simulation.job_monitor import JobMonitor
+from compose_api.simulation.job_monitor import JobMonitor, log_nats_error
+from compose_api.simulation.results_ingestion import ResultsIngestor
 from tests.fixtures.mocks import TestDataService
 
 logger = logging.getLogger(__name__)
@@ -104,6 +104,64 @@ def get_required_job_monitor() -> JobMonitor:
     return global_job_monitor
 
 
+# ------ dispatch queue (standalone or pytest) ----------------
+
+from compose_api.simulation.dispatch_queue import DispatchQueue  # noqa: E402
+
+global_dispatch_queue: DispatchQueue | None = None
+
+
+def set_dispatch_queue(dispatch_queue: DispatchQueue | None) -> None:
+    global global_dispatch_queue
+    global_dispatch_queue = dispatch_queue
+
+
+def get_dispatch_queue() -> DispatchQueue | None:
+    global global_dispatch_queue
+    return global_dispatch_queue
+
+
+def get_required_dispatch_queue() -> DispatchQueue:
+    global global_dispatch_queue
+    if global_dispatch_queue is None:
+        raise ValueError("Dispatch queue is not initialized")
+    return global_dispatch_queue
+
+
+# ------ worker event maintenance (standalone or pytest) ------
+
+from compose_api.simulation.worker_event_maintenance import WorkerEventMaintenance  # noqa: E402
+
+global_worker_event_maintenance: WorkerEventMaintenance | None = None
+
+
+def set_worker_event_maintenance(worker_event_maintenance: WorkerEventMaintenance | None) -> None:
+    global global_worker_event_maintenance
+    global_worker_event_maintenance = worker_event_maintenance
+
+
+def get_worker_event_maintenance() -> WorkerEventMaintenance | None:
+    global global_worker_event_maintenance
+    return global_worker_event_maintenance
+
+
+# ------ staged upload sweeper (standalone or pytest) ------
+
+from compose_api.simulation.staged_upload_sweeper import StagedUploadSweeper  # noqa: E402
+
+global_staged_upload_sweeper: StagedUploadSweeper | None = None
+
+
+def set_staged_upload_sweeper(staged_upload_sweeper: StagedUploadSweeper | None) -> None:
+    global global_staged_upload_sweeper
+    global_staged_upload_sweeper = staged_upload_sweeper
+
+
+def get_staged_upload_sweeper() -> StagedUploadSweeper | None:
+    global global_staged_upload_sweeper
+    return global_staged_upload_sweeper
+
+
 # ------ data service (standalone or pytest) ------------------
 
 global_data_service: DataService | None = None
@@ -119,6 +177,21 @@ def get_data_service() -> DataService | None:
     return global_data_service
 
 
+# ------ results ingestor (standalone or pytest) ------------
+
+global_results_ingestor: ResultsIngestor | None = None
+
+
+def set_results_ingestor(results_ingestor: ResultsIngestor | None) -> None:
+    global global_results_ingestor
+    global_results_ingestor = results_ingestor
+
+
+def get_results_ingestor() -> ResultsIngestor | None:
+    global global_results_ingestor
+    return global_results_ingestor
+
+
 # ------ initialized standalone application (standalone) ------
 
 
@@ -133,10 +206,12 @@ async def init_standalone(enable_ssl: bool = True) -> None:
 
     # set services that don't require params (currently using hpc)
     set_simulation_service(SimulationServiceHpc())
+    data_service: DataService
     if _settings.namespace == Namespace.DEVELOPMENT or _settings.namespace == Namespace.TEST:
-        set_data_service(TestDataService())
+        data_service = TestDataService()
     else:
-        set_data_service(DataServiceHpc())
+        data_service = DataServiceHpc()
+    set_data_service(data_service)
 
     PG_USER = _settings.postgres_user
     PG_PSWD = _settings.postgres_password
@@ -171,25 +246,57 @@ async def init_standalone(enable_ssl: bool = True) -> None:
     database = DatabaseServiceSQL(engine)
     set_database_service(database)
 
-    settings = get_settings()
-    ssh_service = SSHService(
-        hostname=settings.slurm_submit_host,
-        username=settings.slurm_submit_user,
-        key_path=Path(settings.slurm_submit_key_path),
-        known_hosts=Path(settings.slurm_submit_known_hosts) if settings.slurm_submit_known_hosts else None,
-    )
-    slurm_service = SlurmService(ssh_service=ssh_service)
+    slurm_service = SlurmService(ssh_service=get_ssh_service())
 
-    nats_client = await nats.connect(_settings.nats_url) if get_settings().hpc_has_messaging else None
-    job_monitor = JobMonitor(nats_client=nats_client, database_service=database, slurm_service=slurm_service)
+    nats_client = (
+        await nats.connect(_settings.nats_url, error_cb=log_nats_error) if get_settings().hpc_has_messaging else None
+    )
+    # results are ingested on the first query anyway, the job monitor only does it ahead of time
+    results_ingestor = ResultsIngestor(data_service=data_service, database_service=database)
+    set_results_ingestor(results_ingestor)
+    job_monitor = JobMonitor(
+        nats_client=nats_client,
+        database_service=database,
+        slurm_service=slurm_service,
+        results_ingestor=results_ingestor if _settings.results_ingest_parquet else None,
+    )
     set_job_monitor(job_monitor)
 
+    set_dispatch_queue(
+        DispatchQueue(
+            database_service=database, simulation_service=get_required_simulation_service(), job_monitor=job_monitor
+        )
+    )
+    set_worker_event_maintenance(WorkerEventMaintenance(database_service=database))
+    set_staged_upload_sweeper(StagedUploadSweeper(simulation_service=get_required_simulation_service()))
+
 
 async def shutdown_standalone() -> None:
+    dispatch_queue = get_dispatch_queue()
+    if dispatch_queue:
+        await dispatch_queue.close()
+        set_dispatch_queue(None)
+
     mongodb_service = get_database_service()
     if mongodb_service:
         await mongodb_service.close()
 
+    worker_event_maintenance = get_worker_event_maintenance()
+    if worker_event_maintenance:
+        await worker_event_maintenance.close()
+        set_worker_event_maintenance(None)
+
+    staged_upload_sweeper = get_staged_upload_sweeper()
+    if staged_upload_sweeper:
+        await staged_upload_sweeper.close()
+        set_staged_upload_sweeper(None)
+
+    # before the engine is disposed, closing writes the buffered worker events
+    job_monitor = get_job_monitor()
+    if job_monitor:
+        await job_monitor.close()
+        set_job_monitor(None)
+
     engine = get_postgres_engine()
     if engine:
         await engine.dispose()
@@ -198,10 +305,13 @@ async def shutdown_standalone() -> None:
     set_database_service(None)
     set_data_service(None)
 
-    job_monitor = get_job_monitor()
-    if job_monitor:
-        await job_monitor.close()
-        set_job_monitor(None)
+    results_ingestor = get_results_ingestor()
+    if results_ingestor:
+        await results_ingestor.close()
+        set_results_ingestor(None)
+
+    await get_ssh_service().close()
+    set_ssh_service(None)
 
 
 def verify_service(service: DatabaseService | DataService | SimulationService | None) -> None:
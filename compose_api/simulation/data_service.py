@@ -1,6 +1,10 @@
+import asyncio
 import logging
+import os
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from pathlib import Path
+from typing import BinaryIO
 
 import numpy
 from pydantic import BaseModel
@@ -8,7 +12,7 @@ from typing_extensions import override
 
 from compose_api.common.gateway.models import Namespace
 from compose_api.common.ssh.ssh_service import SSHService, get_ssh_service
-from compose_api.config import Settings, get_settings
+from compose_api.config import Settings, get_local_cache_dir, get_settings
 from compose_api.simulation.hpc_utils import get_internal_experiment_dir
 
 logger = logging.getLogger(__name__)
@@ -17,6 +21,16 @@ logger.setLevel(logging.INFO)
 assets_dir = Path(get_settings().assets_dir)
 
 
+class ResultsFileInfo(BaseModel):
+    size: int
+    mtime: int  # epoch seconds
+
+    @property
+    def etag(self) -> str:
+        # results.zip is written once when the simulation completes, size and mtime identify its content
+        return f'"{self.size:x}-{self.mtime:x}"'
+
+
 class DataService(ABC):
     settings: Settings
 
@@ -28,24 +42,76 @@ class DataService(ABC):
         return get_ssh_service()
 
     @abstractmethod
-    async def get_results_zip(self, experiment_id: str, namespace: Namespace) -> Path:
+    async def get_results_file_info(self, experiment_id: str, namespace: Namespace) -> ResultsFileInfo:
+        """:raises FileNotFoundError: if the simulation has no results (yet)"""
+        pass
+
+    @abstractmethod
+    def stream_results(self, experiment_id: str, namespace: Namespace, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes [start, end) of the results zip, read in chunks of settings.results_chunk_size_bytes."""
         pass
 
+    async def download_results(self, experiment_id: str, namespace: Namespace, destination: Path, size: int) -> None:
+        with open(destination, "wb") as destination_file:
+            async for chunk in self.stream_results(experiment_id, namespace, start=0, end=size):
+                await asyncio.to_thread(destination_file.write, chunk)
+
+    def get_columnar_results_dir(self, experiment_id: str, namespace: Namespace) -> Path:
+        """Directory of the Parquet dataset ingested from the results zip, see results_ingestion.ResultsIngestor."""
+        return get_local_cache_dir() / "columnar" / namespace.value / experiment_id
+
     @abstractmethod
     async def close(self) -> None:
         pass
 
 
 class DataServiceHpc(DataService):
-    @override
-    async def get_results_zip(self, experiment_id: str, namespace: Namespace) -> Path:
+    """Reads results from the cluster file system mounted into the pod."""
+
+    @staticmethod
+    def _get_results_zip(experiment_id: str, namespace: Namespace) -> Path:
         return Path(f"{get_internal_experiment_dir(experiment_id=experiment_id, namespace=namespace)}/results.zip")
 
+    @override
+    def get_columnar_results_dir(self, experiment_id: str, namespace: Namespace) -> Path:
+        # next to results.zip, so that every replica reads the same dataset
+        return get_internal_experiment_dir(experiment_id=experiment_id, namespace=namespace) / "results_parquet"
+
+    @override
+    async def get_results_file_info(self, experiment_id: str, namespace: Namespace) -> ResultsFileInfo:
+        stat = await asyncio.to_thread(os.stat, self._get_results_zip(experiment_id, namespace))
+        return ResultsFileInfo(size=stat.st_size, mtime=int(stat.st_mtime))
+
+    @override
+    async def stream_results(
+        self, experiment_id: str, namespace: Namespace, start: int, end: int
+    ) -> AsyncIterator[bytes]:
+        results_file = await asyncio.to_thread(open, self._get_results_zip(experiment_id, namespace), "rb")
+        async for chunk in stream_file(
+            results_file, start=start, end=end, chunk_size=self.settings.results_chunk_size_bytes
+        ):
+            yield chunk
+
     @override
     async def close(self) -> None:
         pass
 
 
+async def stream_file(file: BinaryIO, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+    """Bytes [start, end) of an open local file, read in a worker thread. Closes the file when done."""
+    try:
+        await asyncio.to_thread(file.seek, start)
+        position = start
+        while position < end:
+            chunk = await asyncio.to_thread(file.read, min(chunk_size, end - position))
+            if not chunk:
+                raise RuntimeError(f"{file.name} ended at byte {position}, expected {end}")
+            position += len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(file.close)
+
+
 class PackedArray(BaseModel):
     shape: tuple[int, int]
     values: list[float]
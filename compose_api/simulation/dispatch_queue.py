@@ -0,0 +1,146 @@
+import asyncio
+import logging
+
+from compose_api.config import get_settings
+from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.job_monitor import JobMonitor
+from compose_api.simulation.models import DispatchJob, SimulationDispatch
+from compose_api.simulation.poll_scheduler import wait_any
+from compose_api.simulation.simulation_service import SimulationService
+
+logger = logging.getLogger(__name__)
+
+
+class DispatchQueue:
+    """
+    Durable queue of Slurm submissions, backed by the dispatch_job table.
+
+    Request handlers enqueue a SimulationDispatch and return; a pool of `dispatch_workers` workers per replica claims
+    jobs (SELECT ... FOR UPDATE SKIP LOCKED) and submits them. A failed submission is retried with exponential backoff
+    up to `dispatch_max_attempts` times, and a job whose worker disappeared (pod restart) is claimed again once its
+    lease of `dispatch_lease_seconds` expires, so accepted work is never silently dropped.
+    """
+
+    database_service: DatabaseService
+    simulation_service: SimulationService
+    job_monitor: JobMonitor
+    _workers: list[asyncio.Task[None]]
+    _wake_event: asyncio.Event
+    _stop_event: asyncio.Event
+
+    def __init__(
+        self, database_service: DatabaseService, simulation_service: SimulationService, job_monitor: JobMonitor
+    ) -> None:
+        self.database_service = database_service
+        self.simulation_service = simulation_service
+        self.job_monitor = job_monitor
+        self._workers = []
+        self._wake_event = asyncio.Event()
+        self._stop_event = asyncio.Event()
+
+    async def enqueue(self, dispatch: SimulationDispatch) -> DispatchJob:
+        dispatch_job = await self.database_service.get_dispatch_db().enqueue(dispatch)
+        self.notify()
+        return dispatch_job
+
+    def notify(self) -> None:
+        """Wake an idle worker, jobs enqueued by other replicas are found by polling instead."""
+        self._wake_event.set()
+
+    async def start(self, workers: int | None = None) -> None:
+        if self._workers:
+            logger.warning("Dispatch workers already running.")
+            return
+        worker_count = workers if workers is not None else get_settings().dispatch_workers
+        self._stop_event.clear()
+        self._workers = [asyncio.create_task(self._worker_loop(worker_id=i)) for i in range(worker_count)]
+        logger.info(f"Started {worker_count} dispatch workers.")
+
+    async def close(self) -> None:
+        self._stop_event.set()
+        workers, self._workers = self._workers, []
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+            logger.info("Stopped dispatch workers.")
+
+    async def run_pending(self) -> int:
+        """Process due jobs in the calling task until none is left (used by tests and scripts without workers)."""
+        processed = 0
+        while await self._claim_and_process():
+            processed += 1
+        return processed
+
+    async def _worker_loop(self, worker_id: int) -> None:
+        poll_interval = get_settings().dispatch_poll_interval_seconds
+        while not self._stop_event.is_set():
+            try:
+                if await self._claim_and_process():
+                    continue
+            except Exception:
+                logger.exception(f"Dispatch worker {worker_id} failed to claim a job")
+            await wait_any(events=[self._wake_event, self._stop_event], timeout=poll_interval)
+            self._wake_event.clear()
+
+    async def _claim_and_process(self) -> bool:
+        settings = get_settings()
+        dispatch_db = self.database_service.get_dispatch_db()
+        dispatch_job = await dispatch_db.claim_next(lease_seconds=settings.dispatch_lease_seconds)
+        if dispatch_job is None:
+            return False
+        heartbeat = asyncio.create_task(self._renew_lease(dispatch_job, interval=settings.dispatch_lease_seconds / 3))
+        try:
+            await self._process(dispatch_job)
+        except Exception as e:
+            if dispatch_job.attempts >= settings.dispatch_max_attempts:
+                logger.exception(f"Dispatch job {dispatch_job.database_id} failed {dispatch_job.attempts} times")
+                retry_in_seconds = None
+            else:
+                retry_in_seconds = settings.dispatch_retry_backoff_seconds * 2 ** (dispatch_job.attempts - 1)
+                logger.warning(
+                    f"Dispatch job {dispatch_job.database_id} failed (attempt {dispatch_job.attempts}), "
+                    f"retrying in {retry_in_seconds:.0f}s: {e!s}"
+                )
+            recorded = await dispatch_db.fail(
+                dispatch_job.database_id,
+                attempt=dispatch_job.attempts,
+                error=str(e),
+                retry_in_seconds=retry_in_seconds,
+            )
+            if recorded and retry_in_seconds is None:
+                # nothing submits these inputs anymore
+                await self.simulation_service.discard_staged_inputs([
+                    simulation.sim_request for simulation in dispatch_job.dispatch.simulations
+                ])
+        else:
+            recorded = await dispatch_db.complete(dispatch_job.database_id, attempt=dispatch_job.attempts)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        if not recorded:
+            logger.warning(
+                f"Dispatch job {dispatch_job.database_id} was claimed again while attempt {dispatch_job.attempts} "
+                "ran, leaving its outcome to the new claim"
+            )
+        return True
+
+    async def _renew_lease(self, dispatch_job: DispatchJob, interval: float) -> None:
+        """Keep the claim alive while the job is processed, e.g. through a slow container download."""
+        dispatch_db = self.database_service.get_dispatch_db()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await dispatch_db.renew_lease(dispatch_job.database_id, attempt=dispatch_job.attempts):
+                    logger.warning(f"Lost the claim on dispatch job {dispatch_job.database_id}")
+                    return
+            except Exception:
+                logger.exception(f"Failed to renew the lease of dispatch job {dispatch_job.database_id}")
+
+    async def _process(self, dispatch_job: DispatchJob) -> None:
+        from compose_api.simulation.handlers import dispatch_simulations
+
+        await dispatch_simulations(
+            dispatch=dispatch_job.dispatch,
+            database_service=self.database_service,
+            simulation_service_slurm=self.simulation_service,
+            job_monitor=self.job_monitor,
+        )
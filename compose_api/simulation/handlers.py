@@ -1,30 +1,40 @@
 import asyncio
 import logging
 import random
-import shutil
 import string
 import tempfile
+import time
+import uuid
 import zipfile
 from pathlib import Path
 
-from fastapi import BackgroundTasks, HTTPException
+from fastapi import HTTPException
 from pbest.containerization.container_constructor import _default_registry_deps, generate_container_def_file
 from pbest.utils.input_types import (
     ContainerizationEngine,
+    ContainerizationFileRepr,
 )
 
 from compose_api.common.gateway.utils import allow_list
+from compose_api.common.hpc.slurm_service import SlurmService
+from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseService
-from compose_api.db.services.hpc_db import HPCDatabaseService
+from compose_api.db.services.simulators_db import SimulatorDatabaseService
 from compose_api.dependencies import (
     get_database_service,
     get_required_database_service,
-    get_required_job_monitor,
-    get_required_simulation_service,
+    get_required_dispatch_queue,
+)
+from compose_api.simulation.dispatch_queue import DispatchQueue
+from compose_api.simulation.hpc_utils import (
+    get_correlation_id,
+    get_experiment_id,
+    get_simulation_cache_key,
+    get_singularity_hash,
 )
-from compose_api.simulation.hpc_utils import get_correlation_id, get_experiment_id, get_singularity_hash
 from compose_api.simulation.job_monitor import JobMonitor
 from compose_api.simulation.models import (
+    DispatchedSimulation,
     HpcRun,
     JobStatus,
     JobType,
@@ -32,6 +42,7 @@ from compose_api.simulation.models import (
     RegisteredSimulators,
     RemoteContainerImage,
     Simulation,
+    SimulationDispatch,
     SimulationExperiment,
     SimulationFileType,
     SimulationRequest,
@@ -61,59 +72,162 @@ async def get_simulator_versions() -> RegisteredSimulators:
 async def run_simulation(
     simulation_request: SimulationRequest,
     database_service: DatabaseService,
-    simulation_service_slurm: SimulationService,
-    job_monitor: JobMonitor,
+    dispatch_queue: DispatchQueue,
     pb_allow_list: PBAllowList,
-    background_tasks: BackgroundTasks,
+    use_cache: bool = True,
 ) -> SimulationExperiment:
-    with tempfile.TemporaryDirectory(delete=False) as tmp_dir:
-        singularity_rep = generate_container_def_file(_default_registry_deps(), ContainerizationEngine.APPTAINER)
-        # simulation_request.omex_archive = Path(tmp_dir + f"/{os.path.basename(simulation_request.omex_archive.name)}")
-
-    simulator_db = database_service.get_simulator_db()
-    simulator_version = await simulator_db.get_simulator_by_def_hash(get_singularity_hash(singularity_rep))
-    if simulator_version is None:
-        # bi_graph_packages = await database_service.get_package_db().list_packages_from_dependencies(
-        #     dependencies=pbest_dependencies
-        # )
-        # if len(bi_graph_packages) != (len(experiment_dep.pypi_dependencies) + len(experiment_dep.conda_dependencies)):
-        #     raise LookupError(f"Not all dependencies are in database: {experiment_dep}, {bi_graph_packages}")
+    simulation_service = dispatch_queue.simulation_service
+    try:
+        singularity_rep = await get_default_container_def()
+        simulator_db = database_service.get_simulator_db()
+        simulator_version = await _get_or_insert_simulator(
+            database_service=database_service, singularity_rep=singularity_rep
+        )
 
-        simulator_version = await simulator_db.insert_simulator(singularity_rep)
+        # archives are hashed member by member, which reads the whole upload
+        cache_key = await asyncio.to_thread(
+            get_simulation_cache_key, simulation_request=simulation_request, simulator=simulator_version
+        )
+        cached_experiment = await _get_cached_experiment(simulator_db, cache_key=cache_key, use_cache=use_cache)
+        if cached_experiment is not None:
+            await simulation_service.discard_staged_inputs([simulation_request])
+            return cached_experiment
+
+        random_string_7_hex = "".join(random.choices(string.hexdigits, k=7))  # noqa: S311 doesn't need to be secure
+        experiment_id = get_experiment_id(simulator=simulator_version, random_str=random_string_7_hex)
+
+        # the dispatch job outlives this process, so it must not refer to a local temp file
+        (simulation_request,) = await simulation_service.stage_input_files([simulation_request])
+        simulation = await simulator_db.insert_simulation(
+            sim_request=simulation_request,
+            experiment_id=experiment_id,
+            simulator_version=simulator_version,
+            cache_key=cache_key,
+        )
 
-    random_string_7_hex = "".join(random.choices(string.hexdigits, k=7))  # noqa: S311 doesn't need to be secure
-    experiment_id = get_experiment_id(simulator=simulator_version, random_str=random_string_7_hex)
+        await dispatch_queue.enqueue(
+            SimulationDispatch(
+                simulator_id=simulator_version.database_id,
+                simulations=[
+                    DispatchedSimulation(
+                        simulation_id=simulation.database_id,
+                        experiment_id=experiment_id,
+                        sim_request=simulation_request,
+                    )
+                ],
+            )
+        )
+    except Exception:
+        await simulation_service.discard_staged_inputs([simulation_request])
+        raise
 
-    simulation = await simulator_db.insert_simulation(
-        sim_request=simulation_request, experiment_id=experiment_id, simulator_version=simulator_version
+    return SimulationExperiment(
+        simulation_database_id=simulation.database_id,
+        simulator_database_id=simulator_version.database_id,
     )
 
-    async def perform_job() -> None:
-        await _dispatch_job(
-            database_service=database_service,
-            job_monitor=job_monitor,
-            simulation=simulation,
-            simulation_service_slurm=simulation_service_slurm,
-            experiment_id=experiment_id,
-        )
 
-    def remove_temp_dir() -> None:
-        shutil.rmtree(tmp_dir)
+async def run_simulation_batch(
+    simulation_requests: list[SimulationRequest],
+    database_service: DatabaseService,
+    dispatch_queue: DispatchQueue,
+    packed: bool = False,
+    use_cache: bool = True,
+) -> list[SimulationExperiment]:
+    """
+    Run simulations sharing a simulator as Slurm job arrays, one sbatch call per `slurm_max_array_size` requests.
+    With `packed`, each sbatch call instead runs up to `slurm_packed_max_simulations` requests side by side inside
+    a single allocation, which suits many short simulations better than one array task each.
+    Requests with cached results (see run_simulation) are not run, their experiments are returned in place.
+    """
+    experiments: list[SimulationExperiment | None] = []
+    simulations: list[Simulation] = []
+    experiment_ids: list[str] = []
+    simulation_service = dispatch_queue.simulation_service
+    staged_requests: list[SimulationRequest] = []
+    try:
+        singularity_rep = await get_default_container_def()
+        simulator_db = database_service.get_simulator_db()
+        simulator_version = await _get_or_insert_simulator(
+            database_service=database_service, singularity_rep=singularity_rep
+        )
 
-    # Tasks are executed in order, https://www.starlette.dev/background/
-    background_tasks.add_task(perform_job)
-    background_tasks.add_task(remove_temp_dir)
+        cache_keys: list[str] = []
+        for simulation_request in simulation_requests:
+            cache_key = await asyncio.to_thread(
+                get_simulation_cache_key, simulation_request=simulation_request, simulator=simulator_version
+            )
+            cache_keys.append(cache_key)
+            experiments.append(await _get_cached_experiment(simulator_db, cache_key=cache_key, use_cache=use_cache))
+        await simulation_service.discard_staged_inputs([
+            simulation_request
+            for simulation_request, experiment in zip(simulation_requests, experiments)
+            if experiment is not None
+        ])
+        to_run = [index for index, experiment in enumerate(experiments) if experiment is None]
+
+        # the dispatch job outlives this process, so it must not refer to local temp files
+        staged_requests = await simulation_service.stage_input_files([simulation_requests[i] for i in to_run])
+        for index, simulation_request in zip(to_run, staged_requests):
+            random_string_7_hex = "".join(random.choices(string.hexdigits, k=7))  # noqa: S311 doesn't need to be secure
+            experiment_id = get_experiment_id(simulator=simulator_version, random_str=random_string_7_hex)
+            simulation = await simulator_db.insert_simulation(
+                sim_request=simulation_request,
+                experiment_id=experiment_id,
+                simulator_version=simulator_version,
+                cache_key=cache_keys[index],
+            )
+            simulations.append(simulation)
+            experiment_ids.append(experiment_id)
+            experiments[index] = SimulationExperiment(
+                simulation_database_id=simulation.database_id,
+                simulator_database_id=simulator_version.database_id,
+            )
 
+        if simulations:
+            await dispatch_queue.enqueue(
+                SimulationDispatch(
+                    simulator_id=simulator_version.database_id,
+                    simulations=[
+                        DispatchedSimulation(
+                            simulation_id=simulation.database_id,
+                            experiment_id=experiment_id,
+                            sim_request=simulation.sim_request,
+                        )
+                        for simulation, experiment_id in zip(simulations, experiment_ids)
+                    ],
+                    batch=True,
+                    packed=packed,
+                )
+            )
+    except Exception:
+        await simulation_service.discard_staged_inputs([*simulation_requests, *staged_requests])
+        raise
+
+    return [experiment for experiment in experiments if experiment is not None]
+
+
+async def _get_cached_experiment(
+    simulator_db: SimulatorDatabaseService, cache_key: str, use_cache: bool
+) -> SimulationExperiment | None:
+    """The experiment of a completed simulation with the same cache key, within `simulation_cache_ttl_seconds`."""
+    cache_ttl_seconds = get_settings().simulation_cache_ttl_seconds
+    if not use_cache or cache_ttl_seconds <= 0:
+        return None
+    cached_simulation = await simulator_db.get_cached_simulation(cache_key=cache_key, max_age_seconds=cache_ttl_seconds)
+    if cached_simulation is None:
+        return None
+    logger.info(f"Reusing results of simulation {cached_simulation.database_id}, cache key {cache_key}")
     return SimulationExperiment(
-        simulation_database_id=simulation.database_id,
-        simulator_database_id=simulator_version.database_id,
+        simulation_database_id=cached_simulation.database_id,
+        simulator_database_id=cached_simulation.simulator_version.database_id,
+        metadata={"cache_hit": "true"},
     )
 
 
 async def run_curated_pbif(
     templated_pbif: str,
     simulator_name: str,
-    background_tasks: BackgroundTasks,
     loaded_sbml: Path,
     use_interesting: bool = True,
 ) -> SimulationExperiment:
@@ -132,9 +246,8 @@ async def run_curated_pbif(
         )
 
         try:
-            sim_service = get_required_simulation_service()
             db_service = get_required_database_service()
-            job_monitor = get_required_job_monitor()
+            dispatch_queue = get_required_dispatch_queue()
         except ValueError as e:
             logger.exception(msg=f"Failed to initialize {simulator_name} run.", exc_info=e)
             raise HTTPException(status_code=500, detail=str(e))
@@ -143,46 +256,318 @@ async def run_curated_pbif(
             return await run_simulation(
                 simulation_request=simulator_request,
                 database_service=db_service,
-                simulation_service_slurm=sim_service,
-                job_monitor=job_monitor,
+                dispatch_queue=dispatch_queue,
                 pb_allow_list=PBAllowList(allow_list=allow_list),
-                background_tasks=background_tasks,
             )
         except Exception as e:
             logger.exception(msg=f"Failed to start {simulator_name} run", exc_info=e)
             raise HTTPException(500)
 
 
-async def _dispatch_job(
+# ------- default container definition, memoized ------
+
+global_default_container_def: ContainerizationFileRepr | None = None
+global_default_container_def_expiry: float = 0.0
+global_default_container_def_refresh: asyncio.Task[ContainerizationFileRepr] | None = None
+
+
+def _generate_default_container_def() -> ContainerizationFileRepr:
+    return generate_container_def_file(_default_registry_deps(), ContainerizationEngine.APPTAINER)
+
+
+async def get_default_container_def() -> ContainerizationFileRepr:
+    """
+    Container definition built from the dependency registry, regenerated at most once every
+    `default_container_def_ttl_seconds` so that registry changes are picked up without fetching the registry on every
+    submission. Concurrent callers share one regeneration, whose (blocking) registry request runs in a worker thread.
+    """
+    global global_default_container_def_refresh
+    if global_default_container_def is not None and time.monotonic() < global_default_container_def_expiry:
+        return global_default_container_def
+    if global_default_container_def_refresh is None or global_default_container_def_refresh.done():
+        global_default_container_def_refresh = asyncio.create_task(_refresh_default_container_def())
+    # a cancelled caller must not cancel the regeneration the other callers wait for
+    return await asyncio.shield(global_default_container_def_refresh)
+
+
+async def _refresh_default_container_def() -> ContainerizationFileRepr:
+    """If the registry request fails, the previous definition is reused for `default_container_def_retry_seconds`."""
+    global global_default_container_def, global_default_container_def_expiry
+    settings = get_settings()
+    try:
+        container_def = await asyncio.to_thread(_generate_default_container_def)
+    except Exception:
+        if global_default_container_def is None:
+            raise
+        logger.exception("Failed to regenerate the default container definition, reusing the previous one")
+        global_default_container_def_expiry = time.monotonic() + settings.default_container_def_retry_seconds
+        return global_default_container_def
+    if global_default_container_def is not None and container_def != global_default_container_def:
+        logger.info(f"Default container definition changed, new hash {get_singularity_hash(container_def)}")
+    global_default_container_def = container_def
+    global_default_container_def_expiry = time.monotonic() + settings.default_container_def_ttl_seconds
+    return container_def
+
+
+async def _get_or_insert_simulator(
+    database_service: DatabaseService, singularity_rep: ContainerizationFileRepr
+) -> SimulatorVersion:
+    simulator_db = database_service.get_simulator_db()
+    simulator_version = await simulator_db.get_simulator_by_def_hash(get_singularity_hash(singularity_rep))
+    if simulator_version is None:
+        # bi_graph_packages = await database_service.get_package_db().list_packages_from_dependencies(
+        #     dependencies=pbest_dependencies
+        # )
+        # if len(bi_graph_packages) != (len(experiment_dep.pypi_dependencies) + len(experiment_dep.conda_dependencies)):
+        #     raise LookupError(f"Not all dependencies are in database: {experiment_dep}, {bi_graph_packages}")
+
+        simulator_version = await simulator_db.insert_simulator(singularity_rep)
+    return simulator_version
+
+
+async def _ensure_simulator_available(
     database_service: DatabaseService,
     job_monitor: JobMonitor,
     simulation_service_slurm: SimulationService,
-    simulation: Simulation,
-    experiment_id: str,
-) -> None:
-    simulator_version = simulation.simulator_version
-    hpc_db = database_service.get_hpc_db()
+    simulator_version: SimulatorVersion,
+    random_string: str,
+) -> int | None:
+    """
+    Make sure the simulator's container exists on the cluster, or is being built.
+    :return: Slurm job id of the build the simulations have to wait for, None if the container is ready.
+    """
     simulator_download_id = await database_service.get_simulator_db().get_downloaded_simulator(
         simulator_id=simulator_version.database_id
     )
-    random_string_7_hex = "".join(random.choices(string.hexdigits, k=7))  # noqa: S311 doesn't need to be secure
+    if simulator_download_id is not None:
+        return None
+    return await _provision_container_single_flight(
+        database_service=database_service,
+        job_monitor=job_monitor,
+        simulation_service_slurm=simulation_service_slurm,
+        simulator_version=simulator_version,
+        random_string=random_string,
+    )
+
+
+# ------- single-flight container provisioning ------
+
+global_container_provisioning: dict[str, asyncio.Task[int | None]] = {}
+
+
+async def _provision_container_single_flight(
+    database_service: DatabaseService,
+    job_monitor: JobMonitor,
+    simulation_service_slurm: SimulationService,
+    simulator_version: SimulatorVersion,
+    random_string: str,
+) -> int | None:
+    """
+    Concurrent submissions needing the same container share one download or build: within this process they await
+    the same task, across replicas the task holds the simulator's provisioning claim. A failure is raised to every
+    waiter.
+    """
+    container_def_hash = simulator_version.container_def_hash
+    provisioning = global_container_provisioning.get(container_def_hash)
+    if provisioning is None:
+        provisioning = asyncio.create_task(
+            _provision_container(
+                database_service=database_service,
+                job_monitor=job_monitor,
+                simulation_service_slurm=simulation_service_slurm,
+                simulator_version=simulator_version,
+                random_string=random_string,
+            )
+        )
+        global_container_provisioning[container_def_hash] = provisioning
 
-    if simulator_download_id is None:
+        def forget(done: asyncio.Task[int | None]) -> None:
+            if global_container_provisioning.get(container_def_hash) is done:
+                del global_container_provisioning[container_def_hash]
+
+        provisioning.add_done_callback(forget)
+    else:
+        logger.info(f"Waiting for the container of simulator {simulator_version.database_id} already in progress.")
+    # a cancelled waiter must not cancel the provisioning the other waiters depend on
+    return await asyncio.shield(provisioning)
+
+
+async def _provision_container(
+    database_service: DatabaseService,
+    job_monitor: JobMonitor,
+    simulation_service_slurm: SimulationService,
+    simulator_version: SimulatorVersion,
+    random_string: str,
+) -> int | None:
+    settings = get_settings()
+    simulator_db = database_service.get_simulator_db()
+    simulator_id = simulator_version.database_id
+    claim = uuid.uuid4().hex
+    lease_seconds = settings.container_provisioning_lease_seconds
+    while not await simulator_db.claim_provisioning(simulator_id, claim=claim, lease_seconds=lease_seconds):
+        # another replica provisions the container, wait until it is done or its claim expired
+        provisioned, build_slurmjobid = await _get_provisioned_container(
+            database_service, job_monitor.slurm_service, simulator_version
+        )
+        if provisioned:
+            return build_slurmjobid
+        await asyncio.sleep(settings.container_provisioning_poll_seconds)
+
+    renewal = asyncio.create_task(
+        _renew_provisioning_claim(database_service, simulator_id, claim=claim, lease_seconds=lease_seconds)
+    )
+    try:
+        # another replica may have provisioned the container before we got the claim
+        provisioned, build_slurmjobid = await _get_provisioned_container(
+            database_service, job_monitor.slurm_service, simulator_version
+        )
+        if provisioned:
+            return build_slurmjobid
         logger.info(
-            f"Simulator {simulator_version.database_id} is being downloaded from "
+            f"Simulator {simulator_id} is being downloaded from "
             f"{RemoteContainerImage.from_container_version(simulator_version)}."
         )
-        await _download_or_build_container(
+        return await _download_or_build_container(
             simulation_service_slurm=simulation_service_slurm,
             simulator_version=simulator_version,
-            hpc_db=hpc_db,
             job_monitor=job_monitor,
-            random_string=random_string_7_hex,
+            random_string=random_string,
+        )
+    finally:
+        renewal.cancel()
+        await asyncio.gather(renewal, return_exceptions=True)
+        await simulator_db.release_provisioning(simulator_id, claim=claim)
+
+
+async def _get_provisioned_container(
+    database_service: DatabaseService, slurm_service: SlurmService, simulator_version: SimulatorVersion
+) -> tuple[bool, int | None]:
+    """
+    :return: whether the container was downloaded or built, or its build is in flight, and the Slurm job id of such
+        a build which simulations have to wait for.
+    """
+    if await database_service.get_simulator_db().get_downloaded_simulator(simulator_id=simulator_version.database_id):
+        return True, None
+    build_run = await database_service.get_hpc_db().get_hpcrun_by_ref(
+        ref_id=simulator_version.database_id, job_type=JobType.BUILD_CONTAINER
+    )
+    if build_run is None or build_run.status is None:
+        return False, None
+    if build_run.status == JobStatus.COMPLETED:
+        return True, None
+    if not build_run.status.is_terminal():
+        return await _get_build_in_flight(database_service, slurm_service, build_run)
+    return False, None
+
+
+async def _get_build_in_flight(
+    database_service: DatabaseService, slurm_service: SlurmService, build_run: HpcRun
+) -> tuple[bool, int | None]:
+    """
+    The build's row may lag behind Slurm, and the job may be purged from slurmctld already, so that a dependency on it
+    would be rejected: ask Slurm about the build before simulations depend on it, and record what it says.
+    """
+    slurm_job = (await slurm_service.get_job_status(job_ids=[build_run.slurmjobid])).get((build_run.slurmjobid, None))
+    if slurm_job is None:
+        logger.warning(f"Container build job {build_run.slurmjobid} is unknown to Slurm, provisioning it again")
+        return False, None
+    build_run = await database_service.get_hpc_db().update_hpcrun_status(
+        hpcrun_id=build_run.database_id, new_slurm_job=slurm_job
+    )
+    if build_run.status == JobStatus.COMPLETED:
+        return True, None
+    if build_run.status is not None and build_run.status.is_terminal():
+        return False, None
+    # build still in flight, Slurm holds the simulations until it completes
+    return True, build_run.slurmjobid
+
+
+async def _renew_provisioning_claim(
+    database_service: DatabaseService, simulator_id: int, claim: str, lease_seconds: int
+) -> None:
+    simulator_db = database_service.get_simulator_db()
+    while True:
+        await asyncio.sleep(lease_seconds / 3)
+        try:
+            if not await simulator_db.claim_provisioning(simulator_id, claim=claim, lease_seconds=lease_seconds):
+                logger.warning(f"Lost the claim on provisioning the container of simulator {simulator_id}")
+                return
+        except Exception:
+            logger.exception(f"Failed to renew the claim on provisioning the container of simulator {simulator_id}")
+
+
+async def dispatch_simulations(
+    dispatch: SimulationDispatch,
+    database_service: DatabaseService,
+    simulation_service_slurm: SimulationService,
+    job_monitor: JobMonitor,
+) -> None:
+    """
+    Submit the simulations of a dispatch job, see DispatchQueue. A job may run more than once (retry after a failure,
+    lease expiry after a crash), so simulations which already have an HpcRun are not submitted again.
+    """
+    simulator_version = await database_service.get_simulator_db().get_simulator(simulator_id=dispatch.simulator_id)
+    if simulator_version is None:
+        raise LookupError(f"Simulator with id {dispatch.simulator_id} not found in the database")
+    submitted_ids = {
+        hpc_run.sim_id
+        for hpc_run in await database_service.get_hpc_db().get_hpcruns_by_refs(
+            ref_ids=[dispatched.simulation_id for dispatched in dispatch.simulations], job_type=JobType.SIMULATION
+        )
+    }
+    pending = [dispatched for dispatched in dispatch.simulations if dispatched.simulation_id not in submitted_ids]
+    if not pending:
+        logger.info(f"All {len(dispatch.simulations)} simulations of the dispatch were already submitted")
+        return
+    simulations = [
+        Simulation(
+            database_id=dispatched.simulation_id,
+            sim_request=dispatched.sim_request,
+            simulator_version=simulator_version,
+        )
+        for dispatched in pending
+    ]
+    if dispatch.batch:
+        await _dispatch_batch_job(
+            database_service=database_service,
+            job_monitor=job_monitor,
+            simulation_service_slurm=simulation_service_slurm,
+            simulations=simulations,
+            experiment_ids=[dispatched.experiment_id for dispatched in pending],
+            packed=dispatch.packed,
         )
+    else:
+        for simulation, dispatched in zip(simulations, pending):
+            await _dispatch_job(
+                database_service=database_service,
+                job_monitor=job_monitor,
+                simulation_service_slurm=simulation_service_slurm,
+                simulation=simulation,
+                experiment_id=dispatched.experiment_id,
+            )
+
+
+async def _dispatch_job(
+    database_service: DatabaseService,
+    job_monitor: JobMonitor,
+    simulation_service_slurm: SimulationService,
+    simulation: Simulation,
+    experiment_id: str,
+) -> None:
+    hpc_db = database_service.get_hpc_db()
+    random_string_7_hex = "".join(random.choices(string.hexdigits, k=7))  # noqa: S311 doesn't need to be secure
+    build_slurmjobid = await _ensure_simulator_available(
+        database_service=database_service,
+        job_monitor=job_monitor,
+        simulation_service_slurm=simulation_service_slurm,
+        simulator_version=simulation.simulator_version,
+        random_string=random_string_7_hex,
+    )
 
     sim_slurmjobid = await simulation_service_slurm.submit_simulation_job(
         simulation=simulation,
         experiment_id=experiment_id,
+        dependency_job_id=build_slurmjobid,
     )
 
     correlation_id = get_correlation_id(random_string=random_string_7_hex, job_type=JobType.SIMULATION)
@@ -192,73 +577,81 @@ async def _dispatch_job(
         ref_id=simulation.database_id,
         correlation_id=correlation_id,
     )
+    job_monitor.notify_activity()
+
+
+async def _dispatch_batch_job(
+    database_service: DatabaseService,
+    job_monitor: JobMonitor,
+    simulation_service_slurm: SimulationService,
+    simulations: list[Simulation],
+    experiment_ids: list[str],
+    packed: bool = False,
+) -> None:
+    hpc_db = database_service.get_hpc_db()
+    build_slurmjobid = await _ensure_simulator_available(
+        database_service=database_service,
+        job_monitor=job_monitor,
+        simulation_service_slurm=simulation_service_slurm,
+        simulator_version=simulations[0].simulator_version,
+        random_string="".join(random.choices(string.hexdigits, k=7)),  # noqa: S311 doesn't need to be secure
+    )
+
+    settings = get_settings()
+    chunk_size = settings.slurm_packed_max_simulations if packed else settings.slurm_max_array_size
+    submit = (
+        simulation_service_slurm.submit_simulation_packed
+        if packed
+        else simulation_service_slurm.submit_simulation_array
+    )
+    for start in range(0, len(simulations), chunk_size):
+        chunk = simulations[start : start + chunk_size]
+        slurmjobid = await submit(
+            simulations=chunk,
+            experiment_ids=experiment_ids[start : start + chunk_size],
+            dependency_job_id=build_slurmjobid,
+        )
+        await hpc_db.insert_array_hpcruns(
+            slurmjobid=slurmjobid,
+            job_type=JobType.SIMULATION,
+            ref_ids=[simulation.database_id for simulation in chunk],
+            correlation_ids=[
+                get_correlation_id(
+                    random_string="".join(random.choices(string.hexdigits, k=7)),  # noqa: S311 doesn't need to be secure
+                    job_type=JobType.SIMULATION,
+                )
+                for _ in chunk
+            ],
+            packed=packed,
+        )
+        logger.info(f"Submitted {len(chunk)} simulations as {'packed' if packed else 'array'} Slurm job {slurmjobid}")
+        job_monitor.notify_activity()
 
 
 async def _download_or_build_container(
     simulation_service_slurm: SimulationService,
     simulator_version: SimulatorVersion,
-    hpc_db: HPCDatabaseService,
     job_monitor: JobMonitor,
     random_string: str,
-) -> None:
-    download_succeeded = False
+) -> int | None:
+    """
+    Pull the simulator's image, or submit a job building it if the pull fails.
+    :return: Slurm job id of the build, None if the image was pulled.
+    """
     try:
         await simulation_service_slurm.download_container(
             RemoteContainerImage.from_container_version(simulator_version)
         )
-        download_succeeded = True
+        return None
     except Exception as e:
         logger.exception("Failed to download simulator slurm container, will attempt to build container.", exc_info=e)
 
-    if download_succeeded:
-        return
-    built_simulator = await hpc_db.get_hpcrun_id_by_simulator_id(simulator_id=simulator_version.database_id)
-    if built_simulator is None:
-        try:
-            await _build_container_and_wait(
-                simulation_service_slurm=simulation_service_slurm,
-                simulator_version=simulator_version,
-                hpc_db=hpc_db,
-                job_monitor=job_monitor,
-                random_prefix=random_string,
-            )
-        except Exception as e:
-            logger.exception("Failed to build simulator container, will attempt to build container.", exc_info=e)
-            raise e
-
-
-async def _build_container_and_wait(
-    simulation_service_slurm: SimulationService,
-    simulator_version: SimulatorVersion,
-    hpc_db: HPCDatabaseService,
-    job_monitor: JobMonitor,
-    random_prefix: str,
-) -> None:
-    hpc_run = await simulation_service_slurm.build_container(
-        simulator_version=simulator_version, random_str=random_prefix
-    )
-
-    wait_time = 0
-    current_status = hpc_run.status
-    job_queue: asyncio.Queue[HpcRun] = asyncio.Queue()
-    job_monitor.internal_subscribe(job_queue, hpc_run.slurmjobid)
-    while current_status != JobStatus.COMPLETED:
-        wait_time += 1
-        try:
-            current_status = (await asyncio.wait_for(job_queue.get(), timeout=60)).status
-        except TimeoutError:
-            # If no status update from monitor, get most recent from DB of absolute truth
-            latest_hpc = await hpc_db.get_hpcrun_by_slurmjobid(hpc_run.slurmjobid)
-            if latest_hpc is None:
-                raise Exception(
-                    f"Can't get HPC Run with jobID {hpc_run} for container build {simulator_version.container_def_hash}"
-                )
-            current_status = latest_hpc.status
-
-        if current_status == JobStatus.FAILED:
-            raise Exception(f"Building container for simulator {simulator_version} has failed.")
-        elif wait_time == 30:
-            raise Exception(
-                f"Building container for simulator {simulator_version} took to long, job at status of {current_status}."
-            )
-    job_monitor.internal_unsubscribe(hpc_run.slurmjobid)
+    try:
+        hpc_run = await simulation_service_slurm.build_container(
+            simulator_version=simulator_version, random_str=random_string
+        )
+    except Exception as e:
+        logger.exception("Failed to submit the simulator container build.", exc_info=e)
+        raise e
+    job_monitor.notify_activity()
+    return hpc_run.slurmjobid
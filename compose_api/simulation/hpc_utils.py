@@ -1,4 +1,5 @@
 import hashlib
+import zipfile
 from pathlib import Path
 
 from pbest.utils.input_types import ContainerizationFileRepr
@@ -7,6 +8,7 @@ from compose_api.common.gateway.models import Namespace
 from compose_api.config import get_settings
 from compose_api.simulation.models import (
     JobType,
+    SimulationRequest,
     SimulatorVersion,
 )
 
@@ -24,6 +26,10 @@ def get_slurm_submit_file(slurm_job_name: str) -> Path:
     return _namespace_path() / "slurm_sbatch" / f"{slurm_job_name}.sbatch"
 
 
+def get_slurm_batch_manifest_file(slurm_job_name: str) -> Path:
+    return _namespace_path() / "slurm_sbatch" / f"{slurm_job_name}.manifest"
+
+
 def get_slurm_singularity_def_file(singularity_hash: str) -> Path:
     return _namespace_path() / "images" / f"{singularity_hash}.def"
 
@@ -36,6 +42,14 @@ def get_slurm_sim_input_file_path(experiment_id: str) -> Path:
     return get_slurm_sim_experiment_dir(experiment_id) / f"{experiment_id}.omex"
 
 
+def get_slurm_upload_staging_dir() -> Path:
+    return _namespace_path() / "uploads"
+
+
+def get_slurm_upload_staging_file(upload_id: str, suffix: str) -> Path:
+    return get_slurm_upload_staging_dir() / f"{upload_id}{suffix}"
+
+
 def get_slurm_sim_output_directory_path(experiment_id: str) -> Path:
     return get_slurm_sim_experiment_dir(experiment_id) / "output"
 
@@ -44,6 +58,14 @@ def get_slurm_sim_results_file_path(experiment_id: str) -> Path:
     return get_slurm_sim_experiment_dir(experiment_id) / "results.zip"
 
 
+def get_slurm_packed_status_root() -> Path:
+    return _namespace_path() / "packed"
+
+
+def get_slurm_packed_status_dir(slurm_job_id: str) -> Path:
+    return get_slurm_packed_status_root() / slurm_job_id
+
+
 def get_slurm_sim_experiment_dir(experiment_id: str) -> Path:
     return _namespace_path() / "sims" / f"experiment-{experiment_id}"
 
@@ -60,6 +82,14 @@ def get_slurm_job_name(experiment_id: str) -> str:
     return f"{experiment_id}"
 
 
+def get_slurm_batch_job_name(experiment_ids: list[str], prefix: str) -> str:
+    """
+    Job name of a Slurm job running a batch of experiments (job array or packed job), derived from the experiments.
+    """
+    digest = hashlib.sha256("\n".join(experiment_ids).encode("utf-8")).hexdigest()
+    return f"{prefix}_{len(experiment_ids)}_{digest[:12]}"
+
+
 def get_correlation_id(random_string: str, job_type: JobType) -> str:
     """
     Generate a correlation ID for the Simulation based on its database ID and random string.
@@ -78,3 +108,43 @@ def get_experiment_id(simulator: SimulatorVersion, random_str: str) -> str:
 
 def get_singularity_hash(singularity_def_rep: ContainerizationFileRepr) -> str:
     return hashlib.md5(singularity_def_rep.representation.encode("utf-8")).hexdigest()  # noqa: S324
+
+
+def get_simulation_cache_key(simulation_request: SimulationRequest, simulator: SimulatorVersion) -> str:
+    """
+    Content address of a simulation: identical inputs run with identical parameters on the same simulator produce the
+    same key. Archives stored locally are hashed by their members rather than their bytes, since zip timestamps differ
+    between two otherwise identical uploads (e.g. the OMEX files assembled by the curated endpoints). Inputs streamed
+    to the cluster (see settings.upload_stream_to_hpc) have no local copy to open, they are hashed by their bytes.
+    The key records which of the two was hashed: for plain files both agree, an archive only hits results of the same
+    upload mode, and in streaming mode only if it is byte for byte identical.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{simulator.container_def_hash}|{simulation_request.simulation_file_type.value}|".encode())
+    digest.update(f"{simulation_request.end_time_point!r}|".encode())
+    input_path = simulation_request.request_file_path
+    if not simulation_request.staged_on_hpc and zipfile.is_zipfile(input_path):
+        digest.update(b"members|")
+        with zipfile.ZipFile(input_path) as archive:
+            for member in sorted(archive.infolist(), key=lambda info: info.filename):
+                if member.is_dir():
+                    continue
+                digest.update(f"{member.filename}|{member.file_size}|".encode())
+                with archive.open(member) as member_file:
+                    for chunk in iter(lambda: member_file.read(1 << 20), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    digest.update(b"bytes|")
+    if simulation_request.content_sha256 is not None:
+        digest.update(simulation_request.content_sha256.encode())
+    elif simulation_request.staged_on_hpc:
+        # streamed uploads always come with the hash of their bytes
+        raise ValueError(f"Staged input {input_path} has no content hash")
+    else:
+        file_digest = hashlib.sha256()
+        with open(input_path, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b""):
+                file_digest.update(chunk)
+        digest.update(file_digest.hexdigest().encode())
+    return digest.hexdigest()
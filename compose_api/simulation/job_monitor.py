@@ -1,33 +1,81 @@
 import asyncio
+import datetime
 import logging
-from asyncio import Queue
 from typing import Any
 
 from async_lru import alru_cache
 from nats.aio.client import Client as NATSClient
 from nats.aio.msg import Msg
+from nats.errors import SlowConsumerError
 
+from compose_api.common.hpc.models import SlurmJob, SlurmJobKey
 from compose_api.common.hpc.slurm_service import SlurmService
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.hpc_utils import get_slurm_packed_status_root
 from compose_api.simulation.models import HpcRun, JobStatus, WorkerEvent, WorkerEventMessagePayload
+from compose_api.simulation.poll_scheduler import PollScheduler
+from compose_api.simulation.results_ingestion import ResultsIngestor
+from compose_api.simulation.worker_event_buffer import WorkerEventBuffer
 
 logger = logging.getLogger(__name__)
 
+# messages the NATS client dropped because a subscription fell behind, see log_nats_error
+global_slow_consumer_drops: int = 0
+
+
+async def log_nats_error(e: Exception) -> None:
+    """
+    error_cb of the NATS client. Slow consumer errors are raised for every message dropped, they are logged on the
+    first drop and then every 1000 drops.
+    """
+    global global_slow_consumer_drops
+    if isinstance(e, SlowConsumerError):
+        global_slow_consumer_drops += 1
+        if global_slow_consumer_drops % 1000 == 1:
+            logger.warning(
+                f"NATS dropped messages on '{e.subject}' the subscription could not keep up with, "
+                f"{global_slow_consumer_drops} dropped so far"
+            )
+        return
+    logger.error(f"NATS error: {e!r}")
+
 
 class JobMonitor:
     database_service: DatabaseService
     slurm_service: SlurmService
     nats_client: NATSClient | None
-    internal_listeners: dict[int, Queue[HpcRun]] = {}
+    results_ingestor: ResultsIngestor | None  # converts results to Parquet as soon as a simulation completes
     _polling_task: asyncio.Task[None] | None = None
     _stop_event: asyncio.Event
+    _scheduler: PollScheduler | None = None
+    _sacct_watermark: datetime.datetime | None
+    _polls_since_reconcile: int
+    _worker_event_buffer: WorkerEventBuffer
 
-    def __init__(self, nats_client: NATSClient | None, database_service: DatabaseService, slurm_service: SlurmService):
+    def __init__(
+        self,
+        nats_client: NATSClient | None,
+        database_service: DatabaseService,
+        slurm_service: SlurmService,
+        results_ingestor: ResultsIngestor | None = None,
+    ):
         self.nats_client = nats_client
         self.database_service = database_service
         self.slurm_service = slurm_service
+        self.results_ingestor = results_ingestor
         self._stop_event = asyncio.Event()
+        self._sacct_watermark = None
+        self._polls_since_reconcile = 0
+        settings = get_settings()
+        self._worker_event_buffer = WorkerEventBuffer(
+            database_service=database_service,
+            batch_size=settings.worker_event_batch_size,
+            flush_interval_seconds=settings.worker_event_flush_interval_seconds,
+            max_pending=settings.worker_event_buffer_size,
+            max_retries=settings.worker_event_insert_retries,
+            retry_backoff_seconds=settings.worker_event_retry_backoff_seconds,
+        )
 
     @alru_cache
     async def get_hpcrun_by_correlation_id(self, correlation_id: str) -> int | None:
@@ -36,35 +84,53 @@ class JobMonitor:
     async def subscribe_nats(self) -> None:
         if self.nats_client is None:
             raise Exception("NATS client is not set")
-        subject = get_settings().nats_worker_event_subject
+        settings = get_settings()
+        subject = settings.nats_worker_event_subject
         logger.info(f"Subscribing to NATS messages for subject '{subject}'")
+        self._worker_event_buffer.start()
 
         async def message_handler(msg: Msg) -> Any:
             subject = msg.subject
             data = msg.data.decode("utf-8")
-            logger.info(f"Received message on subject '{subject}': {data}")
+            logger.debug(f"Received message on subject '{subject}': {data}")
             worker_event_message_payload = WorkerEventMessagePayload.model_validate_json(data)
             worker_event = WorkerEvent.from_message_payload(worker_event_message_payload=worker_event_message_payload)
             hpcrun_id = await self.get_hpcrun_by_correlation_id(correlation_id=worker_event.correlation_id)
             if hpcrun_id is None:
                 logger.error(f"No HpcRun found for correlation ID {worker_event.correlation_id}. Skipping event.")
                 return
-            _updated_worker_event = await self.database_service.get_hpc_db().insert_worker_event(
-                worker_event, hpcrun_id=hpcrun_id
-            )
+            worker_event.hpcrun_id = hpcrun_id
+            # batched with other events, waits while the buffer is full
+            await self._worker_event_buffer.put(worker_event)
 
-        await self.nats_client.subscribe(subject=subject, cb=message_handler)
+        # core NATS has no flow control: messages beyond the limit are dropped, and reported to log_nats_error
+        await self.nats_client.subscribe(
+            subject=subject, cb=message_handler, pending_msgs_limit=settings.worker_event_pending_msgs_limit
+        )
         if self.nats_client.is_connected:
             logger.info("NATS client is connected and subscription is set up.")
         else:
             logger.error("NATS client is not connected.")
 
-    async def start_polling(self, interval_seconds: int = 30) -> None:
+    async def start_polling(self, interval_seconds: float | None = None) -> None:
+        """
+        Start the adaptive polling loop, see PollScheduler.
+        :param interval_seconds: fastest polling interval, defaults to settings.job_monitor_min_interval_seconds
+        """
         if self._polling_task is not None and not self._polling_task.done():
             logger.warning("Polling task already running.")
             return
+        settings = get_settings()
+        min_interval = interval_seconds if interval_seconds is not None else settings.job_monitor_min_interval_seconds
+        self._scheduler = PollScheduler(
+            min_interval=min_interval,
+            max_interval=max(settings.job_monitor_max_interval_seconds, min_interval),
+            active_max_interval=settings.job_monitor_active_max_interval_seconds,
+            backoff_factor=settings.job_monitor_backoff_factor,
+            max_polls_per_minute=settings.job_monitor_max_polls_per_minute,
+        )
         self._stop_event.clear()
-        self._polling_task = asyncio.create_task(self._polling_loop(interval_seconds))
+        self._polling_task = asyncio.create_task(self._polling_loop(self._scheduler))
         logger.info("Started job status polling task.")
 
     async def stop_polling(self) -> None:
@@ -74,30 +140,46 @@ class JobMonitor:
             await self._polling_task
             logger.info("Stopped job status polling task.")
 
-    async def _polling_loop(self, interval_seconds: int) -> None:
+    def notify_activity(self) -> None:
+        """Signal that a job was just submitted (or otherwise changed) so the next poll happens right away."""
+        if self._scheduler is not None:
+            self._scheduler.notify_activity()
+
+    async def _polling_loop(self, scheduler: PollScheduler) -> None:
         while not self._stop_event.is_set():
             try:
-                await self.update_running_jobs()
+                active_count, transition_count = await self.update_running_jobs()
+                scheduler.record_poll(active_jobs=active_count, transitions=transition_count)
             except Exception:
                 logger.exception("Error during job polling")
-            await asyncio.sleep(interval_seconds)
+                scheduler.record_poll(active_jobs=1, transitions=0)
+            await scheduler.wait_for_next_poll(self._stop_event)
 
-    async def update_running_jobs(self) -> None:
-        # Fetch all running HpcRun jobs
-        running_jobs = await self.database_service.get_hpc_db().list_running_hpcruns()
-        if not running_jobs:
-            logger.debug("No running jobs found for polling.")
-            return
-        job_ids = [job.slurmjobid for job in running_jobs if job.slurmjobid]
+    async def update_running_jobs(self) -> tuple[int, int]:
+        """
+        Reconcile the status of every active HpcRun with Slurm.
+        :return: (number of active jobs, number of status transitions recorded)
+        """
+        # Fetch all HpcRun jobs which are not yet in a terminal state, no need to contact Slurm if there are none
+        active_jobs = await self.database_service.get_hpc_db().list_active_hpcruns()
+        if not active_jobs:
+            logger.debug("No active jobs found for polling.")
+            return 0, 0
+        # tasks of a job array share the array's job id
+        job_ids = sorted({job.slurmjobid for job in active_jobs if job.slurmjobid})
         if not job_ids:
-            logger.debug("No valid slurm job IDs found in running jobs.")
-            return
-        slurm_jobs_from_squeue = await self.slurm_service.get_job_status_squeue(job_ids)
-        slurm_jobs_from_sacct = await self.slurm_service.get_job_status_sacct(job_ids)
-        slurm_job_map = {job.job_id: job for job in slurm_jobs_from_squeue}
-        slurm_job_map.update({job.job_id: job for job in slurm_jobs_from_sacct})
-        for hpc_run in running_jobs:
-            slurm_job = slurm_job_map.get(hpc_run.slurmjobid)
+            logger.debug("No valid slurm job IDs found in active jobs.")
+            return 0, 0
+        transition_count = 0
+        terminal_hpcrun_ids: set[int] = set()
+        slurm_job_map = await self._get_changed_slurm_jobs(job_ids)
+        packed_task_states = await self._get_packed_task_states(active_jobs, slurm_job_map)
+        for hpc_run in active_jobs:
+            slurm_job = slurm_job_map.get((hpc_run.slurmjobid, hpc_run.slurm_array_task_id))
+            if slurm_job and hpc_run.packed_task_id is not None:
+                slurm_job = slurm_job.for_packed_task(
+                    packed_task_states.get((hpc_run.slurmjobid, hpc_run.packed_task_id))
+                )
             if not slurm_job or not slurm_job.job_state:
                 continue
             try:
@@ -105,11 +187,11 @@ class JobMonitor:
                 if new_status == hpc_run.status:
                     logger.debug(f"HpcRun {hpc_run.database_id} is still running with status {new_status}")
                     continue
-                if hpc_run.status != new_status:
-                    await self.database_service.get_hpc_db().update_hpcrun_status(
-                        hpcrun_id=hpc_run.database_id, new_slurm_job=slurm_job
-                    )
-                    logger.info(f"Updated HpcRun {hpc_run.database_id} status to {new_status}")
+                updated_hpc_run = await self.database_service.get_hpc_db().update_hpcrun_status(
+                    hpcrun_id=hpc_run.database_id, new_slurm_job=slurm_job
+                )
+                transition_count += 1
+                logger.info(f"Updated HpcRun {hpc_run.database_id} status to {new_status}")
             except ValueError as e:
                 logger.exception(
                     f"Error updating HpcRun {hpc_run.database_id} to status {slurm_job.job_state.lower()}."
@@ -117,21 +199,79 @@ class JobMonitor:
                     exc_info=e,
                 )
                 slurm_job.job_state = JobStatus.UNKNOWN.upper()
-                await self.database_service.get_hpc_db().update_hpcrun_status(
+                updated_hpc_run = await self.database_service.get_hpc_db().update_hpcrun_status(
                     hpcrun_id=hpc_run.database_id, new_slurm_job=slurm_job
                 )
+                transition_count += 1
 
-            if slurm_job.job_id in self.internal_listeners:
-                self.internal_listeners[slurm_job.job_id].put_nowait(hpc_run)
+            if updated_hpc_run.status is not None and updated_hpc_run.status.is_terminal():
+                terminal_hpcrun_ids.add(hpc_run.database_id)
+            if self.results_ingestor is not None:
+                self.results_ingestor.schedule(updated_hpc_run)
+        await self._remove_finished_packed_status_dirs(active_jobs, terminal_hpcrun_ids)
+        return len(active_jobs), transition_count
 
-    def internal_subscribe(self, queue: Queue[HpcRun], job_id: int) -> None:
-        self.internal_listeners[job_id] = queue
+    async def _get_changed_slurm_jobs(self, job_ids: list[int]) -> dict[SlurmJobKey, SlurmJob]:
+        """
+        Only ask sacct about jobs which finished since the previous poll (minus an overlap for accounting lag).
+        A full query of every tracked job runs on the first poll and periodically after that, to catch anything the
+        incremental windows missed.
+        """
+        settings = get_settings()
+        since: datetime.datetime | None = None
+        if (
+            self._sacct_watermark is not None
+            and self._polls_since_reconcile < settings.slurm_status_full_reconcile_polls
+        ):
+            since = self._sacct_watermark - datetime.timedelta(seconds=settings.slurm_status_overlap_seconds)
+            self._polls_since_reconcile += 1
+        else:
+            self._polls_since_reconcile = 0
+        slurm_job_map, self._sacct_watermark = await self.slurm_service.get_job_status_changes(
+            since=since, job_ids=job_ids
+        )
+        return slurm_job_map
 
-    def internal_unsubscribe(self, job_id: int) -> None:
-        self.internal_listeners.pop(job_id)
+    async def _get_packed_task_states(
+        self, active_jobs: list[HpcRun], slurm_job_map: dict[SlurmJobKey, SlurmJob]
+    ) -> dict[tuple[int, int], str]:
+        """
+        Slurm only knows about the allocation of a packed batch job, the state of each simulation inside it is read
+        from the status files its driver script writes. Only allocations Slurm reported on this poll are read.
+        """
+        packed_job_ids = sorted({
+            job.slurmjobid
+            for job in active_jobs
+            if job.packed_task_id is not None and (job.slurmjobid, None) in slurm_job_map
+        })
+        if not packed_job_ids:
+            return {}
+        return await self.slurm_service.get_packed_task_states(
+            status_root=get_slurm_packed_status_root(), job_ids=packed_job_ids
+        )
+
+    async def _remove_finished_packed_status_dirs(
+        self, active_jobs: list[HpcRun], terminal_hpcrun_ids: set[int]
+    ) -> None:
+        """
+        Remove the status files of packed batch jobs whose last active simulations reached a terminal status on this
+        poll, they are not read again. A failure only leaves the files behind.
+        """
+        packed_jobs = [job for job in active_jobs if job.packed_task_id is not None]
+        still_active = {job.slurmjobid for job in packed_jobs if job.database_id not in terminal_hpcrun_ids}
+        finished_job_ids = sorted({job.slurmjobid for job in packed_jobs} - still_active)
+        if not finished_job_ids:
+            return
+        try:
+            await self.slurm_service.remove_packed_status_dirs(
+                status_root=get_slurm_packed_status_root(), job_ids=finished_job_ids
+            )
+        except Exception:
+            logger.exception(f"Failed to remove the status files of packed batch jobs {finished_job_ids}")
 
     async def close(self) -> None:
         await self.stop_polling()
         logger.debug("Closing NATS client connection")
         if self.nats_client:
             await self.nats_client.close()
+        await self._worker_event_buffer.close()
@@ -70,10 +70,25 @@ class JobStatus(StrEnum):
     TIMEOUT = "timeout"
     UNKNOWN = "unknown"
 
+    def is_terminal(self) -> bool:
+        """True once Slurm will not change the status any more; UNKNOWN is not terminal, it is re-polled."""
+        return self in TERMINAL_JOB_STATUSES
+
+
+TERMINAL_JOB_STATUSES = frozenset({
+    JobStatus.COMPLETED,
+    JobStatus.FAILED,
+    JobStatus.CANCELLED,
+    JobStatus.OUT_OF_MEMORY,
+    JobStatus.TIMEOUT,
+})
+
 
 class HpcRun(BaseModel):
     database_id: int
     slurmjobid: int  # Slurm job ID if applicable
+    slurm_array_task_id: int | None = None  # task within the Slurm job array `slurmjobid`, if submitted as an array
+    packed_task_id: int | None = None  # task within the packed batch job `slurmjobid`, if submitted packed
     correlation_id: str  # to correlate with the WorkerEvent, if applicable ("N/A" if not applicable)
     job_type: JobType
     sim_id: int | None
@@ -211,6 +226,8 @@ class SimulationRequest(BaseModel):
     simulation_file_type: SimulationFileType
     end_time_point: float = 1.0
     is_batch: bool
+    content_sha256: str | None = None  # hash of request_file_path, computed while the upload was stored
+    staged_on_hpc: bool = False  # request_file_path is on the cluster already, see settings.upload_stream_to_hpc
 
 
 class SimulationResults(BaseModel):
@@ -222,6 +239,37 @@ class SimulationResults(BaseModel):
     path_on_server: Path
 
 
+class ColumnStatistics(BaseModel):
+    name: str
+    dtype: str  # polars/Arrow data type of the column
+    null_count: int
+    min: float | None = None  # min, max and mean are only computed for numeric columns
+    max: float | None = None
+    mean: float | None = None
+
+
+class ColumnarReport(BaseModel):
+    report_id: str  # path of the CSV report in the results zip, without the suffix
+    partition: str  # directory holding the report's Parquet files, relative to the dataset directory
+    num_rows: int
+    columns: list[ColumnStatistics]
+
+
+class ColumnarResults(BaseModel):
+    """
+    Manifest of the Parquet dataset ingested from a simulation's results zip, see results_ingestion.ResultsIngestor.
+    """
+
+    experiment_id: str
+    source_etag: str  # ETag of the results zip the dataset was built from
+    reports: list[ColumnarReport]
+
+
+class ResultsFormat(StrEnum):
+    JSON = "json"  # {column: [values]}
+    ARROW = "arrow"  # Arrow IPC stream
+
+
 class Simulation(BaseModel):
     """
     Everything required to execute the simulation and produce the same results.
@@ -256,6 +304,38 @@ class SimulationExperiment(BaseModel):
     metadata: Mapping[str, str] = Field(default_factory=dict)
 
 
+class DispatchStatus(StrEnum):
+    PENDING = "pending"  # waiting for a worker, possibly until a retry is due
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"  # gave up after settings.dispatch_max_attempts
+
+
+class DispatchedSimulation(BaseModel):
+    simulation_id: int
+    experiment_id: str
+    sim_request: SimulationRequest
+
+
+class SimulationDispatch(BaseModel):
+    """
+    Work item of the dispatch queue: submit already registered simulations of one simulator to Slurm.
+    """
+
+    simulator_id: int
+    simulations: list[DispatchedSimulation]
+    batch: bool = False  # submit as job arrays, or packed jobs with `packed`, see handlers.run_simulation_batch
+    packed: bool = False
+
+
+class DispatchJob(BaseModel):
+    database_id: int
+    dispatch: SimulationDispatch
+    status: DispatchStatus
+    attempts: int  # number of times a worker picked the job up
+    last_error: str | None = None
+
+
 class WorkerEvent(BaseModel):
     database_id: int | None = None  # Unique identifier for the worker event (created by the database)
     created_at: str | None = None  # ISO format datetime string (created by the database)
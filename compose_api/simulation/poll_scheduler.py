@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """
+    Decides how long JobMonitor sleeps between polls of the Slurm controller.
+
+    The interval drops to `min_interval` after a submission (`notify_activity`) or an observed state transition,
+    and grows by `backoff_factor` on every quiet poll, up to `active_max_interval` while jobs are in flight and up to
+    `max_interval` when nothing is. Independently of the interval, no more than `max_polls_per_minute` polls are
+    allowed in any sliding 60 second window, which bounds the load placed on the controller.
+    """
+
+    min_interval: float
+    max_interval: float
+    active_max_interval: float
+    backoff_factor: float
+    max_polls_per_minute: int
+    _interval: float
+    _poll_times: deque[float]
+    _wake_event: asyncio.Event
+
+    def __init__(
+        self,
+        min_interval: float,
+        max_interval: float,
+        active_max_interval: float,
+        backoff_factor: float,
+        max_polls_per_minute: int,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval or backoff_factor < 1 or max_polls_per_minute < 1:
+            raise ValueError(
+                f"invalid poll schedule: min_interval={min_interval} max_interval={max_interval} "
+                f"backoff_factor={backoff_factor} max_polls_per_minute={max_polls_per_minute}"
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.active_max_interval = min(max(active_max_interval, min_interval), max_interval)
+        self.backoff_factor = backoff_factor
+        self.max_polls_per_minute = max_polls_per_minute
+        self._interval = min_interval
+        self._poll_times = deque()
+        self._wake_event = asyncio.Event()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def notify_activity(self) -> None:
+        """Poll again as soon as the rate limit allows, e.g. right after a job was submitted."""
+        self._interval = self.min_interval
+        self._wake_event.set()
+
+    def record_poll(self, active_jobs: int, transitions: int) -> None:
+        if transitions > 0:
+            self._interval = self.min_interval
+            return
+        ceiling = self.active_max_interval if active_jobs > 0 else self.max_interval
+        self._interval = min(self._interval * self.backoff_factor, ceiling)
+
+    def _throttle_delay(self, now: float) -> float:
+        while self._poll_times and now - self._poll_times[0] >= 60:
+            self._poll_times.popleft()
+        if len(self._poll_times) < self.max_polls_per_minute:
+            return 0.0
+        return self._poll_times[0] + 60 - now
+
+    async def wait_for_next_poll(self, stop_event: asyncio.Event) -> None:
+        """Sleep for the current interval, cut short by notify_activity or stop_event, then apply the rate limit."""
+        await wait_any(events=[self._wake_event, stop_event], timeout=self._interval)
+        self._wake_event.clear()
+        throttle_delay = self._throttle_delay(time.monotonic())
+        if throttle_delay > 0 and not stop_event.is_set():
+            logger.debug(f"Slurm poll rate limit reached, delaying next poll by {throttle_delay:.1f}s")
+            await wait_any(events=[stop_event], timeout=throttle_delay)
+        self._poll_times.append(time.monotonic())
+
+
+async def wait_any(events: list[asyncio.Event], timeout: float) -> None:
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
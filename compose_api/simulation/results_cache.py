@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import BinaryIO
+
+from compose_api.config import get_local_cache_dir, get_settings
+from compose_api.simulation.data_service import ResultsFileInfo
+
+logger = logging.getLogger(__name__)
+
+_PARTIAL_SUFFIX = ".partial"
+_STALE_PARTIAL_SECONDS = 3600  # older partial files were left behind by a crashed process
+
+
+class ResultsCache:
+    """
+    Bounded on-disk cache of results archives on the API node.
+
+    Entries are keyed by experiment id and the archive's ETag, so a rewritten archive is fetched again. An entry is
+    written to a partial file and renamed into place once complete, so readers never see a half-written archive,
+    and concurrent misses for the same entry share one fetch. Whenever an entry is added, the least recently used
+    entries (by mtime, which is bumped on every hit) are evicted until the cache fits in `max_bytes`.
+    """
+
+    cache_dir: Path
+    max_bytes: int
+    _fetches: dict[Path, asyncio.Task[Path]]
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._fetches = {}
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, experiment_id: str, file_info: ResultsFileInfo) -> Path:
+        return self.cache_dir / f"{experiment_id}_{file_info.size:x}_{file_info.mtime:x}.zip"
+
+    def accepts(self, file_info: ResultsFileInfo) -> bool:
+        return 0 < file_info.size <= self.max_bytes
+
+    async def open(
+        self, experiment_id: str, file_info: ResultsFileInfo, fetch: Callable[[Path], Awaitable[None]]
+    ) -> BinaryIO:
+        """
+        Open the cached archive, calling `fetch(destination)` to populate the cache on a miss.
+        The file is opened before returning, so that an eviction can't pull it from under the caller.
+        """
+        entry_path = self._entry_path(experiment_id, file_info)
+        try:
+            return await asyncio.to_thread(self._open_hit, entry_path)
+        except FileNotFoundError:
+            pass
+
+        fetching = self._fetches.get(entry_path)
+        if fetching is None:
+            fetching = asyncio.create_task(self._populate(entry_path, fetch))
+            self._fetches[entry_path] = fetching
+
+            def forget(done: asyncio.Task[Path]) -> None:
+                if self._fetches.get(entry_path) is done:
+                    del self._fetches[entry_path]
+
+            fetching.add_done_callback(forget)
+        else:
+            logger.info(f"Waiting for results of {experiment_id} already being fetched.")
+        # a cancelled reader must not cancel the fetch the other readers depend on
+        await asyncio.shield(fetching)
+        return await asyncio.to_thread(self._open_hit, entry_path)
+
+    @staticmethod
+    def _open_hit(entry_path: Path) -> BinaryIO:
+        cached_file = open(entry_path, "rb")  # noqa: SIM115 closed by the caller
+        os.utime(entry_path)  # mark as recently used
+        return cached_file
+
+    async def _populate(self, entry_path: Path, fetch: Callable[[Path], Awaitable[None]]) -> Path:
+        partial_path = entry_path.with_name(f"{entry_path.name}.{uuid.uuid4().hex}{_PARTIAL_SUFFIX}")
+        try:
+            await fetch(partial_path)
+            await asyncio.to_thread(os.replace, partial_path, entry_path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        logger.info(f"Cached results archive {entry_path.name}")
+        await asyncio.to_thread(self._evict, entry_path)
+        return entry_path
+
+    def _evict(self, keep: Path) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        now = time.time()
+        for path in self.cache_dir.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # evicted concurrently, e.g. by another worker process
+            if path.name.endswith(_PARTIAL_SUFFIX):
+                if now - stat.st_mtime > _STALE_PARTIAL_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            logger.info(f"Evicted results archive {path.name} from the local cache")
+
+
+global_results_cache: ResultsCache | None = None
+
+
+def set_results_cache(results_cache: ResultsCache | None) -> None:
+    global global_results_cache
+    global_results_cache = results_cache
+
+
+def get_results_cache() -> ResultsCache | None:
+    """Process-wide results cache in get_local_cache_dir(), None if disabled (results_cache_max_bytes = 0)."""
+    global global_results_cache
+    if global_results_cache is None:
+        max_bytes = get_settings().results_cache_max_bytes
+        if max_bytes <= 0:
+            return None
+        global_results_cache = ResultsCache(cache_dir=get_local_cache_dir() / "results", max_bytes=max_bytes)
+    return global_results_cache
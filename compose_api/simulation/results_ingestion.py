@@ -0,0 +1,276 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+import polars as pl
+
+from compose_api.common.gateway.models import Namespace
+from compose_api.config import get_settings
+from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.data_service import DataService
+from compose_api.simulation.models import (
+    ColumnarReport,
+    ColumnarResults,
+    ColumnStatistics,
+    HpcRun,
+    JobStatus,
+    JobType,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "_manifest.json"
+REPORT_FILE_NAME = "data.parquet"
+_HDF5_SUFFIXES = frozenset({".h5", ".hdf5"})
+
+
+class ResultsIngestor:
+    """
+    Converts the CSV reports in a simulation's results zip into a Parquet dataset, so that single observables can be
+    read without downloading and unzipping the whole archive.
+
+    Every report becomes a hive partition `report=<id>/data.parquet` of the dataset in
+    DataService.get_columnar_results_dir. Parquet keeps the Arrow schema and row group statistics, the manifest
+    (`_manifest.json`, a ColumnarResults) adds per-column statistics over the whole report. Each build goes to a new
+    directory next to the dataset directory, which is a symlink swapped over to it once complete. The dataset is
+    rebuilt only if the results zip changed (by its ETag), and concurrent ingestions of an experiment share one build.
+    """
+
+    data_service: DataService
+    database_service: DatabaseService
+    _tasks: set[asyncio.Task[None]]
+    _ingesting: dict[str, asyncio.Task[ColumnarResults]]  # experiment id -> ingestion in progress
+
+    def __init__(self, data_service: DataService, database_service: DatabaseService) -> None:
+        self.data_service = data_service
+        self.database_service = database_service
+        self._tasks = set()
+        self._ingesting = {}
+
+    def schedule(self, hpc_run: HpcRun) -> None:
+        """Ingest the results of a simulation which just completed, in the background."""
+        if hpc_run.job_type != JobType.SIMULATION or hpc_run.status != JobStatus.COMPLETED or hpc_run.sim_id is None:
+            return
+        task = asyncio.create_task(self._ingest_simulation(hpc_run.sim_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _ingest_simulation(self, simulation_id: int) -> None:
+        try:
+            experiment_id = await self.database_service.get_simulator_db().get_simulations_experiment_id(
+                simulation_id=simulation_id
+            )
+            await self.ingest(experiment_id)
+        except Exception:
+            logger.exception(f"Failed to ingest the results of simulation {simulation_id}")
+
+    async def ingest(self, experiment_id: str) -> ColumnarResults:
+        ingesting = self._ingesting.get(experiment_id)
+        if ingesting is None:
+            ingesting = asyncio.create_task(self._ingest(experiment_id))
+            self._ingesting[experiment_id] = ingesting
+
+            def forget(done: asyncio.Task[ColumnarResults]) -> None:
+                if self._ingesting.get(experiment_id) is done:
+                    del self._ingesting[experiment_id]
+
+            ingesting.add_done_callback(forget)
+        # a cancelled caller must not cancel the ingestion other callers wait for
+        return await asyncio.shield(ingesting)
+
+    async def _ingest(self, experiment_id: str) -> ColumnarResults:
+        namespace = Namespace(get_settings().namespace)
+        file_info = await self.data_service.get_results_file_info(experiment_id, namespace)
+        dataset_dir = self.data_service.get_columnar_results_dir(experiment_id, namespace)
+        columnar_results = await asyncio.to_thread(read_manifest, dataset_dir)
+        if columnar_results is not None and columnar_results.source_etag == file_info.etag:
+            logger.debug(f"Results of {experiment_id} are already ingested")
+            return columnar_results
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results_zip = Path(temp_dir) / "results.zip"
+            await self.data_service.download_results(
+                experiment_id, namespace, destination=results_zip, size=file_info.size
+            )
+            columnar_results = await asyncio.to_thread(
+                _build_dataset,
+                results_zip=results_zip,
+                dataset_dir=dataset_dir,
+                experiment_id=experiment_id,
+                source_etag=file_info.etag,
+            )
+        logger.info(f"Ingested {len(columnar_results.reports)} reports of {experiment_id} into {dataset_dir}")
+        return columnar_results
+
+    async def close(self) -> None:
+        tasks: list[asyncio.Task[Any]] = [*self._tasks, *self._ingesting.values()]
+        self._tasks, self._ingesting = set(), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def read_manifest(dataset_dir: Path) -> ColumnarResults | None:
+    manifest_file = dataset_dir / MANIFEST_FILE_NAME
+    if not manifest_file.exists():
+        return None
+    return ColumnarResults.model_validate_json(manifest_file.read_text())
+
+
+def find_report(columnar_results: ColumnarResults, report_id: str | None) -> ColumnarReport:
+    """
+    The report with id `report_id`, which may be omitted if the results have a single report.
+    :raises LookupError: if there is no such report
+    :raises ValueError: if `report_id` is omitted but the results have several reports
+    """
+    if report_id is None:
+        if len(columnar_results.reports) != 1:
+            report_ids = [report.report_id for report in columnar_results.reports]
+            raise ValueError(f"Results of {columnar_results.experiment_id} have reports {report_ids}, pick one")
+        return columnar_results.reports[0]
+    for report in columnar_results.reports:
+        if report.report_id == report_id:
+            return report
+    raise LookupError(f"Results of {columnar_results.experiment_id} have no report {report_id}")
+
+
+def select_columns(report: ColumnarReport, observables: list[str], time_column: str) -> list[str]:
+    """
+    Columns of the report matching `observables`, by name or, for observables starting with "^", by regex.
+    No observables select every column. The time column comes first, if the report has one.
+    :raises ValueError: if an observable matches no column or is an invalid regex
+    """
+    column_names = [column.name for column in report.columns]
+    selected = set(column_names) if not observables else set()
+    for observable in observables:
+        if observable.startswith("^"):
+            try:
+                pattern = re.compile(observable)
+            except re.error as e:
+                raise ValueError(f"Invalid observable pattern {observable}: {e}") from e
+            matches = {name for name in column_names if pattern.search(name)}
+        else:
+            matches = {observable} & set(column_names)
+        if not matches:
+            raise ValueError(f"No column of report {report.report_id} matches {observable}")
+        selected |= matches
+    if time_column in column_names:
+        return [time_column, *(name for name in column_names if name in selected and name != time_column)]
+    return [name for name in column_names if name in selected]
+
+
+def query_report(
+    dataset_dir: Path,
+    report: ColumnarReport,
+    columns: list[str],
+    time_column: str,
+    start_time: float | None,
+    end_time: float | None,
+    limit: int | None,
+) -> pl.DataFrame:
+    """
+    Read `columns` of the rows with `start_time <= time_column <= end_time` (either bound optional), at most `limit`.
+    The scan is lazy: only the selected columns are read, and row groups outside the time range are skipped.
+    :raises ValueError: if a time range is given but the report has no `time_column`
+    """
+    lazy_frame = pl.scan_parquet(dataset_dir / report.partition / REPORT_FILE_NAME)
+    if start_time is not None or end_time is not None:
+        if time_column not in [column.name for column in report.columns]:
+            raise ValueError(f"Report {report.report_id} has no time column {time_column}")
+        if start_time is not None:
+            lazy_frame = lazy_frame.filter(pl.col(time_column) >= start_time)
+        if end_time is not None:
+            lazy_frame = lazy_frame.filter(pl.col(time_column) <= end_time)
+    lazy_frame = lazy_frame.select(columns)
+    if limit is not None:
+        lazy_frame = lazy_frame.head(limit)
+    return lazy_frame.collect()
+
+
+def _build_dataset(results_zip: Path, dataset_dir: Path, experiment_id: str, source_etag: str) -> ColumnarResults:
+    dataset_dir.parent.mkdir(parents=True, exist_ok=True)
+    version_dir = dataset_dir.with_name(f"{dataset_dir.name}.{uuid.uuid4().hex}")
+    version_dir.mkdir()
+    try:
+        reports: list[ColumnarReport] = []
+        with zipfile.ZipFile(results_zip) as archive:
+            for member in sorted(archive.infolist(), key=lambda info: info.filename):
+                member_path = PurePosixPath(member.filename)
+                if member.is_dir():
+                    continue
+                if member_path.suffix.lower() in _HDF5_SUFFIXES:
+                    logger.warning(f"Skipping HDF5 report {member.filename} of {experiment_id}, only CSV is ingested")
+                    continue
+                if member_path.suffix.lower() != ".csv":
+                    continue
+                with archive.open(member) as report_file:
+                    frame = pl.read_csv(report_file.read())
+                report_id = str(member_path.with_suffix(""))
+                reports.append(_write_report(frame, report_id=report_id, dataset_dir=version_dir))
+        columnar_results = ColumnarResults(experiment_id=experiment_id, source_etag=source_etag, reports=reports)
+        (version_dir / MANIFEST_FILE_NAME).write_text(columnar_results.model_dump_json(indent=2))
+
+        current_results = read_manifest(dataset_dir)
+        if current_results is not None and current_results.source_etag == source_etag:
+            # another process sharing the cache ingested the same results meanwhile
+            shutil.rmtree(version_dir, ignore_errors=True)
+            return current_results
+        _swap_in(version_dir, dataset_dir)
+        return columnar_results
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+
+def _swap_in(version_dir: Path, dataset_dir: Path) -> None:
+    """
+    Point the `dataset_dir` symlink at `version_dir` and remove the dataset it pointed at before. The symlink is
+    replaced atomically, so readers see either the previous or the new dataset, never none.
+    """
+    previous_dir = dataset_dir.resolve() if dataset_dir.is_symlink() else None
+    if previous_dir is None and dataset_dir.exists():
+        # a dataset directory from before datasets were swapped in by symlink, briefly missing once
+        previous_dir = dataset_dir.with_name(f"{dataset_dir.name}.{uuid.uuid4().hex}.stale")
+        dataset_dir.rename(previous_dir)
+    link = dataset_dir.with_name(f"{dataset_dir.name}.{uuid.uuid4().hex}.link")
+    link.symlink_to(version_dir.name, target_is_directory=True)
+    os.replace(link, dataset_dir)
+    if previous_dir is not None and previous_dir != version_dir:
+        shutil.rmtree(previous_dir, ignore_errors=True)
+
+
+def _write_report(frame: pl.DataFrame, report_id: str, dataset_dir: Path) -> ColumnarReport:
+    partition = f"report={re.sub(r'[^A-Za-z0-9._-]', '_', report_id)}"
+    suffix = 1
+    while (dataset_dir / partition).exists():  # distinct report ids which sanitize to the same name
+        suffix += 1
+        partition = f"{partition.rsplit('~', 1)[0]}~{suffix}"
+    (dataset_dir / partition).mkdir()
+    frame.write_parquet(dataset_dir / partition / REPORT_FILE_NAME, compression="zstd", statistics=True)
+    return ColumnarReport(
+        report_id=report_id, partition=partition, num_rows=frame.height, columns=_column_statistics(frame)
+    )
+
+
+def _column_statistics(frame: pl.DataFrame) -> list[ColumnStatistics]:
+    column_statistics: list[ColumnStatistics] = []
+    for name, dtype in frame.schema.items():
+        column = frame.get_column(name)
+        statistics = ColumnStatistics(name=name, dtype=str(dtype), null_count=column.null_count())
+        if dtype.is_numeric() and column.null_count() < frame.height:
+            statistics.min = _as_float(column.min())
+            statistics.max = _as_float(column.max())
+            statistics.mean = _as_float(column.mean())
+        column_statistics.append(statistics)
+    return column_statistics
+
+
+def _as_float(value: object) -> float | None:
+    return float(value) if isinstance(value, int | float) else None
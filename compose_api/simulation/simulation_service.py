@@ -3,9 +3,10 @@ import logging
 import random
 import string
 import tempfile
+import uuid
 from abc import ABC, abstractmethod
 from pathlib import Path
-from textwrap import dedent
+from textwrap import dedent, indent
 
 from typing_extensions import override
 
@@ -15,16 +16,28 @@ from compose_api.common.ssh.ssh_service import SSHService, get_ssh_service
 from compose_api.config import Settings, get_settings
 from compose_api.simulation.hpc_utils import (
     get_correlation_id,
+    get_slurm_batch_job_name,
+    get_slurm_batch_manifest_file,
     get_slurm_job_name,
     get_slurm_log_file,
+    get_slurm_packed_status_dir,
     get_slurm_sim_experiment_dir,
     get_slurm_sim_input_file_path,
     get_slurm_sim_results_file_path,
     get_slurm_singularity_container_file,
     get_slurm_singularity_def_file,
     get_slurm_submit_file,
+    get_slurm_upload_staging_dir,
+    get_slurm_upload_staging_file,
+)
+from compose_api.simulation.models import (
+    HpcRun,
+    JobType,
+    RemoteContainerImage,
+    Simulation,
+    SimulationRequest,
+    SimulatorVersion,
 )
-from compose_api.simulation.models import HpcRun, JobType, RemoteContainerImage, Simulation, SimulatorVersion
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -36,7 +49,58 @@ class SimulationService(ABC):
         self,
         simulation: Simulation,
         experiment_id: str,
+        dependency_job_id: int | None = None,
+    ) -> int:
+        """
+        Submit one simulation as a Slurm job. With `dependency_job_id` (e.g. the job building the simulator's container)
+        Slurm holds the simulation until that job completes successfully, and cancels it if that job fails.
+        """
+        pass
+
+    @abstractmethod
+    async def submit_simulation_array(
+        self, simulations: list[Simulation], experiment_ids: list[str], dependency_job_id: int | None = None
     ) -> int:
+        """
+        Submit simulations sharing a simulator as one Slurm job array, task i runs simulations[i].
+        `dependency_job_id` as in submit_simulation_job.
+        """
+        pass
+
+    @abstractmethod
+    async def submit_simulation_packed(
+        self, simulations: list[Simulation], experiment_ids: list[str], dependency_job_id: int | None = None
+    ) -> int:
+        """
+        Submit simulations sharing a simulator as a single Slurm job which runs them side by side, one per core.
+        simulations[i] is tracked as packed task i of the returned job. `dependency_job_id` as in submit_simulation_job.
+        """
+        pass
+
+    @abstractmethod
+    async def stage_input_files(self, sim_requests: list[SimulationRequest]) -> list[SimulationRequest]:
+        """
+        Copy inputs which only exist on this node to the cluster's upload staging area, so that a submission still
+        finds them after a restart of the API (see DispatchQueue). Inputs staged at upload time are kept as they are.
+        :return: the requests, pointing at the staged inputs
+        """
+        pass
+
+    @abstractmethod
+    async def discard_staged_inputs(self, sim_requests: list[SimulationRequest]) -> None:
+        """
+        Delete the staged inputs of requests which will not be submitted (e.g. cache hits, failed submissions).
+        Failures are only logged, remove_stale_staged_uploads catches whatever is left behind.
+        """
+        pass
+
+    @abstractmethod
+    async def remove_stale_staged_uploads(self, max_age_seconds: int) -> int:
+        """
+        Delete files in the upload staging area not modified for `max_age_seconds`, i.e. inputs of submissions which
+        never happened, since a submitted input is moved into its experiment directory.
+        :return: number of files deleted
+        """
         pass
 
     @abstractmethod
@@ -52,6 +116,69 @@ class SimulationService(ABC):
         pass
 
 
+def _run_simulation_script(
+    experiment_path: str, input_file_name: str, end_time_point: str, singularity_container_path: Path
+) -> str:
+    """
+    Shell commands running one simulation in its experiment directory and zipping the output to results.zip.
+    Arguments are interpolated verbatim so they may be shell variables, e.g. for the tasks of a job array.
+    """
+    # --compat forces isolation similar to docker, https://docs.sylabs.io/guides/latest/user-guide/cli/singularity_exec.html
+    return dedent(f"""\
+        mkdir "{experiment_path}/output"
+        echo "Simulation {input_file_name} running."
+        singularity run \
+            --compat \
+            --bind "{experiment_path}":/experiment \
+            {singularity_container_path} \
+            run \
+            "/experiment/{input_file_name}" \
+            -o "{get_settings().containers_output_dir}" \
+            -n {end_time_point}
+
+        pushd "{experiment_path}"
+        cd output
+        zip -r ../results.zip ./*
+        cd ..
+        rm -r output
+        popd
+        echo "Simulation run completed. data saved to {experiment_path}."
+        """)
+
+
+def _batch_manifest(
+    simulations: list[Simulation], experiment_ids: list[str], max_size: int
+) -> tuple[str, list[tuple[Path, Path]], list[tuple[Path, Path]], list[str]]:
+    """
+    Validate a batch and describe it for the driver script.
+    :return: (shared container hash, (local, remote) input files, (staged, remote) input files already on the
+        cluster, manifest lines where line i describes task i)
+    """
+    if len(simulations) != len(experiment_ids) or len(simulations) == 0:
+        raise ValueError(f"Need one experiment id per simulation, got {len(simulations)} and {len(experiment_ids)}")
+    if len(simulations) > max_size:
+        raise ValueError(f"{len(simulations)} simulations exceed the batch limit of {max_size}")
+    container_hashes = {simulation.simulator_version.container_def_hash for simulation in simulations}
+    if len(container_hashes) != 1:
+        raise ValueError(f"Simulations of one batch must share a simulator, got {container_hashes}")
+
+    input_files: list[tuple[Path, Path]] = []
+    staged_input_files: list[tuple[Path, Path]] = []
+    manifest_lines: list[str] = []
+    for simulation, experiment_id in zip(simulations, experiment_ids):
+        if simulation.sim_request.request_file_path is None:
+            raise RuntimeError(f"Input file of simulation {simulation.database_id} is not available.")
+        slurm_job_name = get_slurm_job_name(experiment_id=experiment_id)
+        suffix = simulation.sim_request.simulation_file_type.get_files_suffix()
+        remote_input_file = get_slurm_sim_experiment_dir(experiment_id=slurm_job_name) / f"{slurm_job_name}.{suffix}"
+        if simulation.sim_request.staged_on_hpc:
+            staged_input_files.append((simulation.sim_request.request_file_path, remote_input_file))
+        else:
+            input_files.append((simulation.sim_request.request_file_path, remote_input_file))
+        manifest_lines.append(f"{slurm_job_name}|{suffix}|{simulation.sim_request.end_time_point}")
+    return container_hashes.pop(), input_files, staged_input_files, manifest_lines
+
+
 class SimulationServiceHpc(SimulationService):
     _latest_commit_hash: str | None = None
 
@@ -66,24 +193,17 @@ class SimulationServiceHpc(SimulationService):
         self,
         simulation: Simulation,
         experiment_id: str,
+        dependency_job_id: int | None = None,
     ) -> int:
         if simulation.sim_request.request_file_path is None:
             raise RuntimeError("Simulation.sim_request.omex_archive is not available. Cannot submit Simulation job.")
-        slurm_service, ssh_service, settings = self._get_services()
+        slurm_service, _, settings = self._get_services()
         slurm_job_name = get_slurm_job_name(experiment_id=experiment_id)
-        singularity_container_path = get_slurm_singularity_container_file(
-            singularity_hash=simulation.simulator_version.container_def_hash
-        )
         experiment_path = get_slurm_sim_experiment_dir(experiment_id=slurm_job_name)
 
         # build the submit script
         with tempfile.TemporaryDirectory() as tmpdir:
-            local_singularity_file = tmpdir + "/singularity.def"
-            with open(local_singularity_file, "w") as f:
-                f.write(simulation.simulator_version.container_def.representation)
-
             local_submit_file = Path(tmpdir) / f"{slurm_job_name}.sbatch"
-            # --compat forces isolation similar to docker, https://docs.sylabs.io/guides/latest/user-guide/cli/singularity_exec.html
             with open(local_submit_file, "w") as f:
                 script_content = dedent(f"""\
                     #!/bin/bash
@@ -95,52 +215,222 @@ class SimulationServiceHpc(SimulationService):
                     #SBATCH --qos={settings.batch_slurm_qos if simulation.sim_request.is_batch else settings.slurm_qos}
                     #SBATCH --output={get_slurm_log_file(slurm_job_name=slurm_job_name)}
                     {f"#SBATCH --nodelist={settings.slurm_node_list}" if len(settings.slurm_node_list) != 0 else ""}
+                    {f"#SBATCH --dependency=afterok:{dependency_job_id}" if dependency_job_id is not None else ""}
+                    {"#SBATCH --kill-on-invalid-dep=yes" if dependency_job_id is not None else ""}
 
                     set -e
 
-                    mkdir {experiment_path}/output
-                    echo "Simulation {slurm_job_name} running."
-                    singularity run \
-                        --compat \
-                        --bind {experiment_path}:/experiment \
-                        {singularity_container_path} \
-                        run \
-                        /experiment/{slurm_job_name}.{simulation.sim_request.simulation_file_type.get_files_suffix()} \
-                        -o "{get_settings().containers_output_dir}" \
-                        -n {simulation.sim_request.end_time_point}
-
-                    pushd {experiment_path}
-                    cd output
-                    zip -r ../results.zip ./*
-                    cd ..
-                    rm -r output
-                    popd
-                    echo "Simulation run completed. data saved to {experiment_path!s}."
                     """)
+                script_content += _run_simulation_script(
+                    experiment_path=str(experiment_path),
+                    input_file_name=f"{slurm_job_name}.{simulation.sim_request.simulation_file_type.get_files_suffix()}",
+                    end_time_point=str(simulation.sim_request.end_time_point),
+                    singularity_container_path=get_slurm_singularity_container_file(
+                        singularity_hash=simulation.simulator_version.container_def_hash
+                    ),
+                )
                 f.write(script_content)
 
-            await ssh_service.run_command(f"mkdir {experiment_path}")
-            # submit the build script to slurm
+            # stage the files and submit in one step, submit_job also creates the experiment directory.
+            # The job is named after the experiment, so a retried dispatch finds it rather than submitting it twice
+            input_file = simulation.sim_request.request_file_path
+            staged_on_hpc = simulation.sim_request.staged_on_hpc
             slurm_jobid = await slurm_service.submit_job(
                 local_sbatch_file=local_submit_file,
                 remote_sbatch_file=get_slurm_submit_file(slurm_job_name=slurm_job_name),
-                local_input_file=simulation.sim_request.request_file_path,
+                local_input_file=None if staged_on_hpc else input_file,
                 remote_input_file=get_slurm_sim_input_file_path(experiment_id=slurm_job_name),
+                staged_input_file=input_file if staged_on_hpc else None,
+                job_name=slurm_job_name,
             )
             return slurm_jobid
 
+    @override
+    async def submit_simulation_array(
+        self, simulations: list[Simulation], experiment_ids: list[str], dependency_job_id: int | None = None
+    ) -> int:
+        slurm_service, _, settings = self._get_services()
+        container_hash, input_files, staged_input_files, manifest_lines = _batch_manifest(
+            simulations=simulations, experiment_ids=experiment_ids, max_size=settings.slurm_max_array_size
+        )
+        array_name = get_slurm_batch_job_name(experiment_ids=experiment_ids, prefix="array")
+        manifest_file = get_slurm_batch_manifest_file(slurm_job_name=array_name)
+
+        max_concurrent = (
+            f"%{settings.slurm_array_max_concurrent_tasks}" if settings.slurm_array_max_concurrent_tasks else ""
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_manifest_file = Path(tmpdir) / manifest_file.name
+            with open(local_manifest_file, "w") as f:
+                f.write("\n".join(manifest_lines) + "\n")
+
+            local_submit_file = Path(tmpdir) / f"{array_name}.sbatch"
+            with open(local_submit_file, "w") as f:
+                script_content = dedent(f"""\
+                    #!/bin/bash
+                    #SBATCH --job-name={array_name}
+                    #SBATCH --array=0-{len(simulations) - 1}{max_concurrent}
+                    #SBATCH --time=30:00
+                    #SBATCH --cpus-per-task 1
+                    #SBATCH --mem=1GB
+                    #SBATCH --partition={settings.batch_slurm_partition}
+                    #SBATCH --qos={settings.batch_slurm_qos}
+                    #SBATCH --output={get_slurm_log_file(slurm_job_name=f"{array_name}_%a")}
+                    {f"#SBATCH --nodelist={settings.slurm_node_list}" if len(settings.slurm_node_list) != 0 else ""}
+                    {f"#SBATCH --dependency=afterok:{dependency_job_id}" if dependency_job_id is not None else ""}
+                    {"#SBATCH --kill-on-invalid-dep=yes" if dependency_job_id is not None else ""}
+
+                    set -e
+
+                    IFS='|' read -r EXPERIMENT_ID FILE_SUFFIX END_TIME_POINT < <(sed -n "$((SLURM_ARRAY_TASK_ID + 1))p" {manifest_file})
+                    EXPERIMENT_PATH={get_slurm_sim_experiment_dir(experiment_id="$EXPERIMENT_ID")}
+
+                    """)
+                script_content += _run_simulation_script(
+                    experiment_path="$EXPERIMENT_PATH",
+                    input_file_name="$EXPERIMENT_ID.$FILE_SUFFIX",
+                    end_time_point="$END_TIME_POINT",
+                    singularity_container_path=get_slurm_singularity_container_file(singularity_hash=container_hash),
+                )
+                f.write(script_content)
+
+            return await slurm_service.submit_array_job(
+                local_sbatch_file=local_submit_file,
+                remote_sbatch_file=get_slurm_submit_file(slurm_job_name=array_name),
+                input_files=[(local_manifest_file, manifest_file), *input_files],
+                staged_input_files=staged_input_files,
+                job_name=array_name,
+            )
+
+    @override
+    async def submit_simulation_packed(
+        self, simulations: list[Simulation], experiment_ids: list[str], dependency_job_id: int | None = None
+    ) -> int:
+        slurm_service, _, settings = self._get_services()
+        container_hash, input_files, staged_input_files, manifest_lines = _batch_manifest(
+            simulations=simulations, experiment_ids=experiment_ids, max_size=settings.slurm_packed_max_simulations
+        )
+        packed_name = get_slurm_batch_job_name(experiment_ids=experiment_ids, prefix="packed")
+        manifest_file = get_slurm_batch_manifest_file(slurm_job_name=packed_name)
+        cpus = min(settings.slurm_packed_cpus_per_job, len(simulations))
+        simulation_commands = _run_simulation_script(
+            experiment_path="$EXPERIMENT_PATH",
+            input_file_name="$EXPERIMENT_ID.$FILE_SUFFIX",
+            end_time_point="$END_TIME_POINT",
+            singularity_container_path=get_slurm_singularity_container_file(singularity_hash=container_hash),
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            local_manifest_file = Path(tmpdir) / manifest_file.name
+            with open(local_manifest_file, "w") as f:
+                f.write("\n".join(manifest_lines) + "\n")
+
+            local_submit_file = Path(tmpdir) / f"{packed_name}.sbatch"
+            with open(local_submit_file, "w") as f:
+                # every simulation runs in a subshell with its own output, its outcome is recorded as
+                # "<STATE>|<timestamp>" in $STATUS_DIR/<task id> for JobMonitor, see SlurmService.get_packed_task_states
+                script_content = dedent(f"""\
+                    #!/bin/bash
+                    #SBATCH --job-name={packed_name}
+                    #SBATCH --time={settings.slurm_packed_time_limit}
+                    #SBATCH --nodes=1
+                    #SBATCH --ntasks=1
+                    #SBATCH --cpus-per-task {cpus}
+                    #SBATCH --mem-per-cpu=1GB
+                    #SBATCH --partition={settings.batch_slurm_partition}
+                    #SBATCH --qos={settings.batch_slurm_qos}
+                    #SBATCH --output={get_slurm_log_file(slurm_job_name=packed_name)}
+                    {f"#SBATCH --nodelist={settings.slurm_node_list}" if len(settings.slurm_node_list) != 0 else ""}
+                    {f"#SBATCH --dependency=afterok:{dependency_job_id}" if dependency_job_id is not None else ""}
+                    {"#SBATCH --kill-on-invalid-dep=yes" if dependency_job_id is not None else ""}
+
+                    STATUS_DIR={get_slurm_packed_status_dir(slurm_job_id="$SLURM_JOB_ID")}
+                    mkdir -p "$STATUS_DIR"
+
+                    run_task() {{
+                        local TASK_ID=$1 EXPERIMENT_ID=$2 FILE_SUFFIX=$3 END_TIME_POINT=$4 STATE
+                        local EXPERIMENT_PATH={get_slurm_sim_experiment_dir(experiment_id="$EXPERIMENT_ID")}
+                        echo "RUNNING|$(date +%Y-%m-%dT%H:%M:%S)" > "$STATUS_DIR/$TASK_ID"
+                        (
+                            set -e
+                    """)
+                script_content += indent(simulation_commands, " " * 8)
+                script_content += dedent(f"""\
+                        ) > "$EXPERIMENT_PATH/simulation.log" 2>&1 < /dev/null
+                        # not "if ( ... )", set -e has no effect inside an if condition
+                        if [ $? -eq 0 ]; then STATE=COMPLETED; else STATE=FAILED; fi
+                        echo "$STATE|$(date +%Y-%m-%dT%H:%M:%S)" > "$STATUS_DIR/$TASK_ID"
+                    }}
+
+                    TASK_ID=0
+                    while IFS='|' read -r EXPERIMENT_ID FILE_SUFFIX END_TIME_POINT; do
+                        while [ "$(jobs -rp | wc -l)" -ge "$SLURM_CPUS_PER_TASK" ]; do
+                            wait -n
+                        done
+                        run_task "$TASK_ID" "$EXPERIMENT_ID" "$FILE_SUFFIX" "$END_TIME_POINT" &
+                        TASK_ID=$((TASK_ID + 1))
+                    done < {manifest_file}
+                    wait
+                    echo "Packed batch {packed_name} completed."
+                    """)
+                f.write(script_content)
+
+            return await slurm_service.submit_array_job(
+                local_sbatch_file=local_submit_file,
+                remote_sbatch_file=get_slurm_submit_file(slurm_job_name=packed_name),
+                input_files=[(local_manifest_file, manifest_file), *input_files],
+                staged_input_files=staged_input_files,
+                job_name=packed_name,
+            )
+
+    @override
+    async def stage_input_files(self, sim_requests: list[SimulationRequest]) -> list[SimulationRequest]:
+        _, ssh_service, _ = self._get_services()
+        uploads: list[tuple[Path, Path]] = []
+        staged_requests: list[SimulationRequest] = []
+        for sim_request in sim_requests:
+            if sim_request.staged_on_hpc:
+                staged_requests.append(sim_request)
+                continue
+            staged_path = get_slurm_upload_staging_file(
+                upload_id=uuid.uuid4().hex, suffix=f".{sim_request.simulation_file_type.get_files_suffix()}"
+            )
+            uploads.append((sim_request.request_file_path, staged_path))
+            staged_requests.append(
+                sim_request.model_copy(update={"request_file_path": staged_path, "staged_on_hpc": True})
+            )
+        if uploads:
+            await ssh_service.sftp_upload_many(uploads)
+        return staged_requests
+
+    @override
+    async def discard_staged_inputs(self, sim_requests: list[SimulationRequest]) -> None:
+        _, ssh_service, _ = self._get_services()
+        staged_files = [str(sim_request.request_file_path) for sim_request in sim_requests if sim_request.staged_on_hpc]
+        if not staged_files:
+            return
+        try:
+            await ssh_service.run_command(f"rm -f {' '.join(staged_files)}")
+        except RuntimeError:
+            logger.warning(f"Failed to remove staged inputs {staged_files}, leaving them to the staged upload sweep")
+
+    @override
+    async def remove_stale_staged_uploads(self, max_age_seconds: int) -> int:
+        _, ssh_service, _ = self._get_services()
+        staging_dir = get_slurm_upload_staging_dir()
+        max_age_minutes = max(max_age_seconds // 60, 1)
+        _, stdout, _ = await ssh_service.run_command(
+            f"[ ! -d {staging_dir} ] || find {staging_dir} -maxdepth 1 -type f -mmin +{max_age_minutes} -print -delete"
+        )
+        return len(stdout.split())
+
     async def get_slurm_job(self, slurmjobid: int) -> SlurmJob | None:
         slurm_service, _, _ = self._get_services()
-        job_ids: list[SlurmJob] = await slurm_service.get_job_status_squeue(job_ids=[slurmjobid])
-        if len(job_ids) == 0:
-            job_ids = await slurm_service.get_job_status_sacct(job_ids=[slurmjobid])
-            if len(job_ids) == 0:
-                logger.warning(f"No job found with ID {slurmjobid} in both squeue and sacct.")
-                return None
-        if len(job_ids) == 1:
-            return job_ids[0]
-        else:
-            raise RuntimeError(f"Multiple jobs found with ID {slurmjobid}: {job_ids}")
+        slurm_job_map = await slurm_service.get_job_status(job_ids=[slurmjobid])
+        slurm_job = slurm_job_map.get((slurmjobid, None))
+        if slurm_job is None:
+            logger.warning(f"No job found with ID {slurmjobid} in both squeue and sacct.")
+        return slurm_job
 
     @override
     async def build_container(self, simulator_version: SimulatorVersion, random_str: str) -> HpcRun:
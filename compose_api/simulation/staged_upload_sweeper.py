@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+from compose_api.config import get_settings
+from compose_api.simulation.poll_scheduler import wait_any
+from compose_api.simulation.simulation_service import SimulationService
+
+logger = logging.getLogger(__name__)
+
+
+class StagedUploadSweeper:
+    """
+    Deletes inputs left in the cluster's upload staging area. A submitted input is moved into its experiment
+    directory, and the API deletes the inputs it gives up on, but inputs of a replica dying between staging and
+    submission remain. Every `upload_staging_sweep_interval_seconds` the files older than
+    `upload_staging_max_age_seconds` are deleted. Replicas may all run the sweep, deleting a file twice is harmless.
+    """
+
+    simulation_service: SimulationService
+    _task: asyncio.Task[None] | None = None
+    _stop_event: asyncio.Event
+
+    def __init__(self, simulation_service: SimulationService) -> None:
+        self.simulation_service = simulation_service
+        self._stop_event = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            logger.warning("Staged upload sweeper already running.")
+            return
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._sweep_loop())
+
+    async def close(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def run_once(self) -> None:
+        removed = await self.simulation_service.remove_stale_staged_uploads(
+            max_age_seconds=get_settings().upload_staging_max_age_seconds
+        )
+        if removed:
+            logger.info(f"Removed {removed} stale staged uploads")
+
+    async def _sweep_loop(self) -> None:
+        interval = get_settings().upload_staging_sweep_interval_seconds
+        while not self._stop_event.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Error sweeping stale staged uploads")
+            await wait_any(events=[self._stop_event], timeout=interval)
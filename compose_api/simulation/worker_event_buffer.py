@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from asyncio import Queue, QueueEmpty
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.models import WorkerEvent
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventBuffer:
+    """
+    Micro-batches worker events on their way to the database.
+
+    Events are queued by `put` and written by a single background task, with one multi-row insert per batch. A batch
+    is written once it holds `batch_size` events, or `flush_interval_seconds` after its first event arrived, whichever
+    comes first. A batch failing with a transient error (e.g. a dropped connection) is retried up to `max_retries` times
+    with exponential backoff; after that, or on any other error, its events are inserted one by one so that a single
+    bad event does not take the rest of the batch with it.
+
+    The queue holds at most `max_pending` events, once it is full `put` waits. This bounds the memory of the buffer,
+    but it is no backpressure on core NATS: the client keeps reading messages into the subscription's pending queue,
+    and drops them as a slow consumer beyond `pending_msgs_limit` (see JobMonitor.subscribe_nats, log_nats_error).
+    """
+
+    database_service: DatabaseService
+    batch_size: int
+    flush_interval_seconds: float
+    max_retries: int
+    retry_backoff_seconds: float
+    _queue: Queue[WorkerEvent]
+    _flush_task: asyncio.Task[None] | None = None
+
+    def __init__(
+        self,
+        database_service: DatabaseService,
+        batch_size: int,
+        flush_interval_seconds: float,
+        max_pending: int,
+        max_retries: int,
+        retry_backoff_seconds: float,
+    ) -> None:
+        self.database_service = database_service
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue = Queue(maxsize=max_pending)
+
+    def start(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def put(self, worker_event: WorkerEvent) -> None:
+        """Queue an event with its `hpcrun_id` set, waiting while the buffer is full."""
+        if self._flush_task is None:
+            raise RuntimeError("WorkerEventBuffer is not started")
+        await self._queue.put(worker_event)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                if not await self._insert_batch(batch):
+                    await self._insert_one_by_one(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _insert_batch(self, batch: list[WorkerEvent]) -> bool:
+        hpc_db = self.database_service.get_hpc_db()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await hpc_db.insert_worker_events(batch)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_transient(e):
+                    logger.warning(f"Failed to insert {len(batch)} worker events, inserting them one by one: {e!r}")
+                    return False
+                delay = self.retry_backoff_seconds * 2**attempt
+                logger.warning(f"Failed to insert {len(batch)} worker events, retrying in {delay:.1f}s: {e!r}")
+                await asyncio.sleep(delay)
+            else:
+                logger.debug(f"Inserted {len(batch)} worker events")
+                return True
+        return False
+
+    async def _insert_one_by_one(self, batch: list[WorkerEvent]) -> None:
+        hpc_db = self.database_service.get_hpc_db()
+        dropped = 0
+        for worker_event in batch:
+            try:
+                await hpc_db.insert_worker_events([worker_event])
+            except Exception as e:
+                dropped += 1
+                logger.debug(f"Failed to insert worker event {worker_event.correlation_id}: {e!r}")
+        if dropped:
+            logger.error(f"Dropped {dropped} of {len(batch)} worker events which could not be inserted")
+
+    async def _next_batch(self) -> list[WorkerEvent]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval_seconds
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except TimeoutError:
+                break
+        return batch
+
+    async def close(self) -> None:
+        """Write the queued events and stop."""
+        if self._flush_task is None:
+            return
+        if not self._flush_task.done():
+            await self._queue.join()
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+
+
+def _is_transient(e: Exception) -> bool:
+    """Whether inserting the same events again may succeed, unlike e.g. after a foreign key violation."""
+    if isinstance(e, DBAPIError):
+        return e.connection_invalidated or isinstance(e, OperationalError | InterfaceError)
+    return isinstance(e, OSError | TimeoutError)
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+from compose_api.config import get_settings
+from compose_api.db.database_service import DatabaseService
+from compose_api.simulation.poll_scheduler import wait_any
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerEventMaintenance:
+    """
+    Keeps the daily partitions of the worker_event table: every `worker_event_maintenance_interval_seconds` the
+    partitions of the next `worker_event_partitions_ahead_days` days are created, and partitions older than
+    `worker_event_retention_days` are dropped. Dropping a partition is cheap however many events it holds, unlike
+    deleting them. Replicas may all run the maintenance, it is serialized by an advisory lock.
+    """
+
+    database_service: DatabaseService
+    _task: asyncio.Task[None] | None = None
+    _stop_event: asyncio.Event
+
+    def __init__(self, database_service: DatabaseService) -> None:
+        self.database_service = database_service
+        self._stop_event = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            logger.warning("Worker event maintenance already running.")
+            return
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def close(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def run_once(self) -> None:
+        settings = get_settings()
+        hpc_db = self.database_service.get_hpc_db()
+        created = await hpc_db.create_worker_event_partitions(days_ahead=settings.worker_event_partitions_ahead_days)
+        if created:
+            logger.info(f"Created worker_event partitions {created}")
+        if settings.worker_event_retention_days > 0:
+            dropped = await hpc_db.drop_worker_event_partitions(retention_days=settings.worker_event_retention_days)
+            if dropped:
+                logger.info(f"Dropped expired worker_event partitions {dropped}")
+
+    async def _maintenance_loop(self) -> None:
+        interval = get_settings().worker_event_maintenance_interval_seconds
+        while not self._stop_event.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Error during worker_event partition maintenance")
+            await wait_any(events=[self._stop_event], timeout=interval)
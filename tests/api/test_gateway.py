@@ -1,8 +1,25 @@
+import hashlib
+import io
+import zipfile
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import polars as pl
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, UploadFile
 from httpx import ASGITransport, AsyncClient
 
+from compose_api import dependencies
+from compose_api.common.gateway import utils as gateway_utils
 from compose_api.common.gateway.models import ServerMode
+from compose_api.common.gateway.utils import get_simulation_request_from_uploaded_file
+from compose_api.common.ssh.ssh_service import SFTPStreamInterrupted
+from compose_api.config import get_settings
+from compose_api.simulation import results_cache
+from compose_api.simulation.data_service import DataServiceHpc
+from compose_api.simulation.models import SimulationFileType
+from compose_api.simulation.results_cache import ResultsCache
+from compose_api.simulation.results_ingestion import ResultsIngestor
 from compose_api.version import __version__
 
 server_urls = [ServerMode.DEV, ServerMode.PROD]
@@ -16,3 +33,178 @@ async def test_version(fastapi_app: FastAPI, local_base_url: str) -> None:
         assert response.status_code == 200
         data = response.json()
         assert data == current_version
+
+
+@pytest.mark.asyncio
+async def test_uploaded_file_is_streamed_to_disk(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "upload_chunk_size_bytes", 7)
+    monkeypatch.setattr(get_settings(), "upload_max_size_bytes", 100)
+    content = b"<sbml>" + b"x" * 80 + b"</sbml>"
+
+    simulation_request = await get_simulation_request_from_uploaded_file(
+        UploadFile(file=io.BytesIO(content), filename="model.sbml")
+    )
+    try:
+        assert simulation_request.request_file_path.read_bytes() == content
+        assert simulation_request.content_sha256 == hashlib.sha256(content).hexdigest()
+        assert simulation_request.simulation_file_type == SimulationFileType.SBML
+    finally:
+        simulation_request.request_file_path.unlink()
+
+    # the size is unknown up front (chunked request), the limit is enforced while streaming
+    with pytest.raises(HTTPException) as exc_info:
+        await get_simulation_request_from_uploaded_file(
+            UploadFile(file=io.BytesIO(content + b"y" * 20), filename="model.sbml")
+        )
+    assert exc_info.value.status_code == 413
+
+
+class _FlakySftp:
+    """
+    Stands in for SSHService, the first stream breaks off in its third chunk, of which only the second half reached
+    the remote file (out of order requests), so the remote file is larger than what was acknowledged.
+    """
+
+    def __init__(self) -> None:
+        self.remote_files: dict[Path, bytes] = {}
+        self.streams = 0
+
+    async def sftp_write_stream(self, remote_path: Path, chunks: AsyncIterator[bytes], offset: int = 0) -> int:
+        self.streams += 1
+        content = self.remote_files.get(remote_path, b"")
+        position = offset
+        async for chunk in chunks:
+            if self.streams == 1 and position >= 14:
+                half = len(chunk) // 2
+                hole = b"\0" * half
+                self.remote_files[remote_path] = content[:position] + hole + chunk[half:]
+                raise SFTPStreamInterrupted("connection lost", acknowledged=position)
+            content = content[:position] + chunk + content[position + len(chunk) :]
+            position += len(chunk)
+            self.remote_files[remote_path] = content
+        self.remote_files[remote_path] = content[:position]
+        return position
+
+    async def run_command(self, command: str) -> tuple[int, str, str]:
+        assert command.startswith("rm -f ")
+        self.remote_files.pop(Path(command.removeprefix("rm -f ")), None)
+        return 0, "", ""
+
+
+@pytest.mark.asyncio
+async def test_uploaded_file_is_streamed_to_hpc(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "upload_chunk_size_bytes", 7)
+    sftp = _FlakySftp()
+    monkeypatch.setattr(gateway_utils, "get_ssh_service", lambda: sftp)
+    content = b"<sbml>" + b"x" * 80 + b"</sbml>"
+
+    simulation_request = await get_simulation_request_from_uploaded_file(
+        UploadFile(file=io.BytesIO(content), filename="model.sbml"), stage_on_hpc=True
+    )
+
+    # resumed below the hole the broken stream left, nothing was written locally
+    assert sftp.streams == 2
+    assert simulation_request.staged_on_hpc
+    assert sftp.remote_files == {simulation_request.request_file_path: content}
+    assert simulation_request.content_sha256 == hashlib.sha256(content).hexdigest()
+
+    # a chunked upload exceeding the limit mid-stream leaves nothing staged behind
+    monkeypatch.setattr(get_settings(), "upload_max_size_bytes", 50)
+    with pytest.raises(HTTPException) as exc_info:
+        await get_simulation_request_from_uploaded_file(
+            UploadFile(file=io.BytesIO(content), filename="model.sbml"), stage_on_hpc=True
+        )
+    assert exc_info.value.status_code == 413
+    assert list(sftp.remote_files) == [simulation_request.request_file_path]
+
+
+@pytest.mark.asyncio
+async def test_results_download_supports_ranges(
+    fastapi_app: FastAPI, local_base_url: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    results_zip = tmp_path / "results.zip"
+    results_zip.write_bytes(bytes(range(256)) * 10)
+    monkeypatch.setattr(get_settings(), "results_chunk_size_bytes", 100)
+    monkeypatch.setattr(DataServiceHpc, "_get_results_zip", staticmethod(lambda experiment_id, namespace: results_zip))
+
+    class _SimulatorDb:
+        async def get_simulations_experiment_id(self, simulation_id: int) -> str:
+            return "experiment"
+
+    class _DatabaseService:
+        def get_simulator_db(self) -> _SimulatorDb:
+            return _SimulatorDb()
+
+    monkeypatch.setattr(dependencies, "global_database_service", _DatabaseService())
+    monkeypatch.setattr(dependencies, "global_data_service", DataServiceHpc())
+    monkeypatch.setattr(
+        results_cache, "global_results_cache", ResultsCache(cache_dir=tmp_path / "cache", max_bytes=10_000)
+    )
+    url = "/results/simulation/results/file?simulation_id=1"
+
+    async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url=local_base_url) as client:
+        full = await client.get(url)
+        assert full.status_code == 200
+        assert full.content == results_zip.read_bytes()
+        etag = full.headers["etag"]
+
+        partial = await client.get(url, headers={"Range": "bytes=1000-", "If-Range": etag})
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == "bytes 1000-2559/2560"
+        assert partial.content == results_zip.read_bytes()[1000:]
+        assert (await client.get(url, headers={"Range": "bytes=-10"})).content == results_zip.read_bytes()[-10:]
+
+        assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+        assert (await client.get(url, headers={"Range": "bytes=5000-"})).status_code == 416
+        # the file changed since the first part was fetched
+        assert (await client.get(url, headers={"Range": "bytes=1000-", "If-Range": '"stale"'})).status_code == 200
+
+    # populated once, on the first request
+    assert [path.name for path in (tmp_path / "cache").iterdir()] == [
+        f"experiment_a00_{int(results_zip.stat().st_mtime):x}.zip"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_results_query_selects_observables(
+    fastapi_app: FastAPI, local_base_url: str, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    results_zip = tmp_path / "results.zip"
+    with zipfile.ZipFile(results_zip, "w") as archive:
+        archive.writestr("report.csv", "time,PX,PY,X\n" + "".join(f"{t},{t * 2},{t * 3},{t * 4}\n" for t in range(10)))
+    dataset_dir = tmp_path / "results_parquet"
+    monkeypatch.setattr(DataServiceHpc, "_get_results_zip", staticmethod(lambda experiment_id, namespace: results_zip))
+    monkeypatch.setattr(DataServiceHpc, "get_columnar_results_dir", lambda self, experiment_id, namespace: dataset_dir)
+
+    class _SimulatorDb:
+        async def get_simulations_experiment_id(self, simulation_id: int) -> str:
+            return "experiment"
+
+    class _DatabaseService:
+        def get_simulator_db(self) -> _SimulatorDb:
+            return _SimulatorDb()
+
+    monkeypatch.setattr(dependencies, "global_database_service", _DatabaseService())
+    monkeypatch.setattr(
+        dependencies,
+        "global_results_ingestor",
+        ResultsIngestor(data_service=DataServiceHpc(), database_service=_DatabaseService()),  # type: ignore[arg-type]
+    )
+    url = "/results/simulation/results/query?simulation_id=1"
+
+    async with AsyncClient(transport=ASGITransport(app=fastapi_app), base_url=local_base_url) as client:
+        # converted on first access
+        response = await client.post(f"{url}&start_time=2&end_time=7&limit=3", json={"items": ["^P"]})
+        assert response.status_code == 200
+        assert response.json() == {"time": [2, 3, 4], "PX": [4, 6, 8], "PY": [6, 9, 12]}
+        assert (dataset_dir / "report=report" / "data.parquet").exists()
+
+        response = await client.post(f"{url}&response_format=arrow", json={"items": ["X"]})
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert pl.read_ipc_stream(response.content).to_dict(as_series=False) == {
+            "time": list(range(10)),
+            "X": [t * 4 for t in range(10)],
+        }
+
+        assert (await client.post(url, json={"items": ["missing"]})).status_code == 400
+        assert (await client.post(f"{url}&report_id=other", json={"items": []})).status_code == 404
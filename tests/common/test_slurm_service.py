@@ -1,3 +1,4 @@
+import datetime
 import tempfile
 import uuid
 from pathlib import Path
@@ -5,7 +6,8 @@ from pathlib import Path
 import pytest
 
 from compose_api.common.hpc.models import SlurmJob
-from compose_api.common.hpc.slurm_service import SlurmService
+from compose_api.common.hpc.slurm_service import _OUTPUT_SEPARATOR, SlurmService
+from compose_api.common.ssh.ssh_service import SSHService
 from compose_api.config import get_settings
 from compose_api.simulation.hpc_utils import _namespace_path
 
@@ -57,3 +59,156 @@ async def test_slurm_job_submit(slurm_service: SlurmService, slurm_template_hell
         assert submitted_job is not None and len(submitted_job) == 1
         assert submitted_job[0].job_id == job_id
         assert submitted_job[0].name == "my_test_job"
+
+
+@pytest.mark.asyncio
+async def test_slurm_job_status_combined_query(monkeypatch: pytest.MonkeyPatch) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    commands: list[str] = []
+
+    async def fake_run_command(command: str) -> tuple[int, str, str]:
+        commands.append(command)
+        stdout = (
+            "2025-01-01T00:05:00\n"
+            "101|sim-a|acct|user|RUNNING\n"
+            "102|sim-b|acct|user|PENDING\n"
+            f"{_OUTPUT_SEPARATOR} 0\n"
+            "101|sim-a|acct|user|RUNNING|2025-01-01T00:00:00|Unknown|00:01:00|0:0\n"
+            "101.batch|batch|acct|user|RUNNING|2025-01-01T00:00:00|Unknown|00:01:00|0:0\n"
+            "103|sim-c|acct|user|COMPLETED|2025-01-01T00:00:00|2025-01-01T00:02:00|00:02:00|0:0\n"
+        )
+        return 0, stdout, ""
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", fake_run_command)
+
+    slurm_jobs = await slurm_service.get_job_status(job_ids=[101, 102, 103])
+    assert len(commands) == 1
+    assert sorted(slurm_jobs) == [(101, None), (102, None), (103, None)]
+    assert slurm_jobs[(101, None)].start_time == "2025-01-01T00:00:00"  # sacct wins over squeue
+    assert slurm_jobs[(102, None)].job_state == "PENDING"
+    assert slurm_jobs[(103, None)].job_state == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_slurm_job_status_changes_since_watermark(monkeypatch: pytest.MonkeyPatch) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    commands: list[str] = []
+
+    async def fake_run_command(command: str) -> tuple[int, str, str]:
+        commands.append(command)
+        stdout = (
+            "2025-01-01T00:10:00\n"
+            f"{_OUTPUT_SEPARATOR} 1\n"
+            "103|sim-c|acct|user|FAILED|2025-01-01T00:00:00|2025-01-01T00:06:00|00:06:00|1:0\n"
+        )
+        return 0, stdout, "slurm_load_jobs error: Invalid job id specified"
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", fake_run_command)
+
+    slurm_jobs, watermark = await slurm_service.get_job_status_changes(
+        since=datetime.datetime(2025, 1, 1, 0, 5), job_ids=[101, 102, 103]
+    )
+    assert "--starttime=2025-01-01T00:05:00 --endtime=now" in commands[0]
+    assert " -j " not in commands[0]
+    assert watermark == datetime.datetime(2025, 1, 1, 0, 10)
+    assert list(slurm_jobs) == [(103, None)]
+    assert slurm_jobs[(103, None)].is_failed()
+
+
+@pytest.mark.asyncio
+async def test_slurm_job_status_array_tasks(monkeypatch: pytest.MonkeyPatch) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+
+    async def fake_run_command(command: str) -> tuple[int, str, str]:
+        assert " -r " in command
+        stdout = (
+            "2025-01-01T00:05:00\n"
+            "200_1|array|acct|user|RUNNING\n"
+            "200_2|array|acct|user|PENDING\n"
+            f"{_OUTPUT_SEPARATOR} 0\n"
+            "200_0|array|acct|user|COMPLETED|2025-01-01T00:00:00|2025-01-01T00:01:00|00:01:00|0:0\n"
+            "200_0.batch|batch|acct|user|COMPLETED|2025-01-01T00:00:00|2025-01-01T00:01:00|00:01:00|0:0\n"
+            "200_1|array|acct|user|RUNNING|2025-01-01T00:01:00|Unknown|00:04:00|0:0\n"
+            "200_[2]|array|acct|user|PENDING|Unknown|Unknown|00:00:00|0:0\n"
+        )
+        return 0, stdout, ""
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", fake_run_command)
+
+    slurm_jobs = await slurm_service.get_job_status(job_ids=[200])
+    assert sorted(slurm_jobs) == [(200, 0), (200, 1), (200, 2)]
+    assert slurm_jobs[(200, 0)].job_state == "COMPLETED"
+    assert slurm_jobs[(200, 1)].start_time == "2025-01-01T00:01:00"
+    assert slurm_jobs[(200, 2)].job_state == "PENDING"
+
+
+@pytest.mark.asyncio
+async def test_slurm_packed_task_states(monkeypatch: pytest.MonkeyPatch) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+
+    async def fake_run_command(command: str) -> tuple[int, str, str]:
+        assert command.startswith("cd /remote/packed ")
+        assert " 300 301 " in command
+        stdout = (
+            "300/0:COMPLETED|2025-01-01T00:01:00\n300/1:FAILED|2025-01-01T00:02:00\n300/2:RUNNING|2025-01-01T00:01:30\n"
+        )
+        return 0, stdout, ""
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", fake_run_command)
+
+    task_states = await slurm_service.get_packed_task_states(status_root=Path("/remote/packed"), job_ids=[300, 301])
+    assert sorted(task_states) == [(300, 0), (300, 1), (300, 2)]
+
+    allocation = SlurmJob(job_id=300, name="packed", account="acct", user_name="user", job_state="RUNNING")
+    assert allocation.for_packed_task(task_states[(300, 0)]).job_state == "COMPLETED"
+    assert allocation.for_packed_task(task_states[(300, 0)]).end_time == "2025-01-01T00:01:00"
+    assert allocation.for_packed_task(task_states[(300, 1)]).job_state == "FAILED"
+    assert allocation.for_packed_task(task_states[(300, 2)]).start_time == "2025-01-01T00:01:30"
+    assert allocation.for_packed_task(None).job_state == "PENDING"
+    # the driver never got to a task before the allocation ended
+    timed_out = allocation.model_copy(update={"job_state": "TIMEOUT"})
+    assert timed_out.for_packed_task(task_states[(300, 2)]).job_state == "TIMEOUT"
+    assert allocation.model_copy(update={"job_state": "COMPLETED"}).for_packed_task(None).job_state == "FAILED"
+
+    commands: list[str] = []
+
+    async def record_run_command(command: str) -> tuple[int, str, str]:
+        commands.append(command)
+        return 0, "", ""
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", record_run_command)
+    await slurm_service.remove_packed_status_dirs(status_root=Path("/remote/packed"), job_ids=[300, 301])
+    assert commands == ["cd /remote/packed 2>/dev/null && rm -rf -- 300 301 || true"]
+
+
+@pytest.mark.asyncio
+async def test_slurm_named_submit_is_idempotent(monkeypatch: pytest.MonkeyPatch) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    queued: dict[str, int] = {}
+    sbatch_calls: list[str] = []
+
+    async def fake_run_command(command: str) -> tuple[int, str, str]:
+        assert "--name=experiment_1 " in command
+        if "experiment_1" in queued:
+            return 0, f"existing job {queued['experiment_1']}\n", ""
+        sbatch_calls.append(command)
+        queued["experiment_1"] = 4321
+        return 0, "4321\n", ""
+
+    monkeypatch.setattr(slurm_service.ssh_service, "run_command", fake_run_command)
+
+    sbatch_file = Path("remote/experiment_1.sbatch")
+    assert await slurm_service._execute_sbatch_command(sbatch_file=sbatch_file, job_name="experiment_1") == 4321
+    # e.g. a dispatch retried after sbatch succeeded but before its HpcRun was recorded
+    assert await slurm_service._execute_sbatch_command(sbatch_file=sbatch_file, job_name="experiment_1") == 4321
+    assert len(sbatch_calls) == 1
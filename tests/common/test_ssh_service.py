@@ -1,10 +1,14 @@
+import asyncio
 import tempfile
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
 from pathlib import Path
 
+import asyncssh
 import pytest
 
-from compose_api.common.ssh.ssh_service import SSHService
+from compose_api.common.ssh.ssh_pool import SSHConnectionPool, _PooledConnection
+from compose_api.common.ssh.ssh_service import SFTPStreamInterrupted, SSHService
 from compose_api.config import get_settings
 
 
@@ -35,3 +39,204 @@ async def test_scp_upload_download(ssh_service: SSHService) -> None:
 
             return_code, stdout, stderr = await ssh_service.run_command(f"rm {remote_path}")
             assert return_code == 0
+
+
+class _FakeConnection:
+    closed: bool = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_ssh_pool_reuses_and_bounds_connections(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = SSHConnectionPool(
+        hostname="localhost",
+        username="user",
+        key_path=Path("/dev/null"),
+        known_hosts=None,
+        max_connections=2,
+        max_channels_per_connection=2,
+        keepalive_interval=30,
+        keepalive_count_max=3,
+        connect_timeout=30,
+    )
+    opened: list[_FakeConnection] = []
+
+    async def fake_connect() -> _PooledConnection:
+        conn = _FakeConnection()
+        opened.append(conn)
+        return _PooledConnection(conn)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(pool, "_connect", fake_connect)
+
+    # sequential users share a single connection
+    for _ in range(3):
+        async with pool.connection():
+            pass
+    assert len(opened) == 1
+
+    # concurrent users multiplex channels, and never exceed max_connections * max_channels
+    in_flight = 0
+    max_in_flight = 0
+
+    async def borrow() -> None:
+        nonlocal in_flight, max_in_flight
+        async with pool.connection():
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(borrow() for _ in range(10)))
+    assert len(opened) == 2
+    assert max_in_flight == 4
+
+    # a dropped connection is replaced on the next acquire
+    opened[0].closed = True
+    opened[1].closed = True
+    async with pool.connection():
+        pass
+    assert len(opened) == 3
+
+    await pool.close()
+    with pytest.raises(RuntimeError):
+        async with pool.connection():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_ssh_command_not_rerun_after_disconnect(monkeypatch: pytest.MonkeyPatch) -> None:
+    ssh_service = SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    runs: list[str] = []
+    failures: list[Exception] = []
+
+    class _FailingConnection(_FakeConnection):
+        async def run(self, command: str, check: bool) -> asyncssh.SSHCompletedProcess:
+            if failures:
+                raise failures.pop(0)
+            runs.append(command)
+            return asyncssh.SSHCompletedProcess(returncode=0, stdout="1234", stderr="")
+
+    async def fake_connect() -> _PooledConnection:
+        return _PooledConnection(_FailingConnection())  # type: ignore[arg-type]
+
+    monkeypatch.setattr(ssh_service.pool, "_connect", fake_connect)
+
+    # the channel could not be opened, the command never ran and is retried on a new connection
+    failures.append(asyncssh.ChannelOpenError(asyncssh.OPEN_CONNECT_FAILED, "connection closed"))
+    assert await ssh_service.run_command("sbatch job.sbatch") == (0, "1234", "")
+    assert runs == ["sbatch job.sbatch"]
+
+    # the connection dropped while the command ran, it may have been submitted already
+    failures.append(asyncssh.ConnectionLost("connection lost"))
+    with pytest.raises(RuntimeError):
+        await ssh_service.run_command("sbatch job.sbatch")
+    assert runs == ["sbatch job.sbatch"]
+    await ssh_service.close()
+
+
+@pytest.mark.asyncio
+async def test_results_streams_use_the_download_pool(monkeypatch: pytest.MonkeyPatch) -> None:
+    ssh_service = SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    content = bytes(range(100))
+
+    class _RemoteFile:
+        async def __aenter__(self) -> "_RemoteFile":
+            return self
+
+        async def __aexit__(self, *args: object) -> None:
+            pass
+
+        async def read(self, size: int, offset: int) -> bytes:
+            return content[offset : offset + size]
+
+    class _SftpClient(_RemoteFile):
+        def open(self, path: str, mode: str, encoding: None) -> _RemoteFile:
+            return _RemoteFile()
+
+    class _SftpConnection(_FakeConnection):
+        def start_sftp_client(self) -> _SftpClient:
+            return _SftpClient()
+
+    opened: dict[str, int] = {"pool": 0, "download_pool": 0}
+
+    def fake_connect(pool_name: str) -> Callable[[], Awaitable[_PooledConnection]]:
+        async def connect() -> _PooledConnection:
+            opened[pool_name] += 1
+            return _PooledConnection(_SftpConnection())  # type: ignore[arg-type]
+
+        return connect
+
+    monkeypatch.setattr(ssh_service.pool, "_connect", fake_connect("pool"))
+    monkeypatch.setattr(ssh_service.download_pool, "_connect", fake_connect("download_pool"))
+
+    # the main pool keeps all its channels however many results are being downloaded
+    streams = [ssh_service.sftp_read_stream(Path("results.zip"), start=10, end=50, chunk_size=16) for _ in range(3)]
+    chunks = await asyncio.gather(*(stream.__anext__() for stream in streams))
+    assert chunks == [content[10:26]] * 3
+    assert opened == {"pool": 0, "download_pool": 1}
+    for stream in streams:
+        assert b"".join([chunks[0], *[chunk async for chunk in stream]]) == content[10:50]
+    await ssh_service.close()
+
+
+class _SplitWriteRemoteFile:
+    """A remote file over sftp, the connection breaks while writing from byte 8."""
+
+    def __init__(self, remote: bytearray) -> None:
+        self.remote = remote
+
+    async def __aenter__(self) -> "_SplitWriteRemoteFile":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        pass
+
+    async def makedirs(self, path: str, exist_ok: bool) -> None:
+        pass
+
+    def open(self, path: str, mode: str) -> "_SplitWriteRemoteFile":
+        return self
+
+    async def write(self, data: bytes, offset: int) -> None:
+        if offset >= 8:
+            # asyncssh split the write, only the request for its second half completed before the connection broke
+            self.remote[offset:] = b"\0" * (len(data) // 2) + data[len(data) // 2 :]
+            raise asyncssh.ConnectionLost("connection lost")
+        self.remote[offset : offset + len(data)] = data
+
+    async def truncate(self, size: int) -> None:
+        del self.remote[size:]
+
+
+@pytest.mark.asyncio
+async def test_interrupted_sftp_stream_reports_acknowledged_offset(monkeypatch: pytest.MonkeyPatch) -> None:
+    ssh_service = SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    remote = bytearray()
+
+    class _SftpConnection(_FakeConnection):
+        def start_sftp_client(self) -> _SplitWriteRemoteFile:
+            return _SplitWriteRemoteFile(remote)
+
+    async def fake_connect() -> _PooledConnection:
+        return _PooledConnection(_SftpConnection())  # type: ignore[arg-type]
+
+    monkeypatch.setattr(ssh_service.pool, "_connect", fake_connect)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (b"abcd", b"efgh", b"ijklmnop"):
+            yield chunk
+
+    # the remote file reaches past the hole, the stream must resume below it
+    with pytest.raises(SFTPStreamInterrupted) as exc_info:
+        await ssh_service.sftp_write_stream(Path("upload.omex"), chunks())
+    assert len(remote) == 16
+    assert exc_info.value.acknowledged == 8
+    await ssh_service.close()
@@ -1,6 +1,5 @@
 import asyncio
-import tempfile
-from pathlib import Path
+from collections.abc import AsyncIterator
 from types import CoroutineType, FunctionType
 from typing import Annotated, Any, Callable
 
@@ -9,18 +8,26 @@ from typing_extensions import Doc, ParamSpec
 
 from compose_api.common.gateway.models import Namespace
 from compose_api.config import get_settings
-from compose_api.simulation.data_service import DataService
+from compose_api.simulation.data_service import DataService, ResultsFileInfo
 from compose_api.simulation.hpc_utils import get_slurm_sim_results_file_path
 
 
 class TestDataService(DataService):
+    """Reads results over sftp, the cluster file system is not mounted outside of the cluster."""
+
     settings = get_settings()
 
-    async def get_results_zip(self, experiment_id: str, namespace: Namespace) -> Path:
-        remote_experiment_result = get_slurm_sim_results_file_path(experiment_id)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".zip", prefix="results_") as tmp_file:
-            await self.ssh_service.scp_download(Path(tmp_file.name), Path(remote_experiment_result))
-            return Path(tmp_file.name)
+    async def get_results_file_info(self, experiment_id: str, namespace: Namespace) -> ResultsFileInfo:
+        size, mtime = await self.ssh_service.sftp_stat(get_slurm_sim_results_file_path(experiment_id))
+        return ResultsFileInfo(size=size, mtime=mtime)
+
+    def stream_results(self, experiment_id: str, namespace: Namespace, start: int, end: int) -> AsyncIterator[bytes]:
+        return self.ssh_service.sftp_read_stream(
+            get_slurm_sim_results_file_path(experiment_id),
+            start=start,
+            end=end,
+            chunk_size=self.settings.results_chunk_size_bytes,
+        )
 
     async def close(self) -> None:
         pass
@@ -12,11 +12,14 @@ from compose_api.common.hpc.models import SlurmJob
 from compose_api.common.hpc.slurm_service import SlurmService
 from compose_api.db.database_service import DatabaseService
 from compose_api.dependencies import (
+    get_dispatch_queue,
     get_job_monitor,
     get_simulation_service,
+    set_dispatch_queue,
     set_job_monitor,
     set_simulation_service,
 )
+from compose_api.simulation.dispatch_queue import DispatchQueue
 from compose_api.simulation.job_monitor import JobMonitor
 from compose_api.simulation.models import JobStatus, JobType, SimulatorVersion
 from compose_api.simulation.simulation_service import SimulationServiceHpc
@@ -54,6 +57,24 @@ async def job_monitor(
     set_job_monitor(saved_job_service)
 
 
+@pytest_asyncio.fixture(scope="function")
+async def dispatch_queue(
+    database_service: DatabaseService, simulation_service_slurm: SimulationServiceHpc, job_monitor: JobMonitor
+) -> AsyncGenerator[DispatchQueue, None]:
+    queue = DispatchQueue(
+        database_service=database_service, simulation_service=simulation_service_slurm, job_monitor=job_monitor
+    )
+    saved_queue = get_dispatch_queue()
+    set_dispatch_queue(queue)
+
+    await queue.start(workers=2)
+
+    yield queue
+
+    await queue.close()
+    set_dispatch_queue(saved_queue)
+
+
 @pytest_asyncio.fixture(scope="function")
 async def simulator(database_service: DatabaseService) -> AsyncGenerator[SimulatorVersion, None]:
     experiment_dep = _default_registry_deps()
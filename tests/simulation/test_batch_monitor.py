@@ -11,6 +11,7 @@ from compose_api.api.client.types import File
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseService, DatabaseServiceSQL
 from compose_api.simulation.data_service import DataService
+from compose_api.simulation.dispatch_queue import DispatchQueue
 from compose_api.simulation.job_monitor import JobMonitor
 from compose_api.simulation.models import JobType, SimulationRequest, Simulator, SimulatorVersion
 from compose_api.simulation.simulation_service import SimulationServiceHpc
@@ -79,6 +80,7 @@ async def test_batch_status_after_copasi_runs(
     database_service: DatabaseServiceSQL,
     simulation_service_slurm: SimulationServiceHpc,
     job_monitor: JobMonitor,
+    dispatch_queue: DispatchQueue,
     data_service: DataService,
     simulator: Simulator,
 ) -> None:
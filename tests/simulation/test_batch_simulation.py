@@ -2,18 +2,28 @@ import json
 import os
 import tempfile
 import zipfile
+from pathlib import Path
 
 import pytest
+from pbest.utils.input_types import ContainerizationEngine, ContainerizationFileRepr
 
 from compose_api.api.client import Client
 from compose_api.api.client.api.simulation import run_simulation
 from compose_api.api.client.models import BodyRunSimulation
 from compose_api.api.client.types import File
+from compose_api.common.hpc.slurm_service import SlurmService
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseServiceSQL
 from compose_api.simulation.data_service import DataService
+from compose_api.simulation.dispatch_queue import DispatchQueue
 from compose_api.simulation.job_monitor import JobMonitor
-from compose_api.simulation.models import Simulator
+from compose_api.simulation.models import (
+    Simulation,
+    SimulationFileType,
+    SimulationRequest,
+    Simulator,
+    SimulatorVersion,
+)
 from compose_api.simulation.simulation_service import SimulationServiceHpc
 from tests.simulators.utils import (
     check_experiment_run,
@@ -47,6 +57,7 @@ async def test_copasi_batch(
     database_service: DatabaseServiceSQL,
     simulation_service_slurm: SimulationServiceHpc,
     job_monitor: JobMonitor,
+    dispatch_queue: DispatchQueue,
     data_service: DataService,
     simulator: Simulator,
 ) -> None:
@@ -71,3 +82,48 @@ async def test_copasi_batch(
                 sim_experiment=sim_experiment, in_memory_api_client=in_memory_api_client
             )
             await get_results_and_compare_copasi(api_client=in_memory_api_client, file_result=results)
+
+
+@pytest.mark.asyncio
+async def test_batch_waits_for_container_build(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    simulator_version = SimulatorVersion(
+        database_id=1,
+        container_def=ContainerizationFileRepr(
+            representation="Bootstrap: docker", containerization_engine=ContainerizationEngine.APPTAINER
+        ),
+        container_def_hash="dependency",
+        packages=None,
+    )
+    simulations = [
+        Simulation(
+            database_id=i,
+            simulator_version=simulator_version,
+            sim_request=SimulationRequest(
+                request_file_path=tmp_path / "input.omex", simulation_file_type=SimulationFileType.OMEX, is_batch=True
+            ),
+        )
+        for i in range(2)
+    ]
+    sbatch_scripts: list[str] = []
+
+    async def fake_submit_array_job(
+        local_sbatch_file: Path,
+        remote_sbatch_file: Path,
+        input_files: list[tuple[Path, Path]],
+        staged_input_files: list[tuple[Path, Path]],
+        job_name: str,
+    ) -> int:
+        sbatch_scripts.append(local_sbatch_file.read_text())
+        return 1
+
+    monkeypatch.setattr(SlurmService, "submit_array_job", lambda self, **kwargs: fake_submit_array_job(**kwargs))
+    simulation_service = SimulationServiceHpc()
+    await simulation_service.submit_simulation_array(simulations=simulations, experiment_ids=["e0", "e1"])
+    await simulation_service.submit_simulation_array(
+        simulations=simulations, experiment_ids=["e0", "e1"], dependency_job_id=4242
+    )
+
+    assert "--dependency" not in sbatch_scripts[0]
+    # held until the build succeeds, cancelled if it fails
+    assert "#SBATCH --dependency=afterok:4242\n" in sbatch_scripts[1]
+    assert "#SBATCH --kill-on-invalid-dep=yes\n" in sbatch_scripts[1]
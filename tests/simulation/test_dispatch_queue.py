@@ -0,0 +1,160 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from compose_api.common.hpc.slurm_service import SlurmService
+from compose_api.common.ssh import ssh_service as ssh_service_module
+from compose_api.common.ssh.ssh_service import SSHService
+from compose_api.config import get_settings
+from compose_api.db.database_service import DatabaseServiceSQL
+from compose_api.simulation import handlers
+from compose_api.simulation.dispatch_queue import DispatchQueue
+from compose_api.simulation.hpc_utils import get_slurm_upload_staging_file
+from compose_api.simulation.job_monitor import JobMonitor
+from compose_api.simulation.models import (
+    DispatchedSimulation,
+    DispatchStatus,
+    SimulationDispatch,
+    SimulationFileType,
+    SimulationRequest,
+)
+from compose_api.simulation.simulation_service import SimulationServiceHpc
+
+
+@pytest.mark.asyncio
+async def test_dispatch_queue_retries_then_gives_up(
+    database_service: DatabaseServiceSQL, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    job_monitor = JobMonitor(nats_client=None, database_service=database_service, slurm_service=slurm_service)
+    dispatch_queue = DispatchQueue(
+        database_service=database_service, simulation_service=SimulationServiceHpc(), job_monitor=job_monitor
+    )
+    monkeypatch.setattr(get_settings(), "dispatch_retry_backoff_seconds", 0.0)
+    monkeypatch.setattr(get_settings(), "dispatch_max_attempts", 3)
+    monkeypatch.setattr(get_settings(), "dispatch_lease_seconds", 1)
+
+    dispatched: list[SimulationDispatch] = []
+    failures_left = {"flaky": 1, "broken": 10}
+
+    async def fake_dispatch_simulations(dispatch: SimulationDispatch, **kwargs: object) -> None:
+        experiment_id = dispatch.simulations[0].experiment_id
+        if failures_left[experiment_id] > 0:
+            failures_left[experiment_id] -= 1
+            raise RuntimeError(f"sbatch failed for {experiment_id}")
+        dispatched.append(dispatch)
+
+    monkeypatch.setattr(handlers, "dispatch_simulations", fake_dispatch_simulations)
+
+    def _dispatch(experiment_id: str) -> SimulationDispatch:
+        sim_request = SimulationRequest(
+            request_file_path=Path("input.omex"), simulation_file_type=SimulationFileType.OMEX, is_batch=False
+        )
+        return SimulationDispatch(
+            simulator_id=1,
+            simulations=[DispatchedSimulation(simulation_id=1, experiment_id=experiment_id, sim_request=sim_request)],
+        )
+
+    dispatch_db = database_service.get_dispatch_db()
+    flaky_job = await dispatch_queue.enqueue(_dispatch("flaky"))
+    broken_job = await dispatch_queue.enqueue(_dispatch("broken"))
+    try:
+        assert flaky_job.status == DispatchStatus.PENDING
+        # concurrent claims never hand out the same job
+        claims = await asyncio.gather(
+            dispatch_db.claim_next(lease_seconds=60), dispatch_db.claim_next(lease_seconds=60)
+        )
+        assert sorted(claim.database_id for claim in claims if claim is not None) == sorted([
+            flaky_job.database_id,
+            broken_job.database_id,
+        ])
+        assert await dispatch_db.claim_next(lease_seconds=60) is None
+        # the claims above "crashed": with an expired lease the jobs are picked up again
+        await asyncio.sleep(1.1)
+
+        # every pass retries whatever is due, the broken job runs out of attempts
+        while await dispatch_queue.run_pending() > 0:
+            pass
+
+        flaky = await dispatch_db.get_dispatch_job(flaky_job.database_id)
+        broken = await dispatch_db.get_dispatch_job(broken_job.database_id)
+        assert await dispatch_db.claim_next(lease_seconds=1) is None
+    finally:
+        await dispatch_db.delete_dispatch_job(flaky_job.database_id)
+        await dispatch_db.delete_dispatch_job(broken_job.database_id)
+
+    assert flaky is not None and broken is not None
+    assert flaky.status == DispatchStatus.DONE
+    assert flaky.attempts == 3  # the lost claim, the failed attempt, and the one that succeeded
+    assert broken.status == DispatchStatus.FAILED
+    assert broken.attempts == 3
+    assert broken.last_error == "sbatch failed for broken"
+    assert [dispatch.simulations[0].experiment_id for dispatch in dispatched] == ["flaky"]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_claim_fencing(database_service: DatabaseServiceSQL) -> None:
+    sim_request = SimulationRequest(
+        request_file_path=Path("input.omex"), simulation_file_type=SimulationFileType.OMEX, is_batch=False
+    )
+    dispatch = SimulationDispatch(
+        simulator_id=1,
+        simulations=[DispatchedSimulation(simulation_id=1, experiment_id="fenced", sim_request=sim_request)],
+    )
+    dispatch_db = database_service.get_dispatch_db()
+    dispatch_job = await dispatch_db.enqueue(dispatch)
+    try:
+        stale_claim = await dispatch_db.claim_next(lease_seconds=1)
+        assert stale_claim is not None and stale_claim.attempts == 1
+        assert await dispatch_db.renew_lease(dispatch_job.database_id, attempt=1)
+        await asyncio.sleep(1.1)
+
+        claim = await dispatch_db.claim_next(lease_seconds=60)
+        assert claim is not None and claim.attempts == 2
+        # the first claim lost its lease, it can neither renew nor record an outcome
+        assert not await dispatch_db.renew_lease(dispatch_job.database_id, attempt=1)
+        assert not await dispatch_db.fail(dispatch_job.database_id, attempt=1, error="late", retry_in_seconds=0)
+        assert not await dispatch_db.complete(dispatch_job.database_id, attempt=1)
+        assert await dispatch_db.renew_lease(dispatch_job.database_id, attempt=2)
+        assert await dispatch_db.complete(dispatch_job.database_id, attempt=2)
+        completed = await dispatch_db.get_dispatch_job(dispatch_job.database_id)
+    finally:
+        await dispatch_db.delete_dispatch_job(dispatch_job.database_id)
+
+    assert completed is not None
+    assert completed.status == DispatchStatus.DONE
+    assert completed.last_error is None
+
+
+@pytest.mark.asyncio
+async def test_stage_input_files_before_enqueue(monkeypatch: pytest.MonkeyPatch) -> None:
+    uploads: list[tuple[Path, Path]] = []
+
+    async def fake_sftp_upload_many(self: SSHService, files: list[tuple[Path, Path]], **kwargs: object) -> None:
+        uploads.extend(files)
+
+    monkeypatch.setattr(SSHService, "sftp_upload_many", fake_sftp_upload_many)
+    monkeypatch.setattr(
+        ssh_service_module,
+        "global_ssh_service",
+        SSHService(hostname="localhost", username="user", key_path=Path("/dev/null")),
+    )
+    local_request = SimulationRequest(
+        request_file_path=Path("upload.omex"), simulation_file_type=SimulationFileType.OMEX, is_batch=False
+    )
+    streamed_request = SimulationRequest(
+        request_file_path=get_slurm_upload_staging_file(upload_id="streamed", suffix=".omex"),
+        simulation_file_type=SimulationFileType.OMEX,
+        is_batch=False,
+        staged_on_hpc=True,
+    )
+
+    staged = await SimulationServiceHpc().stage_input_files([local_request, streamed_request])
+
+    assert staged[1] == streamed_request
+    assert staged[0].staged_on_hpc
+    assert staged[0].request_file_path.parent == streamed_request.request_file_path.parent
+    assert uploads == [(local_request.request_file_path, staged[0].request_file_path)]
@@ -1,12 +1,29 @@
+import asyncio
+import datetime
+import hashlib
 import random
 import string
+import uuid
+import zipfile
 from pathlib import Path
 
 import pytest
+from pbest.utils.input_types import DependencyTypes, ExperimentDependency, ExperimentPrimaryDependencies
 
+from compose_api.common.hpc.models import SlurmJob
 from compose_api.db.database_service import DatabaseServiceSQL
-from compose_api.simulation.hpc_utils import get_experiment_id, get_slurm_sim_experiment_dir
+from compose_api.simulation.hpc_utils import (
+    get_experiment_id,
+    get_simulation_cache_key,
+    get_slurm_sim_experiment_dir,
+)
 from compose_api.simulation.models import (
+    BiGraphComputeOutline,
+    BiGraphComputeType,
+    JobStatus,
+    JobType,
+    PackageOutline,
+    PackageType,
     Simulation,
     SimulationFileType,
     SimulationRequest,
@@ -41,3 +58,286 @@ async def test_save_request_to_mongo(database_service: DatabaseServiceSQL, simul
     await database_service.get_simulator_db().delete_simulation(sim.database_id)
     sim3 = await database_service.get_simulator_db().get_simulation(sim.database_id)
     assert sim3 is None
+
+
+@pytest.mark.asyncio
+async def test_list_active_hpcruns(database_service: DatabaseServiceSQL, simulator: SimulatorVersion) -> None:
+    sim_request = SimulationRequest(
+        request_file_path=Path("/tmp/active-hpcruns"),  # noqa: S108
+        simulation_file_type=SimulationFileType.OMEX,
+        is_batch=False,
+    )
+    experiment_id = get_experiment_id(simulator, "".join(random.choices(string.hexdigits, k=7)))  # noqa: S311 doesn't need to be secure
+    sim = await database_service.get_simulator_db().insert_simulation(sim_request, experiment_id, simulator)
+    hpc_db = database_service.get_hpc_db()
+    hpcrun = await hpc_db.insert_hpcrun(
+        slurmjobid=987654, job_type=JobType.SIMULATION, ref_id=sim.database_id, correlation_id=uuid.uuid4().hex
+    )
+
+    def _slurm_job(state: str) -> SlurmJob:
+        return SlurmJob(job_id=987654, name="active", account="acct", user_name="user", job_state=state)
+
+    try:
+        for state, expected_active in [("PENDING", True), ("SUSPENDED", True), ("COMPLETED", False)]:
+            await hpc_db.update_hpcrun_status(hpcrun_id=hpcrun.database_id, new_slurm_job=_slurm_job(state))
+            active_ids = [run.database_id for run in await hpc_db.list_active_hpcruns()]
+            assert (hpcrun.database_id in active_ids) == expected_active
+            assert JobStatus(state.lower()).is_terminal() != expected_active
+    finally:
+        await hpc_db.delete_hpcrun(hpcrun.database_id)
+        await database_service.get_simulator_db().delete_simulation(sim.database_id)
+
+
+def test_simulation_cache_key_upload_modes(tmp_path: Path) -> None:
+    simulator = SimulatorVersion.model_construct(container_def_hash="abc", database_id=1)
+    sbml_path = tmp_path / "model.sbml"
+    sbml_path.write_bytes(b"<sbml/>")
+    omex_path = tmp_path / "model.omex"
+    with zipfile.ZipFile(omex_path, "w") as omex:
+        omex.writestr("model.sbml", "<sbml/>")
+
+    def _key(path: Path, file_type: SimulationFileType, staged_on_hpc: bool) -> str:
+        simulation_request = SimulationRequest(
+            request_file_path=path,
+            simulation_file_type=file_type,
+            is_batch=False,
+            content_sha256=hashlib.sha256(path.read_bytes()).hexdigest(),
+            staged_on_hpc=staged_on_hpc,
+        )
+        return get_simulation_cache_key(simulation_request, simulator)
+
+    # plain files are hashed by their bytes in both modes, archives by their members only when stored locally
+    assert _key(sbml_path, SimulationFileType.SBML, False) == _key(sbml_path, SimulationFileType.SBML, True)
+    assert _key(omex_path, SimulationFileType.OMEX, False) != _key(omex_path, SimulationFileType.OMEX, True)
+
+
+@pytest.mark.asyncio
+async def test_simulation_cache(
+    database_service: DatabaseServiceSQL, simulator: SimulatorVersion, tmp_path: Path
+) -> None:
+    def _write_omex(name: str) -> Path:
+        # identical members written at different times, so the archives differ byte for byte
+        omex_path = tmp_path / name
+        with zipfile.ZipFile(omex_path, "w") as omex:
+            omex.writestr(zipfile.ZipInfo("model.sbml", date_time=(2020, 1, 1, 0, 0, name.count("b"))), "<sbml/>")
+        return omex_path
+
+    def _request(path: Path, end_time_point: float = 1.0) -> SimulationRequest:
+        return SimulationRequest(
+            request_file_path=path,
+            simulation_file_type=SimulationFileType.OMEX,
+            end_time_point=end_time_point,
+            is_batch=False,
+        )
+
+    first, second = _write_omex("a.omex"), _write_omex("b.omex")
+    assert first.read_bytes() != second.read_bytes()
+    cache_key = get_simulation_cache_key(_request(first), simulator)
+    assert cache_key == get_simulation_cache_key(_request(second), simulator)
+    assert cache_key != get_simulation_cache_key(_request(second, end_time_point=2.0), simulator)
+
+    simulator_db = database_service.get_simulator_db()
+    hpc_db = database_service.get_hpc_db()
+    experiment_id = get_experiment_id(simulator, "".join(random.choices(string.hexdigits, k=7)))  # noqa: S311 doesn't need to be secure
+    sim = await simulator_db.insert_simulation(_request(first), experiment_id, simulator, cache_key=cache_key)
+    hpcrun = await hpc_db.insert_hpcrun(
+        slurmjobid=987655, job_type=JobType.SIMULATION, ref_id=sim.database_id, correlation_id=uuid.uuid4().hex
+    )
+    try:
+        # only completed simulations are served from the cache
+        assert await simulator_db.get_cached_simulation(cache_key=cache_key, max_age_seconds=3600) is None
+        await hpc_db.update_hpcrun_status(
+            hpcrun_id=hpcrun.database_id,
+            new_slurm_job=SlurmJob(
+                job_id=987655, name="cached", account="acct", user_name="user", job_state="COMPLETED"
+            ),
+        )
+        cached = await simulator_db.get_cached_simulation(cache_key=cache_key, max_age_seconds=3600)
+        assert cached is not None
+        assert cached.database_id == sim.database_id
+        # expired, the age is measured on the database clock
+        assert await simulator_db.get_cached_simulation(cache_key=cache_key, max_age_seconds=0) is None
+    finally:
+        await hpc_db.delete_hpcrun(hpcrun.database_id)
+        await simulator_db.delete_simulation(sim.database_id)
+
+
+@pytest.mark.asyncio
+async def test_list_simulations_pages(database_service: DatabaseServiceSQL, simulator: SimulatorVersion) -> None:
+    simulator_db = database_service.get_simulator_db()
+    hpc_db = database_service.get_hpc_db()
+    sim_request = SimulationRequest(
+        request_file_path=Path("/tmp/list-simulations"),  # noqa: S108
+        simulation_file_type=SimulationFileType.OMEX,
+        is_batch=False,
+    )
+    sims = [
+        await simulator_db.insert_simulation(sim_request, get_experiment_id(simulator, uuid.uuid4().hex[:7]), simulator)
+        for _ in range(3)
+    ]
+    # the first simulation was resubmitted and completed the second time, the last one was never submitted
+    hpcruns = [
+        await hpc_db.insert_hpcrun(
+            slurmjobid=987656 + i, job_type=JobType.SIMULATION, ref_id=sim.database_id, correlation_id=uuid.uuid4().hex
+        )
+        for i, sim in enumerate([sims[0], sims[0], sims[1]])
+    ]
+    await hpc_db.update_hpcrun_status(
+        hpcrun_id=hpcruns[1].database_id,
+        new_slurm_job=SlurmJob(job_id=987657, name="list", account="acct", user_name="user", job_state="COMPLETED"),
+    )
+    try:
+        listed = await simulator_db.list_simulations(simulator_id=simulator.database_id)
+        assert [sim.database_id for sim in listed] == [sim.database_id for sim in sims]
+        assert [None if sim.hpc_run is None else sim.hpc_run.database_id for sim in listed] == [
+            hpcruns[1].database_id,
+            hpcruns[2].database_id,
+            None,
+        ]
+
+        first_page = await simulator_db.list_simulations(simulator_id=simulator.database_id, limit=2)
+        second_page = await simulator_db.list_simulations(
+            simulator_id=simulator.database_id, after_id=first_page[-1].database_id, limit=2
+        )
+        assert [sim.database_id for sim in first_page + second_page] == [sim.database_id for sim in sims]
+
+        completed = await simulator_db.list_simulations(simulator_id=simulator.database_id, status=JobStatus.COMPLETED)
+        assert [sim.database_id for sim in completed] == [sims[0].database_id]
+        in_an_hour = datetime.datetime.now() + datetime.timedelta(hours=1)
+        assert await simulator_db.list_simulations(simulator_id=simulator.database_id, created_after=in_an_hour) == []
+
+        fetched = await simulator_db.get_simulation(sims[0].database_id)
+        assert fetched is not None and fetched.hpc_run is not None
+        assert fetched.hpc_run.status == JobStatus.COMPLETED
+    finally:
+        for hpcrun in hpcruns:
+            await hpc_db.delete_hpcrun(hpcrun.database_id)
+        for sim in sims:
+            await simulator_db.delete_simulation(sim.database_id)
+
+
+@pytest.mark.asyncio
+async def test_list_packages_with_computes(database_service: DatabaseServiceSQL, simulator: SimulatorVersion) -> None:
+    package_db = database_service.get_package_db()
+    outlines = [
+        PackageOutline(
+            package_type=PackageType.PYPI,
+            name=f"package-{uuid.uuid4().hex[:8]}",
+            compute=[
+                BiGraphComputeOutline(
+                    module=f"module_{i}",
+                    name=f"{compute_type.value}_{i}",
+                    compute_type=compute_type,
+                    inputs="{}",
+                    outputs="{}",
+                )
+                for compute_type in [BiGraphComputeType.PROCESS, BiGraphComputeType.STEP]
+            ],
+        )
+        for i in range(2)
+    ]
+    # a conda package may share its name with a pypi package
+    outlines.append(outlines[1].model_copy(update={"package_type": PackageType.CONDA}))
+    packages = [await package_db.insert_package(outline) for outline in outlines]
+
+    def _dependency(name: str) -> ExperimentDependency:
+        return ExperimentDependency(
+            dependency_name=name,
+            url_reference=DependencyTypes.get_pypi_url(name),
+            dependency_type=DependencyTypes.PYPI,
+        )
+
+    try:
+        dependencies = ExperimentPrimaryDependencies(
+            pypi_dependencies=[_dependency(packages[1].name), _dependency("not-registered")],
+            conda_dependencies=[_dependency(packages[0].name)],
+        )
+        assert await package_db.list_packages_from_dependencies(dependencies) == [packages[1], packages[2], packages[0]]
+
+        for simulator_package in await package_db.list_simulator_packages(simulator.database_id):
+            processes, steps = await package_db.list_all_computes_in_package(simulator_package.database_id)
+            assert (simulator_package.processes, simulator_package.steps) == (processes, steps)
+    finally:
+        for package in packages:
+            for compute in [*package.processes, *package.steps]:
+                await package_db.delete_bigraph_compute(compute)
+            await package_db.delete_bigraph_package(package)
+
+
+@pytest.mark.asyncio
+async def test_insert_packages(database_service: DatabaseServiceSQL) -> None:
+    package_db = database_service.get_package_db()
+
+    def _outline(name: str, num_computes: int) -> PackageOutline:
+        return PackageOutline(
+            package_type=PackageType.PYPI,
+            name=name,
+            compute=[
+                BiGraphComputeOutline(
+                    module=f"module_{i}",
+                    name=f"compute_{i}",
+                    compute_type=BiGraphComputeType.PROCESS if i % 2 == 0 else BiGraphComputeType.STEP,
+                    inputs="{}",
+                    outputs="{}",
+                )
+                for i in range(num_computes)
+            ],
+        )
+
+    names = [f"package-{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    registered = await package_db.insert_package(_outline(names[0], 2))
+    packages = [registered]
+    try:
+        packages = await package_db.insert_packages([
+            _outline(names[1], 3),
+            _outline(names[0], 5),  # registered already, left unchanged
+            _outline(names[2], 0),
+            _outline(names[1], 1),  # duplicate, the first outline wins
+        ])
+        assert [package.name for package in packages] == [names[1], names[0], names[2]]
+        assert packages[1] == registered
+        assert [(len(package.processes), len(package.steps)) for package in packages] == [(2, 1), (1, 1), (0, 0)]
+        for package in packages:
+            assert await package_db.list_all_computes_in_package(package.database_id) == (
+                package.processes,
+                package.steps,
+            )
+        assert await package_db.insert_packages([]) == []
+    finally:
+        for package in packages:
+            for compute in [*package.processes, *package.steps]:
+                await package_db.delete_bigraph_compute(compute)
+            await package_db.delete_bigraph_package(package)
+
+
+@pytest.mark.asyncio
+async def test_worker_event_partitions(database_service: DatabaseServiceSQL) -> None:
+    hpc_db = database_service.get_hpc_db()
+    created = await hpc_db.create_worker_event_partitions(days_ahead=2)
+    # today's partition exists already if events were inserted before, it is created on demand
+    assert len(created) >= 2
+    assert await hpc_db.create_worker_event_partitions(days_ahead=2) == []
+
+    assert await hpc_db.drop_worker_event_partitions(retention_days=30) == []
+    # a negative retention expires the partitions created ahead of time, they are detached and dropped
+    assert set(created) <= set(await hpc_db.drop_worker_event_partitions(retention_days=-3))
+    assert set(created) <= set(await hpc_db.create_worker_event_partitions(days_ahead=2))
+
+
+@pytest.mark.asyncio
+async def test_simulator_provisioning_claim(database_service: DatabaseServiceSQL, simulator: SimulatorVersion) -> None:
+    simulator_db = database_service.get_simulator_db()
+    simulator_id = simulator.database_id
+    assert await simulator_db.claim_provisioning(simulator_id, claim="replica-a", lease_seconds=60)
+    assert not await simulator_db.claim_provisioning(simulator_id, claim="replica-b", lease_seconds=60)
+    # renewed by its holder, released only by its holder
+    assert await simulator_db.claim_provisioning(simulator_id, claim="replica-a", lease_seconds=60)
+    await simulator_db.release_provisioning(simulator_id, claim="replica-b")
+    assert not await simulator_db.claim_provisioning(simulator_id, claim="replica-b", lease_seconds=60)
+
+    # a claim which is not renewed is taken over once its lease expired
+    await asyncio.sleep(1.1)
+    assert await simulator_db.claim_provisioning(simulator_id, claim="replica-b", lease_seconds=1)
+    await simulator_db.release_provisioning(simulator_id, claim="replica-b")
+    assert await simulator_db.claim_provisioning(simulator_id, claim="replica-c", lease_seconds=60)
+    await simulator_db.release_provisioning(simulator_id, claim="replica-c")
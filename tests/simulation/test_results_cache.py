@@ -0,0 +1,41 @@
+import asyncio
+import os
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import pytest
+
+from compose_api.simulation.data_service import ResultsFileInfo
+from compose_api.simulation.results_cache import ResultsCache
+
+
+@pytest.mark.asyncio
+async def test_results_cache_shares_fetches_and_evicts_lru(tmp_path: Path) -> None:
+    cache = ResultsCache(cache_dir=tmp_path, max_bytes=250)
+    fetched: list[str] = []
+
+    def _fetcher(experiment_id: str) -> Callable[[Path], Awaitable[None]]:
+        async def fetch(destination: Path) -> None:
+            fetched.append(experiment_id)
+            await asyncio.sleep(0.05)
+            destination.write_bytes(experiment_id.encode() * 20)
+
+        return fetch
+
+    async def read(experiment_id: str) -> bytes:
+        file_info = ResultsFileInfo(size=len(experiment_id) * 20, mtime=1)
+        with await cache.open(experiment_id, file_info, fetch=_fetcher(experiment_id)) as cached_file:
+            return cached_file.read()
+
+    # concurrent misses share one fetch, no partial file is left behind
+    assert await asyncio.gather(*[read("exp_a") for _ in range(5)]) == [b"exp_a" * 20] * 5
+    assert fetched == ["exp_a"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["exp_a_64_1.zip"]
+
+    await read("exp_b")
+    # exp_a is used again, so exp_b is the least recently used entry once exp_c no longer fits
+    os.utime(tmp_path / "exp_b_64_1.zip", (0, 0))
+    await read("exp_a")
+    await read("exp_c")
+    assert fetched == ["exp_a", "exp_b", "exp_c"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["exp_a_64_1.zip", "exp_c_64_1.zip"]
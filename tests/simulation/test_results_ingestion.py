@@ -0,0 +1,71 @@
+import asyncio
+import os
+import zipfile
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from compose_api.common.gateway.models import Namespace
+from compose_api.simulation.data_service import DataServiceHpc
+from compose_api.simulation.results_ingestion import MANIFEST_FILE_NAME, ResultsIngestor, read_manifest
+
+test_dir = Path(__file__).parent.parent
+report_csv_file = test_dir / "fixtures/resources/report.csv"
+
+
+@pytest.mark.asyncio
+async def test_results_ingestion_writes_parquet_dataset(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    results_zip = tmp_path / "results.zip"
+    with zipfile.ZipFile(results_zip, "w") as archive:
+        archive.write(report_csv_file, "simulation.sedml/report.csv")
+        archive.writestr("simulation.sedml/report.h5", b"not ingested")
+        archive.writestr("log.yml", "status: SUCCEEDED")
+    dataset_dir = tmp_path / "results_parquet"
+    monkeypatch.setattr(DataServiceHpc, "_get_results_zip", staticmethod(lambda experiment_id, namespace: results_zip))
+    monkeypatch.setattr(DataServiceHpc, "get_columnar_results_dir", lambda self, experiment_id, namespace: dataset_dir)
+    data_service = DataServiceHpc()
+    downloads = 0
+    download_results = data_service.download_results
+
+    async def counting_download_results(experiment_id: str, namespace: Namespace, destination: Path, size: int) -> None:
+        nonlocal downloads
+        downloads += 1
+        await download_results(experiment_id, namespace, destination=destination, size=size)
+
+    monkeypatch.setattr(data_service, "download_results", counting_download_results)
+    ingestor = ResultsIngestor(data_service=data_service, database_service=None)  # type: ignore[arg-type]
+
+    columnar_results = await ingestor.ingest("experiment_a")
+    expected = pl.read_csv(report_csv_file)
+    assert [report.report_id for report in columnar_results.reports] == ["simulation.sedml/report"]
+    report = columnar_results.reports[0]
+    assert report.num_rows == expected.height
+    assert sorted(path.name for path in dataset_dir.iterdir()) == sorted([MANIFEST_FILE_NAME, report.partition])
+    assert pl.read_parquet(dataset_dir / report.partition / "data.parquet").equals(expected)
+    # selective reads only touch the requested column
+    assert pl.scan_parquet(dataset_dir / report.partition).select("X").collect().equals(expected.select("X"))
+    column_statistics = {column.name: column for column in report.columns}
+    assert column_statistics["X"].min == expected.get_column("X").min()
+    assert column_statistics["X"].max == expected.get_column("X").max()
+    assert column_statistics["X"].null_count == 0
+    assert read_manifest(dataset_dir) == columnar_results
+
+    # unchanged results are not ingested again, rewritten ones replace the dataset
+    assert await ingestor.ingest("experiment_a") == columnar_results
+    assert downloads == 1
+    previous_version = dataset_dir.resolve()
+    os.utime(results_zip, (0, 0))
+    # concurrent ingestions of the same results share a single build
+    first, second = await asyncio.gather(ingestor.ingest("experiment_a"), ingestor.ingest("experiment_a"))
+    assert first == second
+    assert downloads == 2
+    assert first.source_etag != columnar_results.source_etag
+    # the dataset directory is a symlink swapped over to the new build, the previous build is removed
+    assert dataset_dir.is_symlink()
+    assert not previous_version.exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([
+        "results.zip",
+        "results_parquet",
+        dataset_dir.resolve().name,
+    ])
@@ -8,8 +8,9 @@ from pathlib import Path
 import pytest
 from nats.aio.client import Client as NATSClient
 
-from compose_api.common.hpc.models import SlurmJob
+from compose_api.common.hpc.models import SlurmJob, SlurmJobKey
 from compose_api.common.hpc.slurm_service import SlurmService
+from compose_api.common.ssh.ssh_service import SSHService
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseServiceSQL
 from compose_api.simulation.hpc_utils import _namespace_path, get_correlation_id, get_experiment_id
@@ -23,6 +24,7 @@ from compose_api.simulation.models import (
     SimulatorVersion,
     WorkerEvent,
 )
+from compose_api.simulation.poll_scheduler import PollScheduler
 
 
 async def insert_job(database_service: DatabaseServiceSQL, slurmjobid: int, simulator: SimulatorVersion) -> HpcRun:
@@ -85,8 +87,8 @@ async def test_messaging(
         subject=get_settings().nats_worker_event_subject,
         payload=worker_event.model_dump_json(exclude_unset=True, exclude_none=True).encode("utf-8"),
     )
-    # get the updated state of the job
-    await asyncio.sleep(0.1)
+    # get the updated state of the job, once the buffered event was written
+    await asyncio.sleep(get_settings().worker_event_flush_interval_seconds + 0.1)
     _updated_worker_events = await database_service.get_hpc_db().list_worker_events(
         hpcrun_id=hpc_run.database_id, prev_sequence_number=sequence_number - 1
     )
@@ -146,3 +148,95 @@ async def test_job_monitor(
 
     # Stop polling
     await monitor.stop_polling()
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_backoff_and_rate_limit() -> None:
+    scheduler = PollScheduler(
+        min_interval=0.01, max_interval=0.08, active_max_interval=0.04, backoff_factor=2, max_polls_per_minute=3
+    )
+    # quiet polls back off, capped lower while jobs are active
+    scheduler.record_poll(active_jobs=2, transitions=0)
+    scheduler.record_poll(active_jobs=2, transitions=0)
+    scheduler.record_poll(active_jobs=2, transitions=0)
+    assert scheduler.interval == pytest.approx(0.04)
+    scheduler.record_poll(active_jobs=0, transitions=0)
+    scheduler.record_poll(active_jobs=0, transitions=0)
+    assert scheduler.interval == pytest.approx(0.08)
+    # a state transition or a submission resets to the fastest interval
+    scheduler.record_poll(active_jobs=1, transitions=1)
+    assert scheduler.interval == pytest.approx(0.01)
+
+    stop_event = asyncio.Event()
+    scheduler.record_poll(active_jobs=0, transitions=0)
+    scheduler.notify_activity()
+    await asyncio.wait_for(scheduler.wait_for_next_poll(stop_event), timeout=0.05)
+    await scheduler.wait_for_next_poll(stop_event)
+    await scheduler.wait_for_next_poll(stop_event)
+
+    # the fourth poll within a minute is held back until stop_event is set
+    waiter = asyncio.create_task(scheduler.wait_for_next_poll(stop_event))
+    await asyncio.sleep(0.1)
+    assert not waiter.done()
+    stop_event.set()
+    await asyncio.wait_for(waiter, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_job_monitor_removes_finished_packed_status_dirs(monkeypatch: pytest.MonkeyPatch) -> None:
+    def _packed_run(database_id: int, packed_task_id: int) -> HpcRun:
+        return HpcRun(
+            database_id=database_id,
+            slurmjobid=500,
+            packed_task_id=packed_task_id,
+            correlation_id=f"packed-{database_id}",
+            job_type=JobType.SIMULATION,
+            sim_id=database_id,
+            simulator_id=None,
+            status=JobStatus.RUNNING,
+        )
+
+    hpc_runs = {1: _packed_run(1, 0), 2: _packed_run(2, 1)}
+
+    class _HpcDb:
+        async def list_active_hpcruns(self) -> list[HpcRun]:
+            return [hpc_run for hpc_run in hpc_runs.values() if not hpc_run.status or not hpc_run.status.is_terminal()]
+
+        async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> HpcRun:
+            status = JobStatus(new_slurm_job.job_state.lower())
+            hpc_runs[hpcrun_id] = hpc_runs[hpcrun_id].model_copy(update={"status": status})
+            return hpc_runs[hpcrun_id]
+
+    class _DatabaseService:
+        def get_hpc_db(self) -> _HpcDb:
+            return _HpcDb()
+
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    monitor = JobMonitor(nats_client=None, database_service=_DatabaseService(), slurm_service=slurm_service)  # type: ignore[arg-type]
+    task_states = {(500, 0): "COMPLETED|2025-01-01T00:01:00", (500, 1): "RUNNING|2025-01-01T00:00:30"}
+    removed: list[list[int]] = []
+
+    async def fake_get_changed_slurm_jobs(job_ids: list[int]) -> dict[SlurmJobKey, SlurmJob]:
+        return {(500, None): SlurmJob(job_id=500, name="packed", account="acct", user_name="user", job_state="RUNNING")}
+
+    async def fake_get_packed_task_states(status_root: Path, job_ids: list[int]) -> dict[tuple[int, int], str]:
+        return task_states
+
+    async def fake_remove_packed_status_dirs(status_root: Path, job_ids: list[int]) -> None:
+        removed.append(job_ids)
+
+    monkeypatch.setattr(monitor, "_get_changed_slurm_jobs", fake_get_changed_slurm_jobs)
+    monkeypatch.setattr(slurm_service, "get_packed_task_states", fake_get_packed_task_states)
+    monkeypatch.setattr(slurm_service, "remove_packed_status_dirs", fake_remove_packed_status_dirs)
+
+    # one simulation of the batch is still running, its status file is still needed
+    await monitor.update_running_jobs()
+    assert hpc_runs[1].status == JobStatus.COMPLETED
+    assert removed == []
+
+    task_states[(500, 1)] = "FAILED|2025-01-01T00:02:00"
+    await monitor.update_running_jobs()
+    assert hpc_runs[2].status == JobStatus.FAILED
+    assert removed == [[500]]
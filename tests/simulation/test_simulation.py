@@ -10,18 +10,22 @@ import pytest
 from pbest.containerization.container_constructor import _default_registry_deps, generate_container_def_file
 from pbest.utils.input_types import (
     ContainerizationEngine,
+    ContainerizationFileRepr,
 )
 
 from compose_api.api.introspect_package import introspect_package
 from compose_api.common.gateway.utils import allow_list
 from compose_api.common.hpc.models import SlurmJob
+from compose_api.common.hpc.slurm_service import SlurmService
 from compose_api.common.ssh.ssh_service import SSHService
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseServiceSQL
 from compose_api.simulation import handlers
+from compose_api.simulation.dispatch_queue import DispatchQueue
 from compose_api.simulation.hpc_utils import get_singularity_hash
 from compose_api.simulation.job_monitor import JobMonitor
 from compose_api.simulation.models import (
+    HpcRun,
     JobStatus,
     JobType,
     PBAllowList,
@@ -30,7 +34,6 @@ from compose_api.simulation.models import (
     SimulatorVersion,
 )
 from compose_api.simulation.simulation_service import SimulationServiceHpc
-from tests.fixtures.mocks import TestBackgroundTask
 from tests.simulators.utils import assert_test_sim_results, test_dir
 
 
@@ -123,18 +126,19 @@ async def test_simulate(
 ) -> None:
     # insert the latest commit into the database
 
-    test_bg_tasks = TestBackgroundTask()
+    # no workers started, the submission happens in run_pending()
+    dispatch_queue = DispatchQueue(
+        database_service=database_service, simulation_service=simulation_service_slurm, job_monitor=job_monitor
+    )
 
     sim_experiement = await handlers.run_simulation(
         simulation_request=simulation_request,
         database_service=database_service,
-        simulation_service_slurm=simulation_service_slurm,
-        job_monitor=job_monitor,
-        background_tasks=test_bg_tasks,
+        dispatch_queue=dispatch_queue,
         pb_allow_list=PBAllowList(allow_list=allow_list),
     )
     assert sim_experiement is not None
-    await test_bg_tasks.call_tasks()
+    assert await dispatch_queue.run_pending() == 1
 
     hpcrun = await database_service.get_hpc_db().get_hpcrun_by_ref(
         sim_experiement.simulation_database_id, JobType.SIMULATION
@@ -202,3 +206,145 @@ async def test_simulate(
 #         simulation=simulation,
 #         experiment_id=experiement_id,
 #     )
+
+
+@pytest.mark.asyncio
+async def test_default_container_def_is_memoized(monkeypatch: pytest.MonkeyPatch) -> None:
+    generated: list[ContainerizationFileRepr] = []
+
+    def fake_generate() -> ContainerizationFileRepr:
+        if len(generated) == 2:
+            raise RuntimeError("registry unavailable")
+        generated.append(
+            ContainerizationFileRepr(
+                representation=f"Bootstrap: docker\n# {len(generated)}",
+                containerization_engine=ContainerizationEngine.APPTAINER,
+            )
+        )
+        return generated[-1]
+
+    monkeypatch.setattr(handlers, "_generate_default_container_def", fake_generate)
+    monkeypatch.setattr(handlers, "global_default_container_def", None)
+    monkeypatch.setattr(get_settings(), "default_container_def_ttl_seconds", 3600)
+
+    first = await handlers.get_default_container_def()
+    assert await handlers.get_default_container_def() == first
+    assert len(generated) == 1
+
+    # expired: regenerated from the registry
+    monkeypatch.setattr(handlers, "global_default_container_def_expiry", 0.0)
+    second = await handlers.get_default_container_def()
+    assert second != first
+    assert len(generated) == 2
+
+    # expired, but the registry is down: keep serving the previous definition, and only retry after a short while
+    monkeypatch.setattr(get_settings(), "default_container_def_retry_seconds", 3600)
+    monkeypatch.setattr(handlers, "global_default_container_def_expiry", 0.0)
+    assert await handlers.get_default_container_def() == second
+    assert handlers.global_default_container_def_expiry > time.monotonic()
+
+    # concurrent callers share a single regeneration
+    generated.clear()
+    monkeypatch.setattr(handlers, "global_default_container_def_expiry", 0.0)
+    results = await asyncio.gather(*(handlers.get_default_container_def() for _ in range(5)))
+    assert len(generated) == 1
+    assert all(result == generated[0] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_container_provisioning_is_single_flight(monkeypatch: pytest.MonkeyPatch) -> None:
+    simulator_version = SimulatorVersion(
+        database_id=1,
+        container_def=ContainerizationFileRepr(
+            representation="Bootstrap: docker", containerization_engine=ContainerizationEngine.APPTAINER
+        ),
+        container_def_hash="single-flight",
+        packages=None,
+    )
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def fake_provision(**kwargs: object) -> None:
+        calls.append(str(kwargs["random_string"]))
+        await release.wait()
+        if len(calls) == 2:
+            raise RuntimeError("build failed")
+
+    monkeypatch.setattr(handlers, "_provision_container", fake_provision)
+
+    async def provision(random_string: str) -> None:
+        await handlers._provision_container_single_flight(
+            database_service=None,  # type: ignore[arg-type]
+            job_monitor=None,  # type: ignore[arg-type]
+            simulation_service_slurm=None,  # type: ignore[arg-type]
+            simulator_version=simulator_version,
+            random_string=random_string,
+        )
+
+    waiters = [asyncio.create_task(provision(str(i))) for i in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*waiters)
+    assert calls == ["0"]
+    assert handlers.global_container_provisioning == {}
+
+    # the next provisioning starts afresh, and its failure reaches every waiter
+    waiters = [asyncio.create_task(provision(str(i))) for i in range(3)]
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert calls == ["0", "0"]
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_build_in_flight_is_checked_with_slurm(monkeypatch: pytest.MonkeyPatch) -> None:
+    build_run = HpcRun(
+        database_id=7,
+        slurmjobid=5150,
+        correlation_id="N/A",
+        job_type=JobType.BUILD_CONTAINER,
+        sim_id=None,
+        simulator_id=1,
+        status=JobStatus.RUNNING,
+    )
+    recorded: list[str] = []
+
+    class _HpcDb:
+        async def update_hpcrun_status(self, hpcrun_id: int, new_slurm_job: SlurmJob) -> HpcRun:
+            recorded.append(new_slurm_job.job_state)
+            return build_run.model_copy(update={"status": JobStatus(new_slurm_job.job_state.lower())})
+
+    class _DatabaseService:
+        def get_hpc_db(self) -> _HpcDb:
+            return _HpcDb()
+
+    slurm_jobs: dict[tuple[int, int | None], SlurmJob] = {}
+
+    async def fake_get_job_status(job_ids: list[int]) -> dict[tuple[int, int | None], SlurmJob]:
+        assert job_ids == [5150]
+        return slurm_jobs
+
+    slurm_service = SlurmService(
+        ssh_service=SSHService(hostname="localhost", username="user", key_path=Path("/dev/null"))
+    )
+    monkeypatch.setattr(slurm_service, "get_job_status", fake_get_job_status)
+
+    async def in_flight() -> tuple[bool, int | None]:
+        return await handlers._get_build_in_flight(
+            _DatabaseService(),  # type: ignore[arg-type]
+            slurm_service,
+            build_run,
+        )
+
+    def _slurm_job(state: str) -> SlurmJob:
+        return SlurmJob(job_id=5150, name="build", account="acct", user_name="user", job_state=state)
+
+    # purged from slurmctld, a dependency on it would be rejected: build again
+    assert await in_flight() == (False, None)
+    slurm_jobs[(5150, None)] = _slurm_job("PENDING")
+    assert await in_flight() == (True, 5150)
+    # the build finished before the monitor recorded it
+    slurm_jobs[(5150, None)] = _slurm_job("COMPLETED")
+    assert await in_flight() == (True, None)
+    slurm_jobs[(5150, None)] = _slurm_job("FAILED")
+    assert await in_flight() == (False, None)
+    assert recorded == ["PENDING", "COMPLETED", "FAILED"]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from compose_api.simulation.models import WorkerEvent
+from compose_api.simulation.worker_event_buffer import WorkerEventBuffer
+
+
+class _HpcDb:
+    def __init__(self) -> None:
+        self.batches: list[list[WorkerEvent]] = []
+        self.unblocked = asyncio.Event()
+
+    async def insert_worker_events(self, worker_events: list[WorkerEvent]) -> None:
+        await self.unblocked.wait()
+        self.batches.append(worker_events)
+
+
+class _DatabaseService:
+    def __init__(self, hpc_db: _HpcDb) -> None:
+        self.hpc_db = hpc_db
+
+    def get_hpc_db(self) -> _HpcDb:
+        return self.hpc_db
+
+
+def _worker_event(sequence_number: int) -> WorkerEvent:
+    return WorkerEvent(
+        hpcrun_id=1, correlation_id="correlation", sequence_number=sequence_number, mass={"water": 1.0}, time=0.1
+    )
+
+
+@pytest.mark.asyncio
+async def test_worker_event_buffer_batches_with_backpressure() -> None:
+    hpc_db = _HpcDb()
+    buffer = WorkerEventBuffer(
+        database_service=_DatabaseService(hpc_db),  # type: ignore[arg-type]
+        batch_size=10,
+        flush_interval_seconds=0.05,
+        max_pending=15,
+        max_retries=0,
+        retry_backoff_seconds=0.0,
+    )
+    buffer.start()
+
+    # the first batch is held up by the database, the buffer fills up behind it
+    async def produce() -> None:
+        for i in range(40):
+            await buffer.put(_worker_event(i))
+
+    producer = asyncio.create_task(produce())
+    await asyncio.sleep(0.1)
+    assert not producer.done()
+    assert hpc_db.batches == []
+
+    hpc_db.unblocked.set()
+    await asyncio.wait_for(producer, timeout=5)
+    await buffer.close()
+    assert all(len(batch) <= 10 for batch in hpc_db.batches)
+    assert len(hpc_db.batches) < 40
+    assert [event.sequence_number for batch in hpc_db.batches for event in batch] == list(range(40))
+
+    # a partial batch is written once the flush interval passed
+    buffer.start()
+    await buffer.put(_worker_event(40))
+    await asyncio.sleep(0.2)
+    assert hpc_db.batches[-1] == [_worker_event(40)]
+    await buffer.close()
+
+
+class _FlakyHpcDb:
+    def __init__(self, transient_failures: int) -> None:
+        self.transient_failures = transient_failures
+        self.inserted: list[WorkerEvent] = []
+
+    async def insert_worker_events(self, worker_events: list[WorkerEvent]) -> None:
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            raise ConnectionResetError("connection reset by peer")
+        if any(event.sequence_number == 3 for event in worker_events):
+            raise ValueError("foreign key violation")
+        self.inserted.extend(worker_events)
+
+
+@pytest.mark.asyncio
+async def test_worker_event_buffer_retries_then_inserts_one_by_one() -> None:
+    hpc_db = _FlakyHpcDb(transient_failures=2)
+    buffer = WorkerEventBuffer(
+        database_service=_DatabaseService(hpc_db),  # type: ignore[arg-type]
+        batch_size=10,
+        flush_interval_seconds=0.05,
+        max_pending=15,
+        max_retries=3,
+        retry_backoff_seconds=0.01,
+    )
+    buffer.start()
+    for i in range(5):
+        await buffer.put(_worker_event(i))
+    await asyncio.wait_for(buffer.close(), timeout=5)
+
+    # the transient errors are retried, the bad event only loses itself
+    assert hpc_db.transient_failures == 0
+    assert [event.sequence_number for event in hpc_db.inserted] == [0, 1, 2, 4]
@@ -9,6 +9,7 @@ from compose_api.api.client.types import File
 from compose_api.config import get_settings
 from compose_api.db.database_service import DatabaseServiceSQL
 from compose_api.simulation.data_service import DataService
+from compose_api.simulation.dispatch_queue import DispatchQueue
 from compose_api.simulation.job_monitor import JobMonitor
 from compose_api.simulation.models import Simulator
 from compose_api.simulation.simulation_service import SimulationServiceHpc
@@ -22,6 +23,7 @@ async def test_readdy(
     database_service: DatabaseServiceSQL,
     simulation_service_slurm: SimulationServiceHpc,
     job_monitor: JobMonitor,
+    dispatch_queue: DispatchQueue,
     data_service: DataService,
     simulator: Simulator,
 ) -> None: